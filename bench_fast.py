@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+БЕНЧМАРК ПАРСЕРА ЛОГОВ SURICATA
+Генерирует детерминированный синтетический fast.log и замеряет скорость
+(строк/с, байт/с) и пиковую память основных этапов parse_fast.py.
+Результат сохраняется в JSON, чтобы сравнивать версии между собой.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import contextlib
+import concurrent.futures
+import multiprocessing
+from datetime import datetime, timedelta
+
+import parse_fast
+
+# Каталог правил: (sid, rev, описание, классификация, приоритет)
+RULES = [
+    (2001219, 20, 'ET SCAN Potential SSH Scan', 'Attempted Information Leak', 2),
+    (2402000, 6755, 'ET DROP Dshield Block Listed Source', 'Misc Attack', 2),
+    (2021641, 10, 'ET MALWARE LokiBot Checkin', 'A Network Trojan was detected', 1),
+    (2027390, 5, 'ET USER_AGENTS Microsoft Dr Watson User-Agent (MS Crash Reporter)', 'Unknown Traffic', 3),
+    (2013028, 7, 'ET POLICY curl User-Agent Outbound', 'Attempted Information Leak', 2),
+    (2210045, 2, 'SURICATA STREAM Packet with invalid ack', 'Generic Protocol Command Decode', 3),
+    (2200003, 2, 'SURICATA IPv4 truncated packet', 'Generic Protocol Command Decode', 3),
+    (2010935, 3, 'ET SCAN Suspicious inbound to MSSQL port 1433', 'Potentially Bad Traffic', 2),
+    (2024897, 3, 'ET MALWARE Win32/Spy.Agent C&C Activity', 'Malware Command and Control Activity Detected', 1),
+    (2019401, 2, 'ET POLICY Vulnerable Java Version 1.8.x Detected', 'Potentially Bad Traffic', 2),
+    (2008578, 6, 'ET SCAN Sipvicious Scan', 'Attempted Information Leak', 2),
+    (2100498, 7, 'GPL ATTACK_RESPONSE id check returned root', 'Potentially Bad Traffic', 2),
+    (2016149, 2, 'ET INFO Session Traversal Utilities for NAT (STUN Binding Request)', 'Attempted User Privilege Gain', 2),
+    (2030358, 1, 'ET EXPLOIT Possible CVE-2020-11910 Ripple20 ICMP', 'Attempted Administrator Privilege Gain', 1),
+    (2018959, 4, 'ET POLICY PE EXE or DLL Windows file download HTTP', 'Potential Corporate Privacy Violation', 1),
+    (2025275, 3, 'ET TROJAN Emotet CnC Beacon', 'A Network Trojan was detected', 1),
+    (2012648, 3, 'ET POLICY Dropbox Client Broadcasting', 'Potential Corporate Privacy Violation', 1),
+    (2033078, 2, 'ET INFO Observed DNS Query to .cloud TLD', 'Misc activity', 3),
+    (2221010, 1, 'SURICATA HTTP unable to match response to request', 'Generic Protocol Command Decode', 3),
+    (2027758, 4, 'ET DNS Query for .to TLD', 'Potentially Bad Traffic', 2),
+]
+
+# Распределение протоколов и портов назначения
+PROTOCOLS = ['TCP', 'UDP', 'ICMP']
+PROTOCOL_WEIGHTS = [70, 25, 5]
+DST_PORTS = {
+    'TCP': ([443, 80, 22, 445, 3389, 8080, 1433, 25], [40, 25, 10, 8, 6, 5, 3, 3]),
+    'UDP': ([53, 123, 161, 1900, 3478, 5353], [60, 10, 8, 8, 7, 7]),
+}
+
+# Доли некорректных строк: префикс syslog (regex), альтернативный формат (alt), мусор
+DEFAULT_SYSLOG_RATIO = 0.01
+DEFAULT_ALT_RATIO = 0.005
+DEFAULT_GARBAGE_RATIO = 0.002
+
+# Размер пачки строк генератора
+GENERATE_BATCH = 10000
+
+def _zipf_weights(count, exponent=1.1):
+    """Веса с убыванием по закону Ципфа: немного частых и длинный хвост редких значений"""
+    return [1.0 / (rank + 1) ** exponent for rank in range(count)]
+
+def _host_pool(rng, count, first_octets):
+    """Пул IP-адресов из заданных первых октетов"""
+    return [
+        f"{rng.choice(first_octets)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+        for _ in range(count)
+    ]
+
+def generate_log(filename, lines, seed=42, syslog_ratio=DEFAULT_SYSLOG_RATIO,
+                 alt_ratio=DEFAULT_ALT_RATIO, garbage_ratio=DEFAULT_GARBAGE_RATIO):
+    """
+    Пишет синтетический fast.log из lines строк
+    При одинаковых параметрах и seed результат побайтно совпадает
+    """
+    rng = random.Random(seed)
+    sources = _host_pool(rng, 2000, [10, 172, 192])
+    destinations = _host_pool(rng, 5000, [5, 31, 45, 91, 104, 151, 185, 203])
+    source_weights = _zipf_weights(len(sources))
+    destination_weights = _zipf_weights(len(destinations), 0.9)
+    rule_weights = _zipf_weights(len(RULES), 0.8)
+    line_kinds = ['syslog', 'alt', 'garbage', 'fast']
+    kind_weights = [syslog_ratio, alt_ratio, garbage_ratio, 1 - syslog_ratio - alt_ratio - garbage_ratio]
+    timestamp = datetime(2026, 1, 1)
+
+    with open(filename, 'w', encoding='utf-8', newline='\n') as log_file:
+        remaining = lines
+        while remaining > 0:
+            batch = min(GENERATE_BATCH, remaining)
+            remaining -= batch
+            rules = rng.choices(RULES, rule_weights, k=batch)
+            protocols = rng.choices(PROTOCOLS, PROTOCOL_WEIGHTS, k=batch)
+            src_ips = rng.choices(sources, source_weights, k=batch)
+            dst_ips = rng.choices(destinations, destination_weights, k=batch)
+            kinds = rng.choices(line_kinds, kind_weights, k=batch)
+
+            out = []
+            for rule, protocol, src_ip, dst_ip, kind in zip(rules, protocols, src_ips, dst_ips, kinds):
+                timestamp += timedelta(microseconds=int(rng.expovariate(1 / 2000)))
+                if kind == 'garbage':
+                    out.append(f"{timestamp:%m/%d/%Y-%H:%M:%S.%f} suricata restarted, reloading rules\n")
+                    continue
+
+                sid, rev, description, classification, priority = rule
+                if protocol == 'ICMP':
+                    src_port, dst_port = rng.choice((0, 3, 8, 11)), 0
+                else:
+                    ports, weights = DST_PORTS[protocol]
+                    src_port, dst_port = rng.randrange(1024, 65536), rng.choices(ports, weights)[0]
+                alert = (
+                    f"[1:{sid}:{rev}] {description} [**] [Classification: {classification}] "
+                    f"[Priority: {priority}] {{{protocol}}} {src_ip}:{src_port} -> {dst_ip}:{dst_port}\n"
+                )
+                if kind == 'alt':
+                    # Без маркеров [**]: разбирается только альтернативным паттерном
+                    out.append(f"{timestamp:%m/%d/%Y-%H:%M:%S.%f} [1:{sid}:{rev}] {description} "
+                               f"[Classification: {classification}] [Priority: {priority}] "
+                               f"{{{protocol}}} {src_ip}:{src_port} -> {dst_ip}:{dst_port}\n")
+                elif kind == 'syslog':
+                    out.append(f"{timestamp:%b %d %H:%M:%S} sensor1 suricata[1234]: "
+                               f"{timestamp:%m/%d/%Y-%H:%M:%S.%f}  [**] {alert}")
+                else:
+                    out.append(f"{timestamp:%m/%d/%Y-%H:%M:%S.%f}  [**] {alert}")
+            log_file.write(''.join(out))
+
+def _peak_rss_kb():
+    """
+    Пиковая память процесса в КБ и источник значения
+    resource есть только в Unix; в Windows используется psutil, если он установлен,
+    иначе пик выделений Python по tracemalloc (без памяти интерпретатора)
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # В macOS ru_maxrss в байтах, в Linux - в килобайтах
+        return (peak // 1024 if sys.platform == 'darwin' else peak), 'ru_maxrss'
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) // 1024, 'psutil'
+    except ImportError:
+        pass
+    import tracemalloc
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1] // 1024, 'tracemalloc'
+    return None, None
+
+def _bench_args(parse_args):
+    """Аргументы parse_fast для замеров: без вывода, с дополнительными опциями"""
+    return parse_fast.parse_arguments(['-q', '-s'] + parse_args)
+
+def _case_parse_line(filename, args, output_dir):
+    """parse_suricata_log_line для каждой строки файла"""
+    parse = parse_fast.parse_suricata_log_line
+    parsed = 0
+    with open(filename, 'r', encoding=args.encoding, errors='replace') as log_file:
+        for line in log_file:
+            line = line.strip()
+            if line and parse(line) is not None:
+                parsed += 1
+    return parsed
+
+def _case_parse_log_file(filename, args, output_dir):
+    """parse_log_file: чтение файла в AlertStore"""
+    return len(parse_fast.parse_log_file(filename, args))
+
+def _case_print_statistics(filename, args, output_dir, store):
+    """Подсчёт статистики и print_statistics по готовому хранилищу"""
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        stats = parse_fast.LogStatistics.from_entries(store)
+        parse_fast.print_statistics(stats, args)
+    return stats.total
+
+def _export_case(export_format):
+    """Замер экспорта в заданный формат по готовому хранилищу"""
+    def case(filename, args, output_dir, store):
+        output = os.path.join(output_dir, f'bench_export.{export_format}')
+        try:
+            if not parse_fast.export_entries(store, output, args, export_format):
+                raise RuntimeError(f"экспорт в {export_format} не выполнен")
+        finally:
+            if os.path.exists(output):
+                os.remove(output)
+        return len(store)
+    case.__doc__ = f"Экспорт хранилища в {export_format.upper()}"
+    return case
+
+# Замеряемые этапы; этапам с параметром store хранилище строится заранее и не замеряется
+CASES = {
+    'parse_line': (_case_parse_line, False),
+    'parse_log_file': (_case_parse_log_file, False),
+    'print_statistics': (_case_print_statistics, True),
+    'export_csv': (_export_case('csv'), True),
+    'export_json': (_export_case('json'), True),
+    'export_ndjson': (_export_case('ndjson'), True),
+}
+
+def run_case(case_name, filename, parse_args, output_dir, repeat):
+    """Выполняет один этап в отдельном процессе и возвращает результат замера"""
+    if sys.platform == 'win32':
+        import tracemalloc
+        tracemalloc.start()
+    case, needs_store = CASES[case_name]
+    args = _bench_args(parse_args)
+    extra = ()
+    if needs_store:
+        extra = (parse_fast.parse_log_file(filename, args),)
+
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items = case(filename, args, output_dir, *extra)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak_rss_kb, rss_source = _peak_rss_kb()
+    return {
+        'seconds': round(best, 6),
+        'items': items,
+        'peak_rss_kb': peak_rss_kb,
+        'rss_source': rss_source,
+    }
+
+def run_isolated(case_name, filename, parse_args, output_dir, repeat):
+    """Запуск этапа в новом процессе: пиковая память не смешивается между этапами"""
+    # Процесс пула не демон, поэтому этап может запускать свои процессы (--workers)
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+        return executor.submit(run_case, case_name, filename, parse_args, output_dir, repeat).result()
+
+def ensure_log(work_dir, lines, seed):
+    """Возвращает путь к синтетическому логу, генерируя его при отсутствии"""
+    filename = os.path.join(work_dir, f'fast_{lines}_{seed}.log')
+    if not os.path.exists(filename):
+        print(f"Генерация {filename} ({lines} строк)...", file=sys.stderr)
+        partial = filename + '.part'
+        generate_log(partial, lines, seed)
+        os.replace(partial, filename)
+    return filename
+
+def compare_reports(old_report, new_report):
+    """Печатает изменение скорости относительно прошлого отчёта"""
+    old_results = {(r['case'], r['lines']): r for r in old_report['results']}
+    print(f"\nСравнение с отчётом от {old_report.get('created', '?')}:")
+    for result in new_report['results']:
+        old = old_results.get((result['case'], result['lines']))
+        if old is None or not old['lines_per_sec']:
+            continue
+        change = (result['lines_per_sec'] / old['lines_per_sec'] - 1) * 100
+        print(f"  {result['case']:<18} {result['lines']:>11} строк: {change:+7.1f}% строк/с")
+
+def parse_arguments(argv=None):
+    """Аргументы командной строки бенчмарка"""
+    parser = argparse.ArgumentParser(
+        description='Бенчмарк парсера логов Suricata на синтетическом fast.log',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f'''
+Примеры использования:
+  python {sys.argv[0]}                                  # 10^4..10^6 строк, все этапы
+  python {sys.argv[0]} --lines 100000000 --cases parse_log_file
+  python {sys.argv[0]} --parse-args="--workers 0" -o par.json
+  python {sys.argv[0]} --compare bench_report.json -o new.json
+  python {sys.argv[0]} --generate big.log --lines 1000000  # Только сгенерировать лог
+'''
+    )
+    parser.add_argument(
+        '--lines',
+        type=int,
+        nargs='+',
+        default=[10 ** 4, 10 ** 5, 10 ** 6],
+        help='Размеры лога в строках (по умолчанию: 10000 100000 1000000)'
+    )
+    parser.add_argument(
+        '--cases',
+        nargs='+',
+        choices=list(CASES),
+        default=list(CASES),
+        help='Замеряемые этапы (по умолчанию: все)'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+        help='Зерно генератора лога (по умолчанию: 42)'
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=1,
+        help='Повторов каждого этапа, берётся лучшее время (по умолчанию: 1)'
+    )
+    parser.add_argument(
+        '--parse-args',
+        default='',
+        help='Дополнительные опции parse_fast.py для замеров, например "--workers 4" или "--mmap"'
+    )
+    parser.add_argument(
+        '--work-dir',
+        default=os.path.join(os.getcwd(), 'bench_data'),
+        help='Каталог для сгенерированных логов (по умолчанию: ./bench_data)'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        default='bench_report.json',
+        help='Файл отчёта JSON (по умолчанию: bench_report.json, "-" - в stdout)'
+    )
+    parser.add_argument(
+        '--compare',
+        metavar='REPORT',
+        help='Сравнить скорость с прошлым отчётом JSON'
+    )
+    parser.add_argument(
+        '--generate',
+        metavar='FILE',
+        help='Только сгенерировать лог (размер - первое значение --lines) и выйти'
+    )
+    return parser.parse_args(argv)
+
+def main():
+    """Основная функция"""
+    args = parse_arguments()
+
+    if args.generate:
+        generate_log(args.generate, args.lines[0], args.seed)
+        print(f"Сгенерирован {args.generate}: {args.lines[0]} строк", file=sys.stderr)
+        sys.exit(0)
+
+    parse_args = args.parse_args.split()
+    # Проверяем опции parse_fast заранее, а не в каждом дочернем процессе
+    _bench_args(parse_args)
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'parse_args': parse_args,
+        'results': [],
+    }
+
+    print(f"{'Этап':<18} {'Строк':>11} {'Время, с':>10} {'Строк/с':>12} {'МБ/с':>8} {'Пик RSS, МБ':>12}")
+    for lines in args.lines:
+        filename = ensure_log(args.work_dir, lines, args.seed)
+        size = os.path.getsize(filename)
+        for case_name in args.cases:
+            measured = run_isolated(case_name, filename, parse_args, args.work_dir, args.repeat)
+            seconds = measured['seconds'] or 1e-9
+            result = {
+                'case': case_name,
+                'lines': lines,
+                'bytes': size,
+                'seconds': measured['seconds'],
+                'items': measured['items'],
+                'lines_per_sec': round(lines / seconds, 1),
+                'bytes_per_sec': round(size / seconds, 1),
+                'peak_rss_kb': measured['peak_rss_kb'],
+                'rss_source': measured['rss_source'],
+            }
+            report['results'].append(result)
+            peak = f"{result['peak_rss_kb'] / 1024:.1f}" if result['peak_rss_kb'] is not None else '-'
+            print(f"{case_name:<18} {lines:>11} {result['seconds']:>10.3f} "
+                  f"{result['lines_per_sec']:>12.0f} {result['bytes_per_sec'] / 2 ** 20:>8.1f} {peak:>12}")
+
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        with open(args.output, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2, ensure_ascii=False)
+        print(f"\nОтчёт сохранён в '{args.output}'")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as old_file:
+            compare_reports(json.load(old_file), report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Разбор логов Suricata fast.log: библиотека и командная строка (parse_fast.py)
+
+Потоковый разбор с фильтрами и накопление статистики:
+
+    from suricata_fastlog import iter_alerts, LogStatistics
+
+    stats = LogStatistics()
+    for alert in iter_alerts('/var/log/suricata/fast.log', {'priority': 1, 'where': 'dst_port == 443'}):
+        stats.add(alert)
+    print(stats.summary())
+
+Импорт пакета не загружает colorama и json и не меняет sys.stdout:
+цвета и перехват вывода включает только командная строка
+"""
+
+__version__ = '1.0'
+
+from .parser import EXPORT_FIELDS, ENTRY_FIELDS, parse_suricata_log_line
+from .filters import compile_where
+from .enrich import IpRangeTable, IpEnricher, load_enricher
+from .store import AlertStore
+from .stats import LogStatistics
+from .api import FILTER_NAMES, alert_options, iter_alerts
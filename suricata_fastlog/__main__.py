@@ -0,0 +1,7 @@
+"""Запуск командной строки: python -m suricata_fastlog"""
+
+from .cli import run
+
+# Проверка нужна процессам --workers, которые при spawn заново импортируют __main__
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,193 @@
+"""
+Агрегаты по интервалам времени (--rollup) и схлопывание повторов (--coalesce)
+"""
+
+import re
+import argparse
+import collections
+from datetime import timedelta
+
+from .parser import EPOCH
+from .stats import LogStatistics
+
+# Поля агрегатов --rollup в порядке экспорта
+ROLLUP_FIELDS = [
+    'bucket', 'epoch_us', 'interval_s', 'total',
+    'priorities', 'protocols', 'classifications', 'top_src', 'top_dst'
+]
+
+# Сколько источников и назначений сохраняется в каждом агрегате
+ROLLUP_TOP = 5
+
+# Сколько интервалов до самого позднего времени остаются открытыми для запоздавших записей
+ROLLUP_OPEN_BUCKETS = 2
+
+ROLLUP_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_rollup_interval(value):
+    """Разбор --rollup: число и единица s/m/h/d (например 1m, 5m, 1h) -> микросекунды"""
+    match = re.fullmatch(r'(\d+)([smhd])', value.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise argparse.ArgumentTypeError(f"неверный интервал '{value}', ожидается например 1m, 5m или 1h")
+    return int(match.group(1)) * ROLLUP_UNITS[match.group(2)] * 1000000
+
+class RollupAggregator:
+    """
+    Агрегаты по интервалам времени (--rollup) за тот же единственный проход
+    На каждый интервал хранятся счётчики по приоритетам, протоколам,
+    классификациям, источникам и назначениям. Интервал выдаётся, как только время
+    ушло на ROLLUP_OPEN_BUCKETS интервалов вперёд, поэтому память не зависит
+    от длины лога. Запись, опоздавшая в уже выданный интервал, даёт для него
+    ещё один агрегат. Записи без распознанного времени пропускаются (skipped)
+    """
+
+    def __init__(self, interval_us, flat=False, top=ROLLUP_TOP):
+        self.interval_us = interval_us
+        self.flat = flat
+        self.top = top
+        self.buckets = {}
+        self.latest = None
+        self.skipped = 0
+        self.emitted = 0
+
+    def add(self, entry):
+        """Учитывает запись и возвращает список агрегатов закрывшихся интервалов"""
+        epoch_us = entry.get('epoch_us')
+        if epoch_us is None:
+            self.skipped += 1
+            return []
+        start = epoch_us - epoch_us % self.interval_us
+        bucket = self.buckets.get(start)
+        if bucket is None:
+            bucket = self.buckets[start] = {
+                'total': 0,
+                'priorities': collections.Counter(),
+                'protocols': collections.Counter(),
+                'classifications': collections.Counter(),
+                'src': collections.Counter(),
+                'dst': collections.Counter(),
+            }
+        bucket['total'] += 1
+        bucket['priorities'][entry['priority']] += 1
+        bucket['protocols'][entry['protocol']] += 1
+        bucket['classifications'][entry['classification']] += 1
+        bucket['src'][entry['src_ip']] += 1
+        bucket['dst'][entry['dst_ip']] += 1
+        
+        if self.latest is None or start > self.latest:
+            self.latest = start
+            return self._close(start - ROLLUP_OPEN_BUCKETS * self.interval_us)
+        return []
+
+    def flush(self):
+        """Выдаёт агрегаты всех оставшихся интервалов (в конце разбора)"""
+        return self._close(None)
+
+    def _close(self, before):
+        """Агрегаты интервалов, начавшихся раньше before (None - всех), по времени"""
+        closed = sorted(start for start in self.buckets if before is None or start < before)
+        return [self._record(start, self.buckets.pop(start)) for start in closed]
+
+    def _counts(self, counter, limit=None):
+        """Счётчик для агрегата: словарь (NDJSON/JSON) или строка key=count;... (CSV)"""
+        items = LogStatistics.top(counter, limit) if limit else sorted(counter.items(), key=lambda item: str(item[0]))
+        if self.flat:
+            return ';'.join(f"{key}={count}" for key, count in items)
+        return {str(key): count for key, count in items}
+
+    def _record(self, start, bucket):
+        """Компактная запись агрегата интервала"""
+        self.emitted += 1
+        moment = EPOCH + timedelta(microseconds=start)
+        return {
+            'bucket': moment.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'epoch_us': start,
+            'interval_s': self.interval_us // 1000000,
+            'total': bucket['total'],
+            'priorities': self._counts(bucket['priorities']),
+            'protocols': self._counts(bucket['protocols']),
+            'classifications': self._counts(bucket['classifications']),
+            'top_src': self._counts(bucket['src'], self.top),
+            'top_dst': self._counts(bucket['dst'], self.top),
+        }
+
+# Поля, добавляемые к записи при схлопывании повторов --coalesce
+COALESCE_FIELDS = ['first_seen', 'last_seen', 'count']
+
+# Сколько активных потоков держит --coalesce (самые давние вытесняются)
+COALESCE_MAX_FLOWS = 65536
+
+class AlertCoalescer:
+    """
+    Схлопывание повторов (--coalesce): одинаковые (правило, источник,
+    назначение, порт назначения) в пределах окна - одна запись с first_seen,
+    last_seen и count. Активные потоки хранятся в OrderedDict как LRU:
+    поток выдаётся, когда в нём не было записей дольше окна или когда
+    потоков больше max_flows, поэтому память ограничена. Записи выдаются по
+    мере закрытия потоков, а не в порядке появления
+    """
+
+    def __init__(self, window_us, max_flows=COALESCE_MAX_FLOWS):
+        self.window_us = window_us
+        self.max_flows = max_flows
+        self.flows = collections.OrderedDict()
+        self.latest = None
+        self.received = 0
+        self.emitted = 0
+        self.evicted = 0
+
+    def add(self, entry):
+        """Учитывает запись и возвращает список закрывшихся (схлопнутых) записей"""
+        self.received += 1
+        epoch_us = entry.get('epoch_us')
+        if epoch_us is None:
+            # Без распознанного времени окно не применить - запись выдаётся как есть
+            return [self._finish(self._record(entry, None))]
+        
+        key = (entry['rule_id'], entry['src_ip'], entry['dst_ip'], entry['dst_port'], entry.get('sensor'))
+        closed = []
+        flow = self.flows.get(key)
+        if flow is not None and epoch_us - flow['_last_us'] > self.window_us:
+            closed.append(self._finish(self.flows.pop(key)))
+            flow = None
+        if flow is None:
+            self.flows[key] = self._record(entry, epoch_us)
+        else:
+            self.flows.move_to_end(key)
+            flow['count'] += 1
+            if epoch_us >= flow['_last_us']:
+                flow['_last_us'] = epoch_us
+                flow['last_seen'] = entry['timestamp']
+        
+        # Закрываем потоки, в которых дольше окна не было записей, и лишние по LRU
+        if self.latest is None or epoch_us > self.latest:
+            self.latest = epoch_us
+        flows = self.flows
+        while flows:
+            oldest = next(iter(flows.values()))
+            if oldest['_last_us'] >= self.latest - self.window_us and len(flows) <= self.max_flows:
+                break
+            if len(flows) > self.max_flows:
+                self.evicted += 1
+            closed.append(self._finish(flows.popitem(last=False)[1]))
+        return closed
+
+    def flush(self):
+        """Выдаёт все оставшиеся потоки (в конце разбора)"""
+        closed = [self._finish(flow) for flow in self.flows.values()]
+        self.flows.clear()
+        return closed
+
+    def _record(self, entry, epoch_us):
+        """Новый поток из записи; время записи - первое появление"""
+        record = dict(entry)
+        record['first_seen'] = record['last_seen'] = entry['timestamp']
+        record['count'] = 1
+        record['_last_us'] = epoch_us
+        return record
+
+    def _finish(self, flow):
+        """Закрывает поток: убирает служебные поля"""
+        del flow['_last_us']
+        self.emitted += 1
+        return flow
@@ -0,0 +1,96 @@
+"""
+Программный интерфейс для встраивания разбора в другие программы
+Фильтры передаются словарём, а не argparse; ошибки чтения приходят
+исключениями, а не завершением программы; в терминал ничего не выводится
+"""
+
+import os
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from .parser import EPOCH
+from .filters import compile_where, parse_time_argument, line_prefilter
+from .reader import read_log_entries, sensor_names, _new_parse_counters, _parse_and_filter
+
+# Фильтры iter_alerts - те же, что опции командной строки
+FILTER_NAMES = ('filter', 'priority', 'src', 'dst', 'sid', 'since', 'until', 'where')
+
+def _time_filter(value):
+    """since/until в микросекундах от эпохи: из datetime, строки или числа"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return (value - EPOCH) // timedelta(microseconds=1)
+    if isinstance(value, str):
+        try:
+            return parse_time_argument(value)
+        except argparse.ArgumentTypeError as e:
+            raise ValueError(str(e)) from None
+    return int(value)
+
+def alert_options(filters=None, encoding='utf-8', workers=1, use_mmap=False, limit=0):
+    """
+    Параметры разбора в виде, который принимают функции пакета
+    filters - словарь: filter (подстрока описания), priority, src, dst, sid,
+    since/until (datetime, строка 'YYYY-MM-DD HH:MM[:SS]' или микросекунды
+    от эпохи; время без часового пояса - UTC), where (текст выражения --where)
+    Неизвестный фильтр или ошибка в значении - ValueError
+    """
+    filters = dict(filters or {})
+    unknown = set(filters) - set(FILTER_NAMES)
+    if unknown:
+        raise ValueError(f"неизвестные фильтры: {', '.join(sorted(unknown))}")
+    options = argparse.Namespace(
+        filter=None, priority=None, src=None, dst=None, sid=None, since=None, until=None, where=None,
+        limit=limit, encoding=encoding, workers=workers, mmap=use_mmap,
+        follow=False, verbose=False, quiet=True,
+    )
+    for name in ('since', 'until'):
+        if filters.get(name) is not None:
+            filters[name] = _time_filter(filters[name])
+    if isinstance(filters.get('where'), str):
+        filters['where'] = compile_where(filters['where'])
+    if filters.get('sid') is not None:
+        filters['sid'] = str(filters['sid'])
+    vars(options).update(filters)
+    return options
+
+def _iter_lines(lines, options, counters):
+    """Записи из итерируемого источника строк (str или bytes)"""
+    prefilter = line_prefilter(options)
+    matched = 0
+    for line_num, line in enumerate(lines):
+        if isinstance(line, bytes):
+            line = line.decode(options.encoding, errors='replace')
+        line = line.strip()
+        if not line:
+            continue
+        entry = _parse_and_filter(line, line_num, options, counters, prefilter)
+        if entry is None:
+            continue
+        matched += 1
+        yield entry
+        if options.limit > 0 and matched >= options.limit:
+            break
+
+def iter_alerts(source, filters=None, encoding='utf-8', workers=1, use_mmap=False, limit=0, counters=None):
+    """
+    Потоково выдаёт записи-словари (поля ENTRY_FIELDS), прошедшие фильтры
+    source - путь к логу (сжатый распаковывается на лету), список путей
+    (записи помечаются полями sensor и source, как в --sources) или любой
+    итерируемый источник строк: открытый файл, сокет, список
+    filters - словарь фильтров (см. alert_options); limit - не больше записей
+    counters - словарь для счётчиков разбора (_new_parse_counters)
+    Ошибки чтения (OSError, UnicodeDecodeError) получает вызывающий код
+    """
+    options = alert_options(filters, encoding, workers, use_mmap, limit)
+    if counters is None:
+        counters = _new_parse_counters()
+    if isinstance(source, (str, bytes, os.PathLike)):
+        return read_log_entries(os.fsdecode(source), options, counters=counters)
+    if isinstance(source, (list, tuple)):
+        paths = [os.fsdecode(path) for path in source]
+        names = sensor_names(paths)
+        sources = [(path, names[path]) for path in paths]
+        return read_log_entries(', '.join(paths), options, counters=counters, sources=sources, strict=True)
+    return _iter_lines(source, options, counters)
@@ -0,0 +1,959 @@
+"""
+Командная строка парсера: аргументы, справка и основной проход main()
+"""
+
+import os
+import sys
+import argparse
+import atexit
+import time
+
+from . import indicators, enrich
+from .colors import Fore, Style, init_colors
+from .parser import EXPORT_FIELDS, ENTRY_FIELDS
+from .indicators import IndicatorEngine, load_indicator_rules
+from .enrich import load_enricher
+from .filters import parse_time_argument, parse_where_argument, has_query
+from .reader import (
+    SOURCE_FIELDS, iter_log_entries, discover_sources, sensor_names, _is_ascii_compatible,
+)
+from .compression import detect_input_compression, resolve_compression, _load_zstd
+from .state import load_state_offset, save_state
+from .index import INDEX_SUFFIX, prepare_index_query
+from .store import CACHE_SUFFIX, cache_path, load_cache, build_cache, iter_store_entries
+from .export import create_exporter
+from .sketch import SKETCH_PRECISION, SKETCH_CAPACITY, AlertSketches, load_sketches, save_sketches
+from .stats import LogStatistics
+from .aggregate import (
+    ROLLUP_FIELDS, COALESCE_FIELDS, COALESCE_MAX_FLOWS,
+    RollupAggregator, AlertCoalescer, parse_rollup_interval,
+)
+from .profiler import StageProfiler
+from .render import EntryRenderer, print_statistics, format_ip
+from .sink import (
+    SINK_BATCH_SIZE, SINK_INTERVAL, SINK_QUEUE_SIZE, SINK_CONNECTIONS, SINK_RETRIES,
+    create_sink, print_sink_report,
+)
+
+def show_banner():
+    """Показать баннер программы"""
+    banner = f"""
+{Fore.CYAN}{Style.BRIGHT}{'='*80}
+{'ПАРСЕР ЛОГОВ SURICATA v1.0':^80}
+{'='*80}
+{Fore.WHITE}Программа для анализа и визуализации логов системы обнаружения вторжений Suricata
+{Fore.YELLOW}Лицензия: MIT License | Автор: Ваша организация
+"""
+    print(banner)
+
+def show_colors_legend():
+    """Показать легенду цветов"""
+    legend = f"""
+{Fore.CYAN}{Style.BRIGHT}ЦВЕТОВАЯ СХЕМА:
+{Fore.RED}  🔴 КРАСНЫЙ    {Fore.WHITE}- Критические угрозы (приоритет 1), трояны
+{Fore.YELLOW}  🟡 ЖЕЛТЫЙ     {Fore.WHITE}- Высокий риск (приоритет 2), эксплойты
+{Fore.MAGENTA}  🟣 ФИОЛЕТОВЫЙ {Fore.WHITE}- Вредоносное ПО, C&C активность
+{Fore.GREEN}  🟢 ЗЕЛЕНЫЙ    {Fore.WHITE}- Успешные операции, статистика
+{Fore.CYAN}  🔵 ГОЛУБОЙ    {Fore.WHITE}- Информационные сообщения
+"""
+    print(legend)
+
+def parse_arguments(argv=None):
+    """Парсинг аргументов командной строки (argv=None - берутся из sys.argv)"""
+    parser = argparse.ArgumentParser(
+        description=f'{Fore.CYAN}Парсер логов Suricata (fast.log)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f'''
+{Fore.YELLOW}Примеры использования:{Fore.WHITE}
+  python {sys.argv[0]}                          # Базовый анализ стандартного файла
+  python {sys.argv[0]} -i fast.log -o отчет.csv # Анализ с экспортом
+  python {sys.argv[0]} -f "LokiBot" -p 1        # Поиск конкретных угроз
+  python {sys.argv[0]} --indicators ioc.txt     # Свои семейства угроз (FAMILY: kw1, kw2)
+  python {sys.argv[0]} -s -q                    # Только статистика без цветов
+  python {sys.argv[0]} --compact | less -R      # Одна строка на запись, без пауз
+  python {sys.argv[0]} --format json            # Экспорт в JSON формат
+  python {sys.argv[0]} --format ndjson -o out.ndjson.gz # NDJSON со сжатием gzip
+  python {sys.argv[0]} -i big.log -s --workers 0 # Параллельный разбор на всех ядрах
+  python {sys.argv[0]} -i big.log -s --profile   # Время по этапам и счётчики разбора
+  python {sys.argv[0]} -i fast.log --index       # Построить/дополнить индекс fast.log.idx
+  python {sys.argv[0]} -s --sources /var/log/sensors # Все fast.log* сенсоров, сводный отчёт
+  python {sys.argv[0]} -s --rollup 5m --format ndjson -o rates.ndjson # Агрегаты по 5 минут
+  python {sys.argv[0]} -s --coalesce 5m -o flows.csv # Повторы за 5 минут - одной записью
+  python {sys.argv[0]} -s --sketch --sketch-save day1.sketch # Статистика в ограниченной памяти
+  python {sys.argv[0]} --src 10.0.0.5 --since "2026-10-17 02:00" --until "2026-10-17 03:00"
+  python {sys.argv[0]} -s --where "protocol == TCP and dst_port in 1-1024 and not src in 10.0.0.0/8"
+  python {sys.argv[0]} -s --enrich-subnets assets.csv --enrich-asn ip2asn.tsv # Подсети и ASN адресов
+
+{Fore.GREEN}Формат лога:{Fore.WHITE}
+  MM/DD/YYYY-HH:MM:SS.xxxxxx [**] [1:2021641:10] ET MALWARE ... {{TCP}} 1.2.3.4:1234 -> 5.6.7.8:80
+
+{Fore.MAGENTA}Коды выхода:{Fore.WHITE}
+  0 - Успешное выполнение
+  1 - Ошибка ввода/вывода
+  2 - Ошибка парсинга
+  3 - Аргументы командной строки неверны
+
+Для дополнительной информации: {Fore.CYAN}{sys.argv[0]} --help{Fore.WHITE}
+'''
+    )
+    
+    # Основные аргументы
+    parser.add_argument(
+        '-i', '--input',
+        default='fast.log',
+        help='Входной файл лога Suricata (по умолчанию: fast.log)'
+    )
+    
+    parser.add_argument(
+        '-o', '--output',
+        default='suricata_logs.csv',
+        help='Выходной файл для экспорта (по умолчанию: suricata_logs.csv)'
+    )
+    
+    # Режимы работы
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Тихий режим - отключить цветной вывод'
+    )
+    
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Подробный режим - показать все детали парсинга'
+    )
+    
+    parser.add_argument(
+        '-s', '--stats',
+        action='store_true',
+        help='Только статистика (без детального вывода записей)'
+    )
+    
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Детальный вывод в одну строку на запись'
+    )
+    
+    parser.add_argument(
+        '--no-pager',
+        action='store_true',
+        help='Не делать паузу каждые 5 записей (отключается сама, если вывод не в терминал)'
+    )
+    
+    # Фильтры
+    parser.add_argument(
+        '-f', '--filter',
+        type=str,
+        help='Фильтр по ключевым словам (например: "LokiBot", "trojan")'
+    )
+    
+    parser.add_argument(
+        '-p', '--priority',
+        type=int,
+        choices=[1, 2, 3],
+        help='Фильтр по приоритету (1-3)'
+    )
+    
+    parser.add_argument(
+        '--indicators',
+        metavar='FILE',
+        help='Файл семейств угроз (IOC): строки вида "FAMILY: kw1, kw2"'
+    )
+    
+    # Обогащение адресов по локальным таблицам (CSV/TSV)
+    parser.add_argument(
+        '--enrich-subnets',
+        action='append',
+        metavar='FILE',
+        help='Инвентарь подсетей: строки "подсеть,метка" (CIDR, адрес или начало-конец); '
+             'адрес получает метку самой узкой подсети. Можно указать несколько раз'
+    )
+    
+    parser.add_argument(
+        '--enrich-asn',
+        action='append',
+        metavar='FILE',
+        help='Таблица ASN: "подсеть,номер,организация" или "начало,конец,номер,..." (дамп iptoasn)'
+    )
+    
+    parser.add_argument(
+        '--enrich-geo',
+        action='append',
+        metavar='FILE',
+        help='Таблица стран: "подсеть,код страны" или "начало,конец,код страны"'
+    )
+    
+    # Формат экспорта
+    parser.add_argument(
+        '--format',
+        choices=['csv', 'json', 'ndjson'],
+        default='csv',
+        help='Формат экспорта: csv, json или ndjson - объект на строку (по умолчанию: csv)'
+    )
+    
+    parser.add_argument(
+        '--compress',
+        choices=['auto', 'none', 'gzip', 'zstd'],
+        default='auto',
+        help='Сжатие экспорта на лету (auto - по расширению .gz/.zst, по умолчанию: auto)'
+    )
+    
+    parser.add_argument(
+        '--no-export',
+        action='store_true',
+        help='Не экспортировать в файл'
+    )
+    
+    parser.add_argument(
+        '--epoch',
+        action='store_true',
+        help='Добавить в экспорт поле epoch_us - время в микросекундах от эпохи Unix (UTC)'
+    )
+    
+    parser.add_argument(
+        '--rollup',
+        type=parse_rollup_interval,
+        metavar='INTERVAL',
+        help='Экспортировать вместо записей агрегаты по интервалам времени: 1m, 5m, 1h и т.п.'
+    )
+    
+    parser.add_argument(
+        '--coalesce',
+        type=parse_rollup_interval,
+        metavar='WINDOW',
+        help='Схлопывать повторы (правило, источник, назначение, порт) в окне 30s, 5m и т.п.: '
+             'одна запись с first_seen, last_seen и count в выводе и экспорте'
+    )
+    
+    parser.add_argument(
+        '--coalesce-flows',
+        type=int,
+        default=COALESCE_MAX_FLOWS,
+        metavar='N',
+        help=f'Сколько активных потоков держать для --coalesce (по умолчанию: {COALESCE_MAX_FLOWS})'
+    )
+    
+    # Отправка коллектору по сети
+    parser.add_argument(
+        '--sink',
+        metavar='URL',
+        help='Отправлять записи коллектору по мере разбора: tcp://HOST:PORT или udp://HOST:PORT (NDJSON), '
+             'syslog://HOST[:PORT] и syslog+tcp://HOST[:PORT] (RFC 5424), '
+             'http(s)://HOST:PORT/INDEX/_bulk (Elasticsearch _bulk)'
+    )
+    
+    parser.add_argument(
+        '--sink-batch',
+        type=int,
+        default=SINK_BATCH_SIZE,
+        metavar='N',
+        help=f'Записей в пачке отправки (по умолчанию: {SINK_BATCH_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--sink-interval',
+        type=float,
+        default=SINK_INTERVAL,
+        metavar='SEC',
+        help=f'Через сколько секунд отправлять неполную пачку (по умолчанию: {SINK_INTERVAL})'
+    )
+    
+    parser.add_argument(
+        '--sink-queue',
+        type=int,
+        default=SINK_QUEUE_SIZE,
+        metavar='N',
+        help=f'Записей в очереди отправки; при заполнении разбор ждёт сеть (по умолчанию: {SINK_QUEUE_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--sink-connections',
+        type=int,
+        default=SINK_CONNECTIONS,
+        metavar='N',
+        help=f'Постоянных соединений с коллектором; при нескольких порядок записей не сохраняется '
+             f'(по умолчанию: {SINK_CONNECTIONS})'
+    )
+    
+    parser.add_argument(
+        '--sink-retries',
+        type=int,
+        default=SINK_RETRIES,
+        metavar='N',
+        help=f'Повторов неудачной пачки до записи в спул (по умолчанию: {SINK_RETRIES})'
+    )
+    
+    parser.add_argument(
+        '--sink-spool',
+        metavar='FILE',
+        help='Файл спула: пачки, не доставленные коллектору, дописываются в него и отправляются '
+             'первыми при следующем запуске (без спула они теряются)'
+    )
+    
+    # Информационные флаги
+    parser.add_argument(
+        '--version',
+        action='version',
+        version=f'%(prog)s v1.0',
+        help='Показать версию программы и выйти'
+    )
+    
+    parser.add_argument(
+        '--colors',
+        action='store_true',
+        help='Показать цветовую схему и выйти'
+    )
+    
+    # Дополнительные опции
+    parser.add_argument(
+        '--limit',
+        type=int,
+        default=0,
+        help='Ограничить количество выводимых записей (0 - без ограничений)'
+    )
+    
+    parser.add_argument(
+        '--encoding',
+        default='utf-8',
+        help='Кодировка входного файла (по умолчанию: utf-8)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Число процессов для параллельного парсинга (0 - все ядра, по умолчанию: 1)'
+    )
+    
+    parser.add_argument(
+        '--mmap',
+        action='store_true',
+        help='Читать файл через mmap и разбирать строки в байтах без полного декодирования'
+    )
+    
+    # Режим реального времени
+    parser.add_argument(
+        '-F', '--follow',
+        action='store_true',
+        help='Следить за файлом в реальном времени (как tail -F), Ctrl+C для выхода'
+    )
+    
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=0.1,
+        help='Интервал опроса файла в режиме --follow, секунды (по умолчанию: 0.1)'
+    )
+    
+    parser.add_argument(
+        '--stats-interval',
+        type=float,
+        default=10,
+        help='Как часто выводить статистику в режиме --follow, секунды (0 - только при выходе)'
+    )
+    
+    parser.add_argument(
+        '--state',
+        metavar='FILE',
+        help='Файл состояния: продолжать разбор с места остановки прошлого запуска (для cron)'
+    )
+    
+    parser.add_argument(
+        '--sources',
+        nargs='+',
+        metavar='PATH',
+        help='Несколько логов сразу: файлы, маски ("sensors/*/fast.log*") или каталоги '
+             '(в них берутся fast.log и ротированные .1/.gz); вместо -i, записи помечаются сенсором'
+    )
+    
+    # Приближённая статистика с ограниченной памятью
+    parser.add_argument(
+        '--sketch',
+        action='store_true',
+        help='Приближённая статистика в ограниченной памяти: число уникальных источников, назначений и '
+             'сигнатур (HyperLogLog) и топы (Space-Saving) вместо точных счётчиков'
+    )
+    
+    parser.add_argument(
+        '--sketch-precision',
+        type=int,
+        default=SKETCH_PRECISION,
+        metavar='P',
+        help=f'Точность HyperLogLog: 2^P байт на счётчик, 4-18 (по умолчанию: {SKETCH_PRECISION})'
+    )
+    
+    parser.add_argument(
+        '--sketch-capacity',
+        type=int,
+        default=SKETCH_CAPACITY,
+        metavar='N',
+        help=f'Сколько значений хранит каждый топ Space-Saving (по умолчанию: {SKETCH_CAPACITY})'
+    )
+    
+    parser.add_argument(
+        '--sketch-save',
+        metavar='FILE',
+        help='Сохранить состояние --sketch в JSON для последующего объединения'
+    )
+    
+    parser.add_argument(
+        '--sketch-merge',
+        nargs='+',
+        metavar='FILE',
+        help='Объединить статистику с сохранёнными состояниями --sketch-save (других файлов или запусков)'
+    )
+    
+    # Колоночный кеш разобранного лога
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help=f'Кешировать разобранный лог в двоичном колоночном файле рядом с ним (файл{CACHE_SUFFIX}); '
+             'повторный анализ неизменённого файла идёт из кеша без разбора текста'
+    )
+    
+    # Индекс и запросы по нему
+    parser.add_argument(
+        '--index',
+        action='store_true',
+        help=f'Построить или дополнить индекс рядом с логом (файл{INDEX_SUFFIX}); без запроса - только индексация'
+    )
+    
+    parser.add_argument(
+        '--since',
+        type=parse_time_argument,
+        metavar='TIME',
+        help='Записи не раньше времени: "YYYY-MM-DD HH:MM[:SS]" или "MM/DD/YYYY-HH:MM:SS"'
+    )
+    
+    parser.add_argument(
+        '--until',
+        type=parse_time_argument,
+        metavar='TIME',
+        help='Записи не позже времени (формат как у --since)'
+    )
+    
+    parser.add_argument(
+        '--src',
+        metavar='IP',
+        help='Только записи с этим IP источника'
+    )
+    
+    parser.add_argument(
+        '--dst',
+        metavar='IP',
+        help='Только записи с этим IP назначения'
+    )
+    
+    parser.add_argument(
+        '--where',
+        type=parse_where_argument,
+        metavar='EXPR',
+        help='Выражение фильтра: поля priority, src, dst, src_port, dst_port, sid, gid, rev, time, '
+             'protocol, rule, description, classification, sensor; операторы == != < <= > >= '
+             'in ~ !~ (regex), and/or/not, скобки. Пример: "src in 10.0.0.0/8 and dst_port in {80, 443, 8000-8100} '
+             'and sid in {2021641, 2001219} and description ~ \'LokiBot\'"'
+    )
+    
+    parser.add_argument(
+        '--sid',
+        help='Только записи правила: gid:sid:rev, gid:sid или sid'
+    )
+    
+    # Профилирование
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Вывести в stderr время по этапам (чтение, разбор, фильтры, вывод, статистика, экспорт) и счётчики'
+    )
+    
+    parser.add_argument(
+        '--profile-json',
+        metavar='FILE',
+        help='Сохранить профиль этапов в JSON (для сравнения между запусками)'
+    )
+    
+    parser.add_argument(
+        '--cprofile',
+        metavar='FILE',
+        help='Дополнительно сохранить дамп cProfile (смотреть: python -m pstats FILE)'
+    )
+    
+    return parser.parse_args(argv)
+
+def show_help_detailed():
+    """Показать детальную справку"""
+    help_text = f"""
+{Fore.CYAN}{Style.BRIGHT}ПОЛНАЯ СПРАВКА ПО ИСПОЛЬЗОВАНИЮ{Fore.WHITE}
+
+{Style.BRIGHT}Назначение программы:{Style.RESET_ALL}
+  Анализ и визуализация логов системы обнаружения вторжений Suricata в формате fast.log.
+  Программа предоставляет цветной терминальный вывод, статистический анализ и экспорт данных.
+
+{Style.BRIGHT}Основные возможности:{Style.RESET_ALL}
+  • Цветная классификация угроз по критичности
+  • Автоматическое определение типов атак (трояны, C&C, эксплойты)
+  • Статистика по приоритетам, протоколам и IP-адресам
+  • Экспорт в CSV/JSON форматы
+  • Фильтрация по ключевым словам и приоритету
+  • Поиск конкретных индикаторов компрометации
+
+{Style.BRIGHT}Поддерживаемые классификации Suricata:{Style.RESET_ALL}
+  • A Network Trojan was detected
+  • Malware Command and Control Activity Detected
+  • Potentially Bad Traffic
+  • Network Scan detected
+  • Generic Protocol Command Decode
+  • Attempted Information Leak
+  • Not Suspicious Traffic
+
+{Style.BRIGHT}Поддерживаемые протоколы:{Style.RESET_ALL}
+  • TCP, UDP, ICMP, HTTP, DNS, TLS, SSH
+
+{Style.BRIGHT}Системные требования:{Style.RESET_ALL}
+  • Python 3.6+
+  • colorama>=0.4.6
+
+{Style.BRIGHT}Установка зависимостей:{Style.RESET_ALL}
+  pip install colorama
+
+{Style.BRIGHT}Интеграция с другими системами:{Style.RESET_ALL}
+  • SIEM системы (Splunk, QRadar, ArcSight)
+  • ELK Stack (Elasticsearch, Logstash, Kibana)
+  • Отправка по сети во время разбора: --sink tcp://, syslog://, http://.../_bulk
+  • Инвентарь активов, ASN и GeoIP из CSV/TSV: --enrich-subnets, --enrich-asn, --enrich-geo
+  • Системы тикетов (Jira, ServiceNow)
+  • Системы мониторинга (Zabbix, Nagios)
+
+{Style.BRIGHT}Примеры автоматизации:{Style.RESET_ALL}
+  # Крон-задача для ежечасного анализа (разбираются только новые строки)
+  0 * * * * {sys.argv[0]} -i /var/log/suricata/fast.log -o /reports/hourly_$(date +\\%H).csv -s --state /var/lib/suricata/fast.state
+
+  # Мониторинг в реальном времени (читаются только новые строки, ротация учитывается)
+  {sys.argv[0]} -i /var/log/suricata/fast.log --follow --stats-interval 60
+
+{Style.BRIGHT}Формат выходных данных (CSV):{Style.RESET_ALL}
+  timestamp,rule_id,description,classification,priority,protocol,src_ip,src_port,dst_ip,dst_port
+  (с --epoch добавляется epoch_us - микросекунды от эпохи Unix, время лога считается UTC)
+
+{Style.BRIGHT}Обработка ошибок:{Style.RESET_ALL}
+  • Нечитаемые строки пропускаются с предупреждением
+  • Автоматическое определение кодировки файла
+  • Проверка целостности структуры лога
+  • Логирование ошибок в stderr
+
+{Style.BRIGHT}Производительность:{Style.RESET_ALL}
+  • Скорость и пиковая память замеряются скриптом bench_fast.py (отчёт в JSON)
+  • Потоковая обработка больших файлов
+  • Минимальное потребление памяти
+
+{Style.BRIGHT}Безопасность:{Style.RESET_ALL}
+  • Проверка входных данных на корректность
+  • Защита от path traversal атак
+  • Безопасная обработка пользовательского ввода
+  • Валидация IP-адресов и портов
+
+{Fore.YELLOW}Для быстрой справки используйте:{Fore.CYAN} {sys.argv[0]} -h{Fore.WHITE}
+{Fore.YELLOW}Для просмотра цветовой схемы:{Fore.CYAN} {sys.argv[0]} --colors{Fore.WHITE}
+"""
+    print(help_text)
+
+def _chain_writers(*writers):
+    """Одна функция записи из нескольких (файл экспорта и --sink)"""
+    def write(record):
+        for writer in writers:
+            writer(record)
+    return write
+
+def main():
+    """Основная функция"""
+    init_colors()
+    
+    # Парсинг аргументов
+    args = parse_arguments()
+    
+    # Показать баннер (если не тихий режим)
+    if not args.quiet:
+        show_banner()
+    
+    # Показать цветовую схему и выйти
+    if args.colors:
+        show_colors_legend()
+        sys.exit(0)
+    
+    # Показать детальную справку
+    if len(sys.argv) == 1:
+        print(f"{Fore.YELLOW}Для запуска программы укажите файл лога или используйте опции")
+        print(f"Пример: {Fore.CYAN}{sys.argv[0]} -h {Fore.YELLOW}для справки")
+        sys.exit(0)
+    
+    # Несколько логов сразу (--sources) вместо одного файла -i
+    sources = None
+    input_name = args.input
+    if args.sources:
+        if args.follow or args.state or args.index:
+            print(f"{Fore.RED}❌ Ошибка: --sources нельзя сочетать с --follow, --state и --index")
+            sys.exit(3)
+        files = discover_sources(args.sources)
+        if not files:
+            print(f"{Fore.RED}❌ Ошибка: по --sources не найдено ни одного файла лога")
+            sys.exit(1)
+        names = sensor_names(files)
+        sources = [(path, names[path]) for path in files]
+        input_name = ', '.join(args.sources)
+    
+    if args.cache and (args.sources or args.follow or args.state or args.index):
+        print(f"{Fore.RED}❌ Ошибка: --cache нельзя сочетать с --sources, --follow, --state и --index")
+        sys.exit(3)
+    
+    # Сжатый лог (fast.log.N.gz и т.п.) читается с распаковкой на лету
+    input_compression = None
+    if sources is None and os.path.isfile(args.input):
+        input_compression = detect_input_compression(args.input)
+        if input_compression is not None and (args.follow or args.state or args.index):
+            print(f"{Fore.RED}❌ Ошибка: сжатый файл ({input_compression}) нельзя читать с --follow, --state и --index")
+            sys.exit(3)
+    if input_compression == 'zstd' and _load_zstd() is None:
+        print(f"{Fore.RED}❌ Ошибка: для чтения zstd установите пакет zstandard (pip install zstandard)")
+        sys.exit(3)
+    
+    # Чтение лога
+    if args.verbose and not args.quiet:
+        if sources is not None:
+            print(f"{Fore.CYAN}📖 Чтение {len(sources)} файлов, сенсоров: {len(set(names.values()))}")
+        else:
+            print(f"{Fore.CYAN}📖 Чтение файла: {args.input}" + (f" ({input_compression})" if input_compression else ''))
+        print(f"{Fore.CYAN}📝 Экспорт в: {args.output} ({args.format})")
+    
+    # Пользовательские семейства угроз
+    if args.indicators:
+        indicators.INDICATORS = IndicatorEngine(load_indicator_rules(args.indicators))
+        if args.verbose and not args.quiet:
+            print(f"{Fore.CYAN}🔎 Загружено семейств угроз: {len(indicators.INDICATORS.ioc_families)}")
+    
+    # Таблицы обогащения адресов: поля src_/dst_subnet, _asn, _country
+    if args.enrich_subnets or args.enrich_asn or args.enrich_geo:
+        enrich.ENRICHER = load_enricher(args.enrich_subnets, args.enrich_asn, args.enrich_geo)
+        if args.verbose and not args.quiet:
+            sizes = ', '.join(f"{kind} {len(table)}" for kind, table in enrich.ENRICHER.tables.items())
+            print(f"{Fore.CYAN}🌐 Загружены таблицы адресов (диапазонов): {sizes}")
+    
+    # Сжатие zstd требует необязательного пакета zstandard - проверяем до парсинга
+    if not args.no_export and resolve_compression(args.output, args.compress) == 'zstd' and _load_zstd() is None:
+        print(f"{Fore.RED}❌ Ошибка: для сжатия zstd установите пакет zstandard (pip install zstandard)")
+        sys.exit(3)
+    
+    # Профилирование этапов; итог выводится при любом завершении (включая sys.exit)
+    profiler = None
+    counters = None
+    if args.profile or args.profile_json or args.cprofile:
+        profiler = StageProfiler(args)
+        profiler.install()
+        counters = profiler.counters
+        atexit.register(profiler.finish)
+    
+    # Индекс лога: построение (--index) и запрос по нему
+    ranges = None
+    query = has_query(args)
+    if (args.index or query) and sources is None and input_compression is None and not args.cache:
+        ranges = prepare_index_query(args, query)
+    
+    # Продолжение с места прошлого запуска
+    start_offset = None
+    progress = None
+    if args.state:
+        if _is_ascii_compatible(args.encoding):
+            start_offset = load_state_offset(args.state, args.input, args)
+            progress = {'offset': start_offset}
+        else:
+            print(f"{Fore.YELLOW}⚠ --state не поддерживается для кодировки {args.encoding}, файл разбирается целиком")
+    
+    # Приближённая статистика (--sketch, подразумевается --sketch-save/--sketch-merge)
+    sketches = None
+    if args.sketch or args.sketch_save or args.sketch_merge:
+        if not 4 <= args.sketch_precision <= 18 or args.sketch_capacity < 1:
+            print(f"{Fore.RED}❌ Ошибка: --sketch-precision должно быть от 4 до 18, а --sketch-capacity - положительным")
+            sys.exit(3)
+        sketches = AlertSketches(args.sketch_precision, args.sketch_capacity)
+    
+    # Единый проход: парсинг, фильтрация, вывод, статистика и экспорт
+    stats = LogStatistics(sketches)
+    # С --rollup вместо записей экспортируются агрегаты по интервалам
+    if args.coalesce and args.rollup:
+        print(f"{Fore.RED}❌ Ошибка: --coalesce нельзя сочетать с --rollup")
+        sys.exit(3)
+    if args.coalesce_flows < 1:
+        print(f"{Fore.RED}❌ Ошибка: --coalesce-flows должно быть положительным числом")
+        sys.exit(3)
+    rollup = None
+    if args.rollup:
+        rollup = RollupAggregator(args.rollup, flat=args.format == 'csv')
+    # С --coalesce повторы в окне выводятся и экспортируются одной записью
+    coalescer = None
+    if args.coalesce:
+        coalescer = AlertCoalescer(args.coalesce, args.coalesce_flows)
+    export_fields = ROLLUP_FIELDS if rollup is not None else None
+    if rollup is None and (sources is not None or coalescer is not None or enrich.ENRICHER is not None):
+        export_fields = list(ENTRY_FIELDS if args.epoch else EXPORT_FIELDS)
+        if sources is not None:
+            export_fields += SOURCE_FIELDS
+        if enrich.ENRICHER is not None:
+            export_fields += enrich.ENRICHER.fields
+        if coalescer is not None:
+            export_fields += COALESCE_FIELDS
+    exporter = None if args.no_export else create_exporter(args.format, args.output, args, export_fields)
+    # Отправка коллектору (--sink) идёт по мере разбора, вместе с экспортом в файл
+    sink = None
+    if args.sink:
+        if (min(args.sink_batch, args.sink_queue, args.sink_connections) < 1
+                or args.sink_interval <= 0 or args.sink_retries < 0):
+            print(f"{Fore.RED}❌ Ошибка: --sink-batch, --sink-queue, --sink-connections и --sink-interval "
+                  f"должны быть положительными, а --sink-retries - не меньше 0")
+            sys.exit(3)
+        try:
+            sink = create_sink(args.sink, args, export_fields)
+        except ValueError as e:
+            print(f"{Fore.RED}❌ Ошибка в адресе --sink: {e}")
+            sys.exit(3)
+        except OSError as e:
+            print(f"{Fore.RED}❌ Ошибка чтения спула '{args.sink_spool}': {e}")
+            sys.exit(1)
+        if args.verbose and not args.quiet:
+            print(f"{Fore.CYAN}📡 Отправка коллектору: {args.sink}")
+    if args.cache:
+        # Все записи лога из кеша; фильтры применяются к ним здесь
+        load, build = load_cache, build_cache
+        if profiler is not None:
+            load, build = profiler.timed('cache', load_cache), profiler.timed('cache', build_cache)
+        store = load(args.input, args)
+        if profiler is not None:
+            profiler.cache_built = store is None
+        if store is not None:
+            if args.verbose and not args.quiet:
+                print(f"{Fore.CYAN}💾 Записи из кеша: {cache_path(args.input)} ({len(store)})")
+        else:
+            if not os.path.isfile(args.input):
+                print(f"{Fore.RED}❌ Ошибка: Файл '{args.input}' не найден!")
+                print(f"   Проверьте путь или используйте опцию -i для указания файла")
+                sys.exit(1)
+            store = build(args.input, args, counters)
+            if args.verbose and not args.quiet:
+                print(f"{Fore.CYAN}💾 Построен кеш: {cache_path(args.input)} ({len(store)})")
+        entries = iter_store_entries(store, args)
+        if profiler is not None:
+            profiler.cache_rows = len(store)
+        # Только статистика по всем записям - считается прямо по колонкам
+        if (args.stats and exporter is None and sink is None and rollup is None and coalescer is None and sketches is None
+                and enrich.ENRICHER is None and not (args.filter or args.priority or args.where is not None or query or args.limit > 0)):
+            stats = LogStatistics.from_store(store)
+            entries = iter(())
+            if profiler is not None:
+                # Статистика считается по колонкам: кеш отдаёт все свои записи
+                profiler.entries = len(store)
+    else:
+        entries = iter_log_entries(input_name, args, start_offset, progress, counters, ranges, sources)
+    renderer = EntryRenderer(args)
+    add_entry, render_entry, show_statistics = stats.add, renderer.render, print_statistics
+    annotate_entry = enrich.ENRICHER.annotate if enrich.ENRICHER is not None else None
+    export_entry = exporter.write if exporter is not None else None
+    if sink is not None:
+        export_entry = sink.write if export_entry is None else _chain_writers(export_entry, sink.write)
+    if profiler is not None:
+        profiler.exporter = exporter
+        entries = profiler.iterate(entries)
+        add_entry = profiler.timed('stats', add_entry)
+        if annotate_entry is not None:
+            annotate_entry = profiler.timed('enrich', annotate_entry)
+        render_entry = profiler.timed('render', render_entry)
+        show_statistics = profiler.timed('stats', show_statistics)
+        if export_entry is not None:
+            export_entry = profiler.timed('export', export_entry)
+    show_details = not args.stats and not args.quiet
+    # В режиме --follow и при выводе не в терминал нет паузы, а статистика в --follow выводится периодически
+    paging = (show_details and not args.follow and not args.no_pager and not args.compact
+              and sys.stdin.isatty() and sys.stdout.isatty())
+    stats_interval = args.stats_interval if args.follow else 0
+    stats_due = time.monotonic() + stats_interval
+    # С --rollup записи выводятся, но экспортируются агрегаты
+    export_record = export_entry if rollup is None else None
+    shown = 0
+    
+    def output(record):
+        """Выводит и экспортирует запись (или схлопнутую запись --coalesce)"""
+        nonlocal shown
+        # Вывод записей с цветовой разметкой
+        if show_details:
+            if shown == 0:
+                renderer.header('ДЕТАЛИЗИРОВАННЫЙ ВЫВОД')
+            elif paging and shown % 5 == 0:
+                # Пауза каждые 5 записей для удобства просмотра
+                renderer.flush()
+                input(f"\n{Fore.YELLOW}Нажмите Enter для продолжения...")
+            render_entry(record, shown)
+        shown += 1
+        if export_record is not None:
+            export_record(record)
+    
+    try:
+        for entry in entries:
+            # Обогащение после фильтров: метки ищутся только для прошедших записей
+            if annotate_entry is not None:
+                annotate_entry(entry)
+            add_entry(entry)
+            
+            if coalescer is not None:
+                for record in coalescer.add(entry):
+                    output(record)
+            else:
+                output(entry)
+            
+            if rollup is not None:
+                for record in rollup.add(entry):
+                    if export_entry is not None:
+                        export_entry(record)
+            
+            if args.follow:
+                renderer.flush()
+                if stats_interval > 0 and time.monotonic() >= stats_due:
+                    show_statistics(stats, args)
+                    stats_due = time.monotonic() + stats_interval
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        if not args.follow:
+            raise
+        renderer.flush()
+        if not args.quiet:
+            print(f"\n{Fore.YELLOW}⏹ Наблюдение за файлом остановлено")
+    finally:
+        # Буфер вывода не теряется и при выходе по ошибке разбора
+        renderer.flush()
+    
+    # Незакрытые потоки --coalesce
+    if coalescer is not None:
+        for record in coalescer.flush():
+            output(record)
+        renderer.flush()
+        if args.verbose and not args.quiet:
+            print(f"{Fore.CYAN}🔁 Схлопнуто записей: {coalescer.received} -> {coalescer.emitted}, "
+                  f"вытеснено из LRU: {coalescer.evicted}")
+    
+    if not stats.total:
+        if sink is not None:
+            # Досылка спула прошлых запусков завершается и без новых записей
+            sink.close()
+        if progress is not None:
+            # Новых записей нет - отправлять нечего, смещение можно сдвигать
+            save_state(args.state, args.input, progress)
+        if query:
+            if not args.quiet:
+                print(f"{Fore.YELLOW}⚠ Записей по запросу в '{input_name}' не найдено")
+            sys.exit(0)
+        if args.follow or progress is not None:
+            if not args.quiet:
+                print(f"{Fore.YELLOW}⚠ Новых записей в '{args.input}' не появилось")
+            sys.exit(0)
+        print(f"{Fore.RED}❌ Не удалось загрузить записи из '{input_name}'")
+        print(f"{Fore.YELLOW}   Проверьте формат файла или используйте опцию -v для отладки")
+        sys.exit(2)
+    
+    if not args.quiet:
+        print(f"{Fore.GREEN}✅ Успешно загружено {stats.total} записей из '{input_name}'")
+    
+    # Объединение с сохранёнными состояниями и сохранение своего
+    if sketches is not None:
+        stats.flush()
+        for filename in args.sketch_merge or []:
+            try:
+                sketches.merge(load_sketches(filename))
+            except ValueError as e:
+                print(f"{Fore.RED}❌ Ошибка объединения с '{filename}': {e}")
+                sys.exit(1)
+        # Распределения уже объединены вместе с состоянием - итог тоже по всем состояниям
+        stats.total = sketches.total
+        if args.sketch_save:
+            try:
+                save_sketches(args.sketch_save, sketches)
+            except OSError as e:
+                print(f"{Fore.RED}❌ Ошибка сохранения состояния '{args.sketch_save}': {e}")
+                sys.exit(1)
+        if args.verbose and not args.quiet:
+            print(f"{Fore.CYAN}📐 Приближённая статистика: ~{sketches.nbytes() // 1024} КБ")
+    
+    # Вывод статистики
+    show_statistics(stats, args)
+    
+    # Незакрытые интервалы --rollup
+    if rollup is not None:
+        for record in rollup.flush():
+            if export_entry is not None:
+                export_entry(record)
+        if args.verbose and not args.quiet:
+            print(f"{Fore.CYAN}📊 Агрегатов по интервалам: {rollup.emitted}, записей без времени: {rollup.skipped}")
+    
+    # Экспорт в файл
+    delivered = True
+    if exporter is not None:
+        if profiler is not None:
+            profiler.timed('export', exporter.close)()
+        else:
+            exporter.close()
+        delivered = not exporter.failed
+    
+    # Остаток пачек коллектору (записи в спуле не потеряны - их дошлёт следующий запуск)
+    if sink is not None:
+        delivered = sink.close() and delivered
+        print_sink_report(sink, args)
+    
+    # Смещение --state сдвигается, только когда записи запуска выгружены:
+    # иначе следующий запуск не перечитает потерянные записи
+    if progress is not None:
+        if delivered:
+            save_state(args.state, args.input, progress)
+        else:
+            print(f"{Fore.YELLOW}⚠ Состояние '{args.state}' не обновлено: записи не выгружены, "
+                  f"следующий запуск разберёт их снова")
+    
+    # Дополнительные опции
+    if not args.quiet:
+        print(f"\n{Fore.CYAN}{Style.BRIGHT}{'='*80}")
+        print(f"{'ДОПОЛНИТЕЛЬНЫЕ ВОЗМОЖНОСТИ':^80}")
+        print(f"{'='*80}")
+        
+        # Пример фильтрации
+        if args.filter:
+            print(f"\n{Fore.WHITE}Применен фильтр: {Fore.CYAN}'{args.filter}'")
+            print(f"  Найдено {stats.total} совпадений")
+        
+        # Поиск конкретных угроз (описания в состоянии --sketch не хранятся)
+        if not args.filter:
+            scope = ' (только текущий вход, без --sketch-merge)' if sketches is not None and sketches.merged else ''
+            for family, count, first in stats.ioc_summary():
+                print(f"\n{Fore.WHITE}Обнаружены события {family}{scope}:")
+                print(f"  IP источника: {Fore.YELLOW}{format_ip(first['src_ip'])}")
+                print(f"  C&C сервер: {Fore.RED}{format_ip(first['dst_ip'])}")
+                print(f"  Количество событий: {Fore.CYAN}{count}")
+        
+        print(f"\n{Fore.GREEN}{Style.BRIGHT}✓ Анализ завершен успешно!")
+    
+    # Выходные коды
+    critical_events = stats.critical_count
+    if critical_events > 0:
+        if not args.quiet:
+            print(f"{Fore.RED}⚠ Обнаружено {critical_events} критических событий!")
+        sys.exit(1)  # Выход с кодом ошибки при критических событиях
+    else:
+        sys.exit(0)  # Успешное завершение
+
+def run():
+    """Запуск из командной строки: прерывание и непредвиденные ошибки - с кодом выхода"""
+    try:
+        main()
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}⚠ Программа прервана пользователем")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n{Fore.RED}❌ Неожиданная ошибка: {e}")
+        if '-v' in sys.argv or '--verbose' in sys.argv:
+            import traceback
+            traceback.print_exc()
+        sys.exit(3)
@@ -0,0 +1,26 @@
+"""
+Цвета colorama для вывода в терминал
+colorama загружается при первом обращении к цвету, а перехват sys.stdout
+(init) включает только командная строка - импорт пакета терминал не трогает
+"""
+
+class _LazyColors:
+    """Заменитель Fore, Back и Style: атрибуты берутся из colorama при первом обращении"""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        import colorama
+        value = getattr(getattr(colorama, self._name), attr)
+        setattr(self, attr, value)
+        return value
+
+Fore = _LazyColors('Fore')
+Back = _LazyColors('Back')
+Style = _LazyColors('Style')
+
+def init_colors():
+    """Инициализация colorama для командной строки: сброс цвета после каждого print"""
+    from colorama import init
+    init(autoreset=True)
@@ -0,0 +1,90 @@
+"""
+Сжатие входных логов и файлов экспорта: gzip, bz2, xz и zstd (пакет zstandard
+необязателен и загружается только при необходимости)
+"""
+
+import os
+import gzip
+import bz2
+import lzma
+import zlib
+
+# Сжатые входные файлы: сигнатура в начале файла -> формат
+INPUT_COMPRESSION_MAGIC = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+]
+
+def detect_input_compression(filename):
+    """Формат сжатия входного файла по сигнатуре (не по расширению) или None"""
+    with open(filename, 'rb') as file:
+        head = file.read(6)
+    for magic, compression in INPUT_COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+def open_input_stream(filename, compression=None):
+    """Открывает входной файл в двоичном режиме, сжатый - с распаковкой на лету"""
+    if compression == 'gzip':
+        return gzip.open(filename, 'rb')
+    if compression == 'bz2':
+        return bz2.open(filename, 'rb')
+    if compression == 'xz':
+        return lzma.open(filename, 'rb')
+    if compression == 'zstd':
+        zstd = _load_zstd()
+        if zstd is None:
+            raise RuntimeError("для чтения zstd установите пакет zstandard (pip install zstandard)")
+        return zstd.ZstdDecompressor().stream_reader(open(filename, 'rb'), read_across_frames=True, closefd=True)
+    return open(filename, 'rb')
+
+def input_decompression_errors():
+    """Исключения распаковщиков о повреждённом или обрезанном сжатом файле"""
+    errors = (EOFError, zlib.error, lzma.LZMAError, gzip.BadGzipFile)
+    zstd = _zstd_module or None
+    if zstd is not None:
+        errors += (zstd.ZstdError,)
+    return errors
+
+# Сжатие экспорта по расширению выходного файла
+EXPORT_COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.zst': 'zstd',
+}
+
+def resolve_compression(filename, compression='auto'):
+    """Определяет сжатие экспорта: явно заданное или по расширению файла"""
+    if compression == 'auto':
+        extension = os.path.splitext(filename)[1].lower()
+        return EXPORT_COMPRESSION_EXTENSIONS.get(extension)
+    if compression == 'none':
+        return None
+    return compression
+
+# zstandard необязателен: загружается только при экспорте в .zst
+_zstd_module = None
+
+def _load_zstd():
+    """Возвращает модуль zstandard или None, если он не установлен"""
+    global _zstd_module
+    if _zstd_module is None:
+        try:
+            import zstandard
+            _zstd_module = zstandard
+        except ImportError:
+            _zstd_module = False
+    return _zstd_module or None
+
+def open_export_stream(filename, compression=None):
+    """Открывает выходной файл в двоичном режиме, при необходимости со сжатием на лету"""
+    if compression == 'gzip':
+        return gzip.open(filename, 'wb', compresslevel=6)
+    if compression == 'zstd':
+        zstd = _load_zstd()
+        if zstd is None:
+            raise RuntimeError("для сжатия zstd установите пакет zstandard (pip install zstandard)")
+        return zstd.ZstdCompressor(level=3).stream_writer(open(filename, 'wb'))
+    return open(filename, 'wb')
@@ -0,0 +1,215 @@
+"""
+Обогащение IP-адресов по локальным таблицам диапазонов (--enrich-subnets,
+--enrich-asn, --enrich-geo): подсеть из инвентаря активов, ASN и страна
+"""
+
+import sys
+import csv
+import heapq
+import socket
+import bisect
+import operator
+import functools
+
+from .colors import Fore
+
+# Виды таблиц в порядке полей записи: src_subnet, src_asn, src_country, dst_...
+ENRICH_KINDS = ('subnet', 'asn', 'country')
+ENRICH_FIELDS = [f'{side}_{kind}' for side in ('src', 'dst') for kind in ENRICH_KINDS]
+
+# Размер LRU-кеша адрес -> метки (повторяющихся адресов в логе немного)
+ENRICH_CACHE_SIZE = 65536
+
+# IPv6 хранится в одной шкале с IPv4, выше всех IPv4-адресов
+IPV6_BASE = 1 << 32
+
+def ip_value(ip):
+    """Адрес в виде числа общей шкалы IPv4/IPv6 (None - не IP-адрес)"""
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+    except (OSError, TypeError):
+        pass
+    try:
+        return IPV6_BASE + int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+    except (OSError, TypeError):
+        return None
+
+def _checked_range(start, end, text):
+    """Проверяет диапазон из двух адресов-чисел: одно семейство, начало не больше конца"""
+    if start is None or end is None or (start < IPV6_BASE) != (end < IPV6_BASE) or end < start:
+        raise ValueError(f"неверный диапазон '{text}'")
+    return start, end
+
+def parse_ip_range(text):
+    """
+    Диапазон (начало, конец) включительно из записи подсети: CIDR
+    (10.0.0.0/8, 2001:db8::/32), отдельный адрес или "начало-конец"
+    ValueError - запись не распознана
+    """
+    text = text.strip()
+    if '/' in text:
+        address, _, bits = text.partition('/')
+        start = ip_value(address)
+        width = 32 if start is not None and start < IPV6_BASE else 128
+        if start is None or not bits.isdecimal() or int(bits) > width:
+            raise ValueError(f"неверная подсеть '{text}'")
+        host_mask = (1 << (width - int(bits))) - 1
+        start &= ~host_mask
+        return start, start | host_mask
+    if '-' in text:
+        first, _, last = text.partition('-')
+        return _checked_range(ip_value(first.strip()), ip_value(last.strip()), text)
+    value = ip_value(text)
+    if value is None:
+        raise ValueError(f"неверный адрес '{text}'")
+    return value, value
+
+class IpRangeTable:
+    """
+    Таблица диапазонов адресов с метками, поиск за O(log n) через bisect
+    Вложенные и пересекающиеся диапазоны при построении разворачиваются в
+    непересекающиеся отрезки: адрес получает метку самого узкого диапазона,
+    при равной ширине - диапазона, добавленного позже
+    """
+
+    def __init__(self, ranges=()):
+        ranges = sorted(
+            ((start, end, order, label) for order, (start, end, label) in enumerate(ranges)),
+            key=operator.itemgetter(0)
+        )
+        # Дампы ASN и GeoIP обычно уже без пересечений - тогда развёртка не нужна
+        if all(previous[1] < current[0] for previous, current in zip(ranges, ranges[1:])):
+            self._starts = [start for start, _, _, _ in ranges]
+            self._ends = [end for _, end, _, _ in ranges]
+            self._labels = [label for _, _, _, label in ranges]
+            return
+        
+        # Развёртка: на каждой границе - самый узкий из открытых диапазонов (куча)
+        points = sorted({start for start, _, _, _ in ranges} | {end + 1 for _, end, _, _ in ranges})
+        self._starts = []
+        self._ends = []
+        self._labels = []
+        opened = []
+        position = 0
+        for number, point in enumerate(points[:-1]):
+            while position < len(ranges) and ranges[position][0] == point:
+                start, end, order, label = ranges[position]
+                heapq.heappush(opened, (end - start, -order, end, label))
+                position += 1
+            while opened and opened[0][2] < point:
+                heapq.heappop(opened)
+            if not opened:
+                continue
+            label = opened[0][3]
+            if self._ends and self._ends[-1] == point - 1 and self._labels[-1] == label:
+                self._ends[-1] = points[number + 1] - 1
+            else:
+                self._starts.append(point)
+                self._ends.append(points[number + 1] - 1)
+                self._labels.append(label)
+
+    @classmethod
+    def from_networks(cls, networks):
+        """Строит таблицу из пар (подсеть, метка), подсеть - как в parse_ip_range"""
+        return cls((*parse_ip_range(network), label) for network, label in networks)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def lookup_value(self, value):
+        """Метка диапазона, содержащего адрес-число (None - не найден)"""
+        index = bisect.bisect_right(self._starts, value) - 1
+        if index >= 0 and value <= self._ends[index]:
+            return self._labels[index]
+        return None
+
+    def lookup(self, ip):
+        """Метка диапазона, содержащего адрес (None - не найден или не IP)"""
+        value = ip_value(ip)
+        return None if value is None else self.lookup_value(value)
+
+def load_ip_ranges(filename):
+    """
+    Читает таблицу диапазонов (CSV или TSV) в список (начало, конец, метка)
+    Строка: подсеть (CIDR, адрес или "начало-конец") и метка, либо начало и
+    конец диапазона отдельными колонками и метка (как в дампах iptoasn).
+    Метка - остальные непустые колонки через пробел. Пустые строки и строки,
+    начинающиеся с #, пропускаются; нераспознанная первая строка - заголовок
+    """
+    ranges = []
+    # Одинаковые метки (организация ASN, код страны) хранятся одной строкой
+    labels = {}
+    try:
+        with open(filename, 'r', encoding='utf-8', newline='') as table_file:
+            lines = [
+                (line_num, line) for line_num, line in enumerate(table_file, 1)
+                if line.strip() and not line.lstrip().startswith('#')
+            ]
+            delimiter = '\t' if lines and '\t' in lines[0][1] else ','
+            rows = csv.reader((line for _, line in lines), delimiter=delimiter)
+            for (line_num, _), row in zip(lines, rows):
+                columns = [column.strip() for column in row]
+                try:
+                    end = ip_value(columns[1]) if len(columns) > 2 else None
+                    if end is not None:
+                        start, end = _checked_range(ip_value(columns[0]), end, f'{columns[0]}-{columns[1]}')
+                        label = ' '.join(column for column in columns[2:] if column)
+                    else:
+                        start, end = parse_ip_range(columns[0])
+                        label = ' '.join(column for column in columns[1:] if column)
+                    if not label:
+                        raise ValueError("нет метки")
+                except ValueError as e:
+                    if line_num == lines[0][0]:
+                        continue
+                    print(f"{Fore.RED}❌ Ошибка: строка {line_num} таблицы адресов '{filename}': {e}")
+                    sys.exit(3)
+                ranges.append((start, end, labels.setdefault(label, label)))
+    except FileNotFoundError:
+        print(f"{Fore.RED}❌ Ошибка: Файл таблицы адресов '{filename}' не найден")
+        sys.exit(1)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        print(f"{Fore.RED}❌ Ошибка при чтении таблицы адресов '{filename}': {e}")
+        sys.exit(1)
+    return ranges
+
+class IpEnricher:
+    """
+    Обогащение записей метками адресов источника и назначения
+    tables - словарь вид -> IpRangeTable (виды из ENRICH_KINDS). Запись получает
+    поля src_<вид> и dst_<вид> (None - адреса нет в таблице). Метки всех таблиц
+    для адреса ищутся один раз и кешируются в LRU-кеше
+    """
+
+    def __init__(self, tables, cache_size=ENRICH_CACHE_SIZE):
+        self.tables = {kind: tables[kind] for kind in ENRICH_KINDS if kind in tables}
+        self.kinds = tuple(self.tables)
+        self.fields = [f'{side}_{kind}' for side in ('src', 'dst') for kind in self.kinds]
+        self.labels = functools.lru_cache(maxsize=cache_size)(self._labels)
+
+    def _labels(self, ip):
+        """Метки адреса по всем таблицам (кортеж в порядке self.kinds)"""
+        value = ip_value(ip)
+        if value is None:
+            return (None,) * len(self.kinds)
+        return tuple(table.lookup_value(value) for table in self.tables.values())
+
+    def annotate(self, entry):
+        """Добавляет в запись поля обогащения (запись меняется на месте)"""
+        entry.update(zip(self.fields, self.labels(entry['src_ip']) + self.labels(entry['dst_ip'])))
+        return entry
+
+    def describe(self, ip):
+        """Метки адреса одной строкой для вывода ('' - меток нет)"""
+        return ', '.join(label for label in self.labels(ip) if label is not None)
+
+def load_enricher(subnets=(), asn=(), geo=()):
+    """Загружает таблицы видов из файлов (несколько файлов вида объединяются, последние важнее)"""
+    tables = {}
+    for kind, filenames in zip(ENRICH_KINDS, (subnets, asn, geo)):
+        if filenames:
+            tables[kind] = IpRangeTable([item for filename in filenames for item in load_ip_ranges(filename)])
+    return IpEnricher(tables)
+
+# Активное обогащение (задаётся при загрузке --enrich-*, None - выключено)
+ENRICHER = None
@@ -0,0 +1,241 @@
+"""
+Экспорт записей в CSV, JSON и NDJSON с буферизованной записью и сжатием
+"""
+
+import csv
+
+from .colors import Fore
+from .parser import EXPORT_FIELDS, ENTRY_FIELDS
+from .compression import resolve_compression, open_export_stream
+from .store import AlertStore
+
+# Размер блока буферизованной записи экспорта
+EXPORT_BLOCK_SIZE = 1 << 20
+
+class BlockWriter:
+    """
+    Текстовый поток поверх двоичного: строки копятся в списке и кодируются
+    одним блоком по достижении block_size, а не по одной записи
+    """
+
+    def __init__(self, stream, block_size=EXPORT_BLOCK_SIZE, encoding='utf-8'):
+        self.stream = stream
+        self.block_size = block_size
+        self.encoding = encoding
+        self._parts = []
+        self._size = 0
+        self.bytes_written = 0
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.block_size:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        """Кодирует накопленный блок и отдаёт его в поток"""
+        if self._parts:
+            block = ''.join(self._parts).encode(self.encoding)
+            self.stream.write(block)
+            self.bytes_written += len(block)
+            self._parts = []
+            self._size = 0
+        if not self.block_size:
+            # Режим без буферизации (--follow): данные сразу видны читателю
+            self.stream.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.stream.close()
+
+class LogExporter:
+    """
+    Базовый потоковый экспортер: записи пишутся по мере парсинга.
+    Файл открывается при первой записи, поэтому при пустом результате не создаётся.
+    Запись идёт крупными блоками, при необходимости со сжатием gzip/zstd.
+    """
+    format_name = ''
+
+    def __init__(self, filename, args, fields=None):
+        self.filename = filename
+        self.args = args
+        self.count = 0
+        self.failed = False
+        self._file = None
+        self.compression = resolve_compression(filename, getattr(args, 'compress', 'auto'))
+        # С --epoch к полям записи добавляется время в микросекундах от эпохи
+        if fields is None:
+            fields = ENTRY_FIELDS if getattr(args, 'epoch', False) else EXPORT_FIELDS
+        self.fields = fields
+        # В режиме --follow записи не задерживаются в буфере
+        self.block_size = 0 if getattr(args, 'follow', False) else EXPORT_BLOCK_SIZE
+
+    def _open_file(self):
+        """Открывает выходной файл как буферизованный текстовый поток"""
+        self._file = BlockWriter(open_export_stream(self.filename, self.compression), self.block_size)
+        return self._file
+
+    def _open(self):
+        """Открывает выходной файл и пишет заголовок формата"""
+        raise NotImplementedError
+
+    def _write_entry(self, entry):
+        """Пишет одну запись в открытый файл"""
+        raise NotImplementedError
+
+    def _finish(self):
+        """Дописывает окончание формата перед закрытием файла"""
+
+    def _write_row(self, row):
+        """Пишет одну запись-кортеж в порядке полей экспорта (self.fields)"""
+        self._write_entry(dict(zip(self.fields, row)))
+
+    def _write(self, write_function, value):
+        """Общая обработка записи: открытие файла, подсчёт и ошибки"""
+        if self.failed:
+            return False
+        try:
+            if self._file is None:
+                self._open()
+            write_function(value)
+            self.count += 1
+            return True
+        except Exception as e:
+            self._report_error(e)
+            return False
+
+    @property
+    def bytes_written(self):
+        """Сколько байт записано до сжатия"""
+        return self._file.bytes_written if self._file is not None else 0
+
+    def write(self, entry):
+        """Экспортирует одну запись; после первой ошибки запись прекращается"""
+        return self._write(self._write_entry, entry)
+
+    def write_row(self, row):
+        """Экспортирует запись-кортеж (например, из AlertStore.iter_rows)"""
+        return self._write(self._write_row, row)
+
+    def close(self):
+        """Завершает экспорт и сообщает результат"""
+        if self.failed:
+            return False
+        if self._file is None:
+            print(f"{Fore.YELLOW}⚠ Нет данных для экспорта")
+            return False
+        try:
+            self._finish()
+            self._file.close()
+        except Exception as e:
+            self._report_error(e)
+            return False
+        
+        if not self.args.quiet:
+            print(f"{Fore.GREEN}✅ Данные успешно экспортированы в '{self.filename}'")
+            print(f"   Всего записей: {self.count}")
+        return True
+
+    def _report_error(self, error):
+        """Сообщает об ошибке экспорта и закрывает файл"""
+        self.failed = True
+        if self._file is not None:
+            try:
+                self._file.stream.close()
+            except Exception:
+                pass
+        if isinstance(error, PermissionError):
+            print(f"{Fore.RED}❌ Ошибка: Нет прав на запись в файл '{self.filename}'")
+        else:
+            print(f"{Fore.RED}❌ Ошибка при экспорте в {self.format_name}: {error}")
+
+class CsvExporter(LogExporter):
+    """Потоковый экспорт в CSV"""
+    format_name = 'CSV'
+
+    def _open(self):
+        self._open_file()
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction='ignore')
+        self._writer.writeheader()
+        self._row_writer = csv.writer(self._file)
+
+    def _write_entry(self, entry):
+        self._writer.writerow(entry)
+
+    def _write_row(self, row):
+        self._row_writer.writerow(row)
+
+class JsonExporter(LogExporter):
+    """
+    Потоковый экспорт в JSON: результат совпадает с json.dump(entries, indent=2),
+    но весь список в памяти не строится. Записи плоские, поэтому отступы
+    расставляются вручную, а значения кодирует быстрый C-кодировщик json
+    """
+    format_name = 'JSON'
+
+    def _open(self):
+        import json
+        self._encode = json.JSONEncoder(ensure_ascii=False).encode
+        self._keys = [(field, self._encode(field) + ': ') for field in self.fields]
+        self._open_file()
+        self._file.write('[')
+
+    def _write_entry(self, entry):
+        encode = self._encode
+        item = ',\n    '.join(key + encode(entry[field]) for field, key in self._keys)
+        self._file.write((',\n  {\n    ' if self.count else '\n  {\n    ') + item + '\n  }')
+
+    def _finish(self):
+        self._file.write('\n]')
+
+class NdjsonExporter(LogExporter):
+    """Потоковый экспорт в NDJSON: один компактный JSON-объект на строку"""
+    format_name = 'NDJSON'
+
+    def _open(self):
+        import json
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        self._keys = [(field, self._encode(field) + ':') for field in self.fields]
+        self._open_file()
+
+    def _write_entry(self, entry):
+        encode = self._encode
+        self._file.write('{' + ','.join(key + encode(entry[field]) for field, key in self._keys) + '}\n')
+
+EXPORTERS = {
+    'csv': CsvExporter,
+    'json': JsonExporter,
+    'ndjson': NdjsonExporter,
+}
+
+def create_exporter(export_format, filename, args, fields=None):
+    """Создаёт потоковый экспортер для указанного формата (fields - поля, если не поля записи)"""
+    return EXPORTERS[export_format](filename, args, fields)
+
+def export_entries(entries, filename, args, export_format):
+    """Экспортирует записи из любого итерируемого источника"""
+    exporter = create_exporter(export_format, filename, args)
+    if isinstance(entries, AlertStore):
+        # Из колоночного хранилища пишем кортежи, не собирая словари
+        write, entries = exporter.write_row, entries.iter_rows(exporter.fields)
+    else:
+        write = exporter.write
+    for entry in entries:
+        if not write(entry):
+            break
+    return exporter.close()
+
+def export_to_csv(entries, filename, args):
+    """Экспортирует данные в CSV файл"""
+    return export_entries(entries, filename, args, 'csv')
+
+def export_to_json(entries, filename, args):
+    """Экспортирует данные в JSON файл"""
+    return export_entries(entries, filename, args, 'json')
+
+def export_to_ndjson(entries, filename, args):
+    """Экспортирует данные в NDJSON файл (одна запись на строку)"""
+    return export_entries(entries, filename, args, 'ndjson')
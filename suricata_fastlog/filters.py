@@ -0,0 +1,438 @@
+"""
+Фильтры записей: --filter, --priority, запрос --since/--until/--src/--dst/--sid
+и язык выражений --where с предварительным отбором строк по подстрокам
+"""
+
+import re
+import argparse
+import functools
+import operator
+import socket
+from datetime import datetime, timedelta, timezone
+
+from .parser import EPOCH
+
+def parse_time_argument(value):
+    """
+    Разбор --since/--until в микросекунды от эпохи: 'YYYY-MM-DD[ HH:MM[:SS]][+HH:MM]'
+    или формат лога MM/DD/YYYY-HH:MM:SS; время без часового пояса считается UTC
+    """
+    for parse in (datetime.fromisoformat,
+                  lambda text: datetime.strptime(text, '%m/%d/%Y-%H:%M:%S.%f'),
+                  lambda text: datetime.strptime(text, '%m/%d/%Y-%H:%M:%S')):
+        try:
+            moment = parse(value.strip())
+        except ValueError:
+            continue
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return (moment - EPOCH) // timedelta(microseconds=1)
+    raise argparse.ArgumentTypeError(
+        f"неверное время '{value}', ожидается 'YYYY-MM-DD HH:MM[:SS]' или 'MM/DD/YYYY-HH:MM:SS'"
+    )
+
+def rule_matches(rule_id, sid):
+    """Совпадает ли rule_id (gid:sid:rev) с --sid: полный ID, gid:sid или только sid"""
+    if sid.count(':') == 2:
+        return rule_id == sid
+    if ':' in sid:
+        return rule_id.rsplit(':', 1)[0] == sid
+    parts = rule_id.split(':')
+    return len(parts) == 3 and parts[1] == sid
+
+def entry_matches_filters(entry, args):
+    """Проверяет запись на соответствие фильтрам --filter, --priority, --where и запросу --since/--until/--src/--dst/--sid"""
+    if args.filter and args.filter.lower() not in entry['description'].lower():
+        return False
+    
+    if args.priority and entry['priority'] != args.priority:
+        return False
+    
+    if args.src and entry['src_ip'] != args.src:
+        return False
+    
+    if args.dst and entry['dst_ip'] != args.dst:
+        return False
+    
+    if args.sid and not rule_matches(entry['rule_id'], args.sid):
+        return False
+    
+    if args.since is not None or args.until is not None:
+        key = entry['epoch_us']
+        if key is None:
+            return False
+        if args.since is not None and key < args.since:
+            return False
+        if args.until is not None and key > args.until:
+            return False
+    
+    if args.where is not None and not args.where.predicate(entry):
+        return False
+    
+    return True
+
+# Язык выражений --where: поля записи и их типы
+WHERE_NUMERIC_FIELDS = {
+    'priority': operator.itemgetter('priority'),
+    'src_port': operator.itemgetter('src_port'),
+    'dst_port': operator.itemgetter('dst_port'),
+    'gid': lambda entry: int(entry['rule_id'].split(':')[0]),
+    'sid': lambda entry: int(entry['rule_id'].split(':')[1]),
+    'rev': lambda entry: int(entry['rule_id'].split(':')[2]),
+    'time': operator.itemgetter('epoch_us'),
+}
+WHERE_IP_FIELDS = {'src': 'src_ip', 'src_ip': 'src_ip', 'dst': 'dst_ip', 'dst_ip': 'dst_ip'}
+WHERE_TEXT_FIELDS = {
+    'protocol': 'protocol', 'proto': 'protocol',
+    'rule': 'rule_id', 'rule_id': 'rule_id',
+    'description': 'description', 'desc': 'description',
+    'classification': 'classification', 'class': 'classification',
+    'sensor': 'sensor',
+}
+
+WHERE_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<string>'[^']*'|"[^"]*")
+      | (?P<op>==|!=|<=|>=|!~|=|<|>|~)
+      | (?P<punct>[(){},])
+      | (?P<word>[^\s(){},'"=!<>~]+)
+    )''', re.VERBOSE)
+
+WHERE_COMPARISONS = {
+    '==': operator.eq, '=': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+# Символы regex: шаблон без них - просто подстрока, её можно искать в сырой строке
+WHERE_REGEX_SPECIAL = re.compile(r'[\\.^$*+?{}\[\]|()]')
+
+class LinePrefilter:
+    """
+    Дешёвая проверка сырой строки до разбора регулярным выражением
+    Набор условий, каждое - кортеж подстрок (достаточно любой из них). Условия
+    необходимые: строка без них точно не пройдёт фильтры, поэтому её не нужно
+    разбирать и превращать в словарь. Проверяется и текст, и байты (mmap)
+    """
+
+    def __init__(self):
+        self.conditions = []
+        self.byte_conditions = []
+
+    def __bool__(self):
+        return bool(self.conditions)
+
+    def add(self, *needles):
+        """Добавляет условие: в строке есть хотя бы одна из подстрок"""
+        self.conditions.append(needles)
+        # В байтах ищем только ASCII-подстроки: они одинаковы во всех поддерживаемых кодировках
+        if all(needle.isascii() for needle in needles):
+            self.byte_conditions.append(tuple(needle.encode('ascii') for needle in needles))
+
+    def match_text(self, line):
+        """Может ли строка пройти фильтры"""
+        for needles in self.conditions:
+            for needle in needles:
+                if needle in line:
+                    break
+            else:
+                return False
+        return True
+
+    def match_buffer(self, buffer, start, end):
+        """То же для строки [start, end) байтового буфера, без копирования"""
+        find = buffer.find
+        for needles in self.byte_conditions:
+            for needle in needles:
+                if find(needle, start, end) >= 0:
+                    break
+            else:
+                return False
+        return True
+
+def _ip_value(ip):
+    """
+    IPv4-адрес в виде числа (None - не IPv4)
+    Только четыре десятичных октета: inet_aton принял бы и "10" (0.0.0.10),
+    и восьмеричные "010", которых Suricata в логе не пишет
+    """
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+    except (OSError, TypeError):
+        return None
+
+class WhereExpression:
+    """
+    Скомпилированное выражение --where: predicate(entry) -> bool и prefilter -
+    подстроки, без которых сырая строка заведомо не пройдёт выражение (их ищут
+    до разбора). В процессы пула передаётся текстом и компилируется заново
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._tokens = []
+        self._position = 0
+        text = text.strip()
+        position = 0
+        while position < len(text):
+            match = WHERE_TOKEN.match(text, position)
+            if not match or not match.group(0).strip():
+                raise ValueError(f"непонятный фрагмент '{text[position:].strip()[:20]}'")
+            self._tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        if not self._tokens:
+            raise ValueError("пустое выражение")
+        
+        self.predicate, conditions = self._parse_or()
+        if self._position < len(self._tokens):
+            raise ValueError(f"лишнее '{self._tokens[self._position][1]}'")
+        del self._tokens
+        self.prefilter = LinePrefilter()
+        for needles in conditions:
+            self.prefilter.add(*needles)
+
+    def __reduce__(self):
+        return (compile_where, (self.text,))
+
+    def matches(self, entry):
+        """Проходит ли запись выражение"""
+        return self.predicate(entry)
+
+    # Разбор: or -> and -> not -> (выражение) | сравнение
+    # Каждый уровень возвращает (предикат, необходимые условия на подстроки)
+    def _peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return (None, None)
+
+    def _next(self, expected=None):
+        kind, value = self._peek()
+        if kind is None:
+            raise ValueError("неожиданный конец выражения")
+        if expected is not None and value != expected:
+            raise ValueError(f"ожидается '{expected}', получено '{value}'")
+        self._position += 1
+        return kind, value
+
+    def _keyword(self, word):
+        kind, value = self._peek()
+        if kind == 'word' and value.lower() == word:
+            self._position += 1
+            return True
+        return False
+
+    def _parse_or(self):
+        predicate, conditions = self._parse_and()
+        while self._keyword('or'):
+            right, right_conditions = self._parse_and()
+            left = predicate
+            predicate = lambda entry, left=left, right=right: left(entry) or right(entry)
+            # Для a or b необходима подстрока хотя бы одной из сторон
+            conditions = [conditions[0] + right_conditions[0]] if conditions and right_conditions else []
+        return predicate, conditions
+
+    def _parse_and(self):
+        predicate, conditions = self._parse_not()
+        while self._keyword('and'):
+            right, right_conditions = self._parse_not()
+            left = predicate
+            predicate = lambda entry, left=left, right=right: left(entry) and right(entry)
+            conditions = conditions + right_conditions
+        return predicate, conditions
+
+    def _parse_not(self):
+        if self._keyword('not'):
+            inner, _ = self._parse_not()
+            return (lambda entry: not inner(entry)), []
+        if self._peek() == ('punct', '('):
+            self._next()
+            result = self._parse_or()
+            self._next(')')
+            return result
+        return self._parse_comparison()
+
+    def _parse_comparison(self):
+        kind, field = self._next()
+        if kind != 'word':
+            raise ValueError(f"ожидается имя поля, получено '{field}'")
+        field = field.lower()
+        if self._keyword('in'):
+            operation = 'in'
+        else:
+            kind, operation = self._next()
+            if kind != 'op':
+                raise ValueError(f"ожидается оператор после '{field}', получено '{operation}'")
+        values = self._parse_values() if operation == 'in' else [self._parse_value()]
+        
+        if field in WHERE_NUMERIC_FIELDS:
+            return self._numeric(field, operation, values)
+        if field in WHERE_IP_FIELDS:
+            return self._ip(WHERE_IP_FIELDS[field], operation, values)
+        if field in WHERE_TEXT_FIELDS:
+            return self._text(WHERE_TEXT_FIELDS[field], operation, values)
+        raise ValueError(f"неизвестное поле '{field}'")
+
+    def _parse_value(self):
+        kind, value = self._next()
+        if kind == 'string':
+            return value[1:-1]
+        if kind != 'word':
+            raise ValueError(f"ожидается значение, получено '{value}'")
+        return value
+
+    def _parse_values(self):
+        """Значение или набор {a, b, ...} после in"""
+        if self._peek() != ('punct', '{'):
+            return [self._parse_value()]
+        self._next()
+        values = [self._parse_value()]
+        while self._peek() == ('punct', ','):
+            self._next()
+            values.append(self._parse_value())
+        self._next('}')
+        return values
+
+    def _numeric(self, field, operation, values):
+        """Числовое поле: сравнения, in с диапазонами a-b и наборами"""
+        get = WHERE_NUMERIC_FIELDS[field]
+        
+        def number(text):
+            if field == 'time':
+                try:
+                    return parse_time_argument(text)
+                except argparse.ArgumentTypeError as e:
+                    raise ValueError(str(e))
+            try:
+                return int(text)
+            except ValueError:
+                raise ValueError(f"'{field}': ожидается число, получено '{text}'")
+        
+        if operation == 'in':
+            ranges = []
+            for value in values:
+                # Диапазон a-b (у времени дефис - часть даты)
+                low, separator, high = value.partition('-') if field != 'time' else (value, '', '')
+                ranges.append((number(low), number(high) if separator else number(low)))
+            conditions = []
+            if field == 'sid' and all(low == high for low, high in ranges):
+                conditions.append(tuple(f':{low}:' for low, _ in ranges))
+            
+            def predicate(entry):
+                value = get(entry)
+                if value is None:
+                    return False
+                for low, high in ranges:
+                    if low <= value <= high:
+                        return True
+                return False
+            return predicate, conditions
+        
+        compare = WHERE_COMPARISONS.get(operation)
+        if compare is None:
+            raise ValueError(f"оператор '{operation}' не применим к '{field}'")
+        target = number(values[0])
+        conditions = [(f':{target}:',)] if field == 'sid' and compare is operator.eq else []
+        
+        def predicate(entry):
+            value = get(entry)
+            return value is not None and compare(value, target)
+        return predicate, conditions
+
+    def _ip(self, key, operation, values):
+        """IP-адрес: ==/!= и in с подсетями CIDR (и отдельными адресами)"""
+        if operation in ('==', '=', '!='):
+            target = values[0]
+            if operation == '!=':
+                return (lambda entry: entry[key] != target), []
+            return (lambda entry: entry[key] == target), [(target,)]
+        if operation != 'in':
+            raise ValueError(f"оператор '{operation}' не применим к IP-адресу")
+        networks = []
+        for value in values:
+            address, _, bits = value.partition('/')
+            start = _ip_value(address)
+            bits = bits or '32'
+            if start is None or not bits.isdecimal() or int(bits) > 32:
+                raise ValueError(f"неверная подсеть '{value}'")
+            mask = (0xFFFFFFFF << (32 - int(bits))) & 0xFFFFFFFF
+            networks.append((start & mask, mask))
+        conditions = []
+        if all(mask == 0xFFFFFFFF for _, mask in networks):
+            # Подстроки - адреса в том виде, в каком их пишет Suricata
+            conditions.append(tuple(socket.inet_ntoa(network.to_bytes(4, 'big')) for network, _ in networks))
+        
+        def predicate(entry):
+            value = _ip_value(entry[key])
+            if value is None:
+                return False
+            for network, mask in networks:
+                if value & mask == network:
+                    return True
+            return False
+        return predicate, conditions
+
+    def _text(self, key, operation, values):
+        """Текстовое поле: ==/!=, in {набор}, ~/!~ (поиск regex)"""
+        # Сенсора нет в тексте строки - для него подстроки не ищутся
+        in_line = key != 'sensor'
+        if key == 'protocol':
+            values = [value.upper() for value in values]
+        if operation in ('~', '!~'):
+            try:
+                regex = re.compile(values[0])
+            except re.error as e:
+                raise ValueError(f"неверное регулярное выражение '{values[0]}': {e}")
+            conditions = []
+            if operation == '~' and in_line and values[0] and not WHERE_REGEX_SPECIAL.search(values[0]):
+                conditions.append((values[0],))
+            found = operation == '~'
+            return (lambda entry: (regex.search(entry.get(key) or '') is not None) == found), conditions
+        if operation in ('==', '=', 'in'):
+            targets = frozenset(values)
+            conditions = []
+            if in_line and all(values):
+                conditions.append(tuple(f'{{{value}}}' if key == 'protocol' else value for value in values))
+            return (lambda entry: entry.get(key) in targets), conditions
+        if operation == '!=':
+            target = values[0]
+            return (lambda entry: entry.get(key) != target), []
+        raise ValueError(f"оператор '{operation}' не применим к текстовому полю")
+
+@functools.lru_cache(maxsize=32)
+def compile_where(text):
+    """Компилирует выражение --where (ValueError с описанием при ошибке)"""
+    return WhereExpression(text)
+
+def parse_where_argument(value):
+    """Тип аргумента --where для argparse"""
+    try:
+        return compile_where(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"ошибка в выражении '{value}': {e}")
+
+def line_prefilter(args):
+    """
+    Проверка сырой строки до разбора по условиям запроса: подстроки из --sid,
+    --src, --dst и условий верхнего уровня --where. None - проверять нечего
+    """
+    prefilter = LinePrefilter()
+    where = getattr(args, 'where', None)
+    if where is not None:
+        for needles in where.prefilter.conditions:
+            prefilter.add(*needles)
+    sid = getattr(args, 'sid', None)
+    if sid:
+        # ID правила в строке записан как [gid:sid:rev]
+        if sid.count(':') == 2:
+            prefilter.add(f'[{sid}]')
+        elif ':' in sid:
+            prefilter.add(f'[{sid}:')
+        else:
+            prefilter.add(f':{sid}:')
+    for ip in (getattr(args, 'src', None), getattr(args, 'dst', None)):
+        if ip:
+            prefilter.add(ip)
+    return prefilter or None
+
+def has_query(args):
+    """Заданы ли параметры запроса --since/--until/--src/--dst/--sid"""
+    return bool(args.src or args.dst or args.sid or args.since is not None or args.until is not None)
@@ -0,0 +1,199 @@
+"""
+Индекс лога --index: блоки файла с диапазоном времени и списки блоков по IP
+и правилам; запросы --since/--until/--src/--dst/--sid читают только нужные блоки
+"""
+
+import os
+import sys
+import gzip
+
+from .colors import Fore
+from .parser import parse_suricata_log_line
+from .filters import rule_matches
+from .reader import _complete_lines_end, _is_ascii_compatible
+from .state import STATE_HEAD_SIZE, _file_head_hash
+
+# Индекс лога (--index): блоки по переводам строк и списки блоков по IP и правилам
+INDEX_VERSION = 2
+INDEX_BLOCK_SIZE = 64 * 1024
+INDEX_SUFFIX = '.idx'
+
+def index_path(filename):
+    """Путь к индексу рядом с файлом лога"""
+    return filename + INDEX_SUFFIX
+
+def _new_index():
+    """Пустой индекс: blocks - [начало, конец, мин. и макс. epoch_us], списки блоков по ключам"""
+    return {'version': INDEX_VERSION, 'size': 0, 'blocks': [], 'src': {}, 'dst': {}, 'rule': {}}
+
+def load_index(filename):
+    """Читает индекс файла лога; None, если индекса нет или он повреждён"""
+    import json
+    
+    try:
+        with gzip.open(index_path(filename), 'rt', encoding='utf-8') as index_file:
+            index = json.load(index_file)
+        if index.get('version') != INDEX_VERSION:
+            return None
+        return index
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError):
+        return None
+
+def save_index(filename, index):
+    """Атомарно сохраняет индекс (JSON, сжатый gzip)"""
+    import json
+    
+    path = index_path(filename)
+    temp_path = path + '.tmp'
+    with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=6) as index_file:
+        json.dump(index, index_file, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+def _index_is_current(index, file, stat):
+    """Относится ли индекс к этому файлу: тот же inode, файл не короче и начало не изменилось"""
+    return (
+        index.get('inode') == stat.st_ino
+        and stat.st_size >= index['size']
+        and _file_head_hash(file, index.get('head_size', 0)) == index.get('head_hash')
+    )
+
+def update_index(filename, args):
+    """
+    Создаёт или дополняет индекс файла лога
+    Разбираются только байты, появившиеся после прошлой индексации; при ротации
+    или усечении файла индекс строится заново. Незавершённая последняя строка
+    не индексируется. Возвращает (индекс, число новых блоков)
+    """
+    index = load_index(filename)
+    with open(filename, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        if index is None or not _index_is_current(index, file, stat):
+            if index is not None and args.verbose:
+                print(f"{Fore.CYAN}🔄 Файл '{filename}' ротирован или усечён, индекс строится заново")
+            index = _new_index()
+        
+        start = index['size']
+        end = _complete_lines_end(file, start, stat.st_size)
+        blocks, postings = index['blocks'], (index['src'], index['dst'], index['rule'])
+        added = 0
+        file.seek(start)
+        position = start
+        while position < end:
+            data = file.read(min(INDEX_BLOCK_SIZE, end - position))
+            # Блок заканчивается на переводе строки; длинная строка дочитывается целиком
+            cut = data.rfind(b'\n') + 1
+            while not cut:
+                more = file.read(min(INDEX_BLOCK_SIZE, end - position - len(data)))
+                data += more
+                cut = data.rfind(b'\n') + 1
+            file.seek(position + cut)
+            
+            block_id = len(blocks)
+            keys = (set(), set(), set())
+            time_min = time_max = None
+            for raw in data[:cut].splitlines():
+                line = raw.decode(args.encoding, errors='replace').strip()
+                entry = parse_suricata_log_line(line) if line else None
+                if entry is None:
+                    continue
+                keys[0].add(entry['src_ip'])
+                keys[1].add(entry['dst_ip'])
+                keys[2].add(entry['rule_id'])
+                key = entry['epoch_us']
+                if key is not None:
+                    time_min = key if time_min is None else min(time_min, key)
+                    time_max = key if time_max is None else max(time_max, key)
+            
+            blocks.append([position, position + cut, time_min, time_max])
+            for block_keys, posting in zip(keys, postings):
+                for value in block_keys:
+                    posting.setdefault(value, []).append(block_id)
+            position += cut
+            added += 1
+        
+        index['size'] = end
+        index['inode'] = stat.st_ino
+        index['head_size'] = min(STATE_HEAD_SIZE, end)
+        index['head_hash'] = _file_head_hash(file, index['head_size'])
+    
+    if added or not os.path.exists(index_path(filename)):
+        save_index(filename, index)
+    return index, added
+
+def query_index_ranges(index, args):
+    """
+    Диапазоны байт [начало, конец) с возможными совпадениями запроса
+    Блоки отбираются пересечением списков по --src/--dst/--sid и по времени;
+    точная проверка записей выполняется фильтрами при чтении
+    """
+    candidates = None
+    for name, value in (('src', args.src), ('dst', args.dst)):
+        if value:
+            found = set(index[name].get(value, ()))
+            candidates = found if candidates is None else candidates & found
+    if args.sid:
+        found = set()
+        for rule_id, block_ids in index['rule'].items():
+            if rule_matches(rule_id, args.sid):
+                found.update(block_ids)
+        candidates = found if candidates is None else candidates & found
+    
+    block_ids = range(len(index['blocks'])) if candidates is None else sorted(candidates)
+    ranges = []
+    for block_id in block_ids:
+        start, end, time_min, time_max = index['blocks'][block_id]
+        if time_min is None:
+            continue
+        if args.since is not None and time_max < args.since:
+            continue
+        if args.until is not None and time_min > args.until:
+            continue
+        # Соседние блоки читаются одним диапазоном
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
+
+def prepare_index_query(args, query):
+    """
+    Обновляет индекс для --index и запросов и возвращает диапазоны байт для чтения
+    None - индекс не используется, файл разбирается целиком, а запрос
+    применяется фильтрами. Без запроса после индексации программа завершается
+    """
+    path = index_path(args.input)
+    if args.follow or args.state or not _is_ascii_compatible(args.encoding):
+        if args.index:
+            print(f"{Fore.YELLOW}⚠ Индекс не используется с --follow, --state и кодировкой {args.encoding}")
+        return None
+    
+    if not args.index and not os.path.exists(path):
+        if args.verbose and not args.quiet:
+            print(f"{Fore.CYAN}💡 Индекса нет, файл разбирается целиком (постройте его опцией --index)")
+        return None
+    
+    try:
+        index, added = update_index(args.input, args)
+    except FileNotFoundError:
+        print(f"{Fore.RED}❌ Ошибка: Файл '{args.input}' не найден!")
+        print(f"   Проверьте путь или используйте опцию -i для указания файла")
+        sys.exit(1)
+    except OSError as e:
+        print(f"{Fore.RED}❌ Ошибка при индексации файла '{args.input}': {e}")
+        sys.exit(1)
+    
+    if not args.quiet and (args.index or args.verbose):
+        print(f"{Fore.GREEN}🗂 Индекс '{path}': блоков {len(index['blocks'])}, новых {added}")
+    if not query:
+        sys.exit(0)
+    
+    ranges = query_index_ranges(index, args)
+    size = os.path.getsize(args.input)
+    if size > index['size']:
+        # Незавершённая последняя строка в индекс не попала - читаем её всегда
+        ranges.append([index['size'], size])
+    if args.verbose and not args.quiet:
+        print(f"{Fore.CYAN}🔍 По индексу читается {sum(end - start for start, end in ranges)} из {size} байт")
+    return ranges
@@ -0,0 +1,141 @@
+"""
+Индикаторы вредоносной активности и семейства угроз (--indicators)
+"""
+
+import sys
+import collections
+
+from .colors import Fore
+
+# Ключевые слова вредоносной активности в классификации
+MALWARE_CLASSIFICATION_KEYWORDS = ['trojan', 'malware', 'exploit', 'attack', 'virus', 'worm', 'ransomware']
+
+# Ключевые слова вредоносной активности в описании правила
+MALWARE_DESCRIPTION_KEYWORDS = ['loki', 'trojan', 'malware', 'keylogger', 'exfiltration', 'c&c', 'command', 'control']
+
+# Встроенные индикаторы классификации: категория -> ключевые слова
+CLASSIFICATION_INDICATORS = {
+    'trojan': ['trojan'],
+    'malware': ['malware', 'command and control'],
+    'exploit': ['exploit'],
+    'attack': ['attack'],
+    'scan': ['scan'],
+    'malicious': MALWARE_CLASSIFICATION_KEYWORDS,
+}
+
+# Встроенные индикаторы описания (общая категория вредоносной активности)
+DESCRIPTION_INDICATORS = {
+    'malicious': MALWARE_DESCRIPTION_KEYWORDS,
+}
+
+# Семейства угроз (IOC), которые ищутся в описаниях по умолчанию
+DEFAULT_IOC_FAMILIES = {
+    'LokiBot': ['lokibot'],
+}
+
+class IndicatorMatcher:
+    """
+    Поиск всех ключевых слов за один проход по строке (автомат Ахо-Корасик)
+    Время разбора строки не зависит от числа ключевых слов. Результат
+    кешируется по исходной строке, а описаний и классификаций в логе
+    немного, поэтому каждая уникальная строка разбирается один раз
+    """
+
+    def __init__(self, rules):
+        self.families = tuple(rules)
+        self._cache = {}
+        # Бор ключевых слов: переходы, ссылки неудач и семейства в каждом состоянии
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [frozenset()]
+        for family, keywords in rules.items():
+            for keyword in keywords:
+                keyword = keyword.strip().lower()
+                if not keyword:
+                    continue
+                state = 0
+                for char in keyword:
+                    next_state = self._goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][char] = next_state
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append(frozenset())
+                    state = next_state
+                self._output[state] = self._output[state] | {family}
+        
+        # Ссылки неудач обходом в ширину; семейства наследуются по ним
+        queue = collections.deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._output[next_state] = self._output[next_state] | self._output[fail]
+
+    def match(self, text):
+        """Возвращает множество семейств, ключевые слова которых есть в строке"""
+        verdict = self._cache.get(text)
+        if verdict is None:
+            goto, fail, output = self._goto, self._fail, self._output
+            found = set()
+            state = 0
+            for char in text.lower():
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                if output[state]:
+                    found.update(output[state])
+            verdict = self._cache[text] = frozenset(found)
+        return verdict
+
+class IndicatorEngine:
+    """Индикаторы для описаний и классификаций: встроенные категории и семейства IOC"""
+
+    def __init__(self, ioc_families=None):
+        families = dict(DEFAULT_IOC_FAMILIES)
+        for family, keywords in (ioc_families or {}).items():
+            families[family] = families.get(family, []) + list(keywords)
+        self.ioc_families = tuple(families)
+        
+        # Семейство с именем встроенной категории дополняет её ключевые слова
+        description_rules = {family: list(keywords) for family, keywords in DESCRIPTION_INDICATORS.items()}
+        for family, keywords in families.items():
+            description_rules[family] = description_rules.get(family, []) + keywords
+        self.description = IndicatorMatcher(description_rules)
+        self.classification = IndicatorMatcher(CLASSIFICATION_INDICATORS)
+
+def load_indicator_rules(filename):
+    """
+    Читает файл правил индикаторов: строки вида "FAMILY: kw1, kw2"
+    Пустые строки и строки, начинающиеся с #, пропускаются
+    """
+    rules = {}
+    try:
+        with open(filename, 'r', encoding='utf-8') as rules_file:
+            for line_num, line in enumerate(rules_file, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                family, separator, keywords = line.partition(':')
+                family = family.strip()
+                keywords = [keyword.strip() for keyword in keywords.split(',') if keyword.strip()]
+                if not separator or not family or not keywords:
+                    print(f"{Fore.RED}❌ Ошибка: строка {line_num} файла индикаторов '{filename}' не в формате 'FAMILY: kw1, kw2'")
+                    sys.exit(3)
+                rules.setdefault(family, []).extend(keywords)
+    except FileNotFoundError:
+        print(f"{Fore.RED}❌ Ошибка: Файл индикаторов '{filename}' не найден")
+        sys.exit(1)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"{Fore.RED}❌ Ошибка при чтении файла индикаторов '{filename}': {e}")
+        sys.exit(1)
+    return rules
+
+# Активный набор индикаторов (заменяется при загрузке --indicators)
+INDICATORS = IndicatorEngine()
@@ -0,0 +1,226 @@
+"""
+Разбор строк fast.log в записи-словари
+Основной паттерн с якорем, поиск внутри строки (префикс syslog) и
+альтернативный формат; разбор прямо в байтовом буфере для --mmap и --workers
+"""
+
+import re
+from datetime import datetime
+
+# Пути разбора строки (для отчёта о работе парсера)
+PARSE_PATH_FAST = 'fast'    # Якорное совпадение основного паттерна с начала строки
+PARSE_PATH_REGEX = 'regex'  # Основной паттерн где-то внутри строки (префикс syslog и т.п.)
+PARSE_PATH_ALT = 'alt'      # Альтернативный паттерн для других форматов
+PARSE_PATH_SKIPPED = 'prefiltered'  # Строка отсеяна по подстрокам запроса ещё до разбора
+
+# Основной паттерн для парсинга строк Suricata fast.log (компилируется один раз)
+LINE_PATTERN = re.compile(r'''
+    (\d{2}/\d{2}/\d{4}-\d{2}:\d{2}:\d{2}\.\d+)\s+  # Дата-время
+    \[\*\*\]\s+                                      # [**]
+    \[(\d+:\d+:\d+)\]\s+                            # ID правила (1:2021641:10)
+    (.*?)\s+                                         # Описание правила
+    \[\*\*\]\s+                                      # [**]
+    \[Classification:\s*(.*?)\]\s+                  # Классификация
+    \[Priority:\s*(\d+)\]\s+                        # Приоритет
+    \{(\w+)\}\s+                                     # Протокол
+    (\d+\.\d+\.\d+\.\d+):(\d+)\s+->\s+              # Источник IP:порт
+    (\d+\.\d+\.\d+\.\d+):(\d+)                      # Назначение IP:порт
+''', re.VERBOSE)
+
+# Альтернативный паттерн для других форматов (например, с префиксом syslog)
+ALT_LINE_PATTERN = re.compile(r'(\d{2}/\d{2}/\d{4}-\d{2}:\d{2}:\d{2}\.\d+).*?\[(\d+:\d+:\d+)\]\s+(.*?)\s+\[Classification:\s*(.*?)\]\s+\[Priority:\s*(\d+)\]\s+\{(\w+)\}\s+([\d\.]+):(\d+)\s+->\s+([\d\.]+):(\d+)')
+
+# Начало эпохи Unix; время в логе без часового пояса считается UTC
+EPOCH = datetime(1970, 1, 1)
+
+# Кеш префиксов MM/DD/YYYY и MM/DD/YYYY-HH:MM -> микросекунды от эпохи (False - неверный префикс).
+# Строки файла идут по времени, поэтому почти каждая строка попадает в кеш минут
+_date_epoch_cache = {}
+_minute_epoch_cache = {}
+EPOCH_CACHE_LIMIT = 4096
+
+def _cache_put(cache, key, value):
+    """Кладёт значение в кеш, очищая его при переполнении"""
+    if len(cache) >= EPOCH_CACHE_LIMIT:
+        cache.clear()
+    cache[key] = value
+    return value
+
+def _date_epoch_us(date_prefix):
+    """Начало суток MM/DD/YYYY в микросекундах от эпохи или False для неверной даты"""
+    value = _date_epoch_cache.get(date_prefix)
+    if value is None:
+        value = False
+        if len(date_prefix) == 10 and date_prefix[2] == '/' and date_prefix[5] == '/':
+            digits = date_prefix[:2] + date_prefix[3:5] + date_prefix[6:]
+            if digits.isdecimal():
+                try:
+                    day = datetime(int(digits[4:]), int(digits[:2]), int(digits[2:4]))
+                    value = (day - EPOCH).days * 86400 * 1000000
+                except ValueError:
+                    pass
+        _cache_put(_date_epoch_cache, date_prefix, value)
+    return value
+
+def _minute_epoch_us(minute_prefix):
+    """Начало минуты MM/DD/YYYY-HH:MM в микросекундах от эпохи или False"""
+    day = _date_epoch_us(minute_prefix[:10])
+    clock = minute_prefix[11:13] + minute_prefix[14:16]
+    value = False
+    if (day is not False and minute_prefix[10:11] == '-' and minute_prefix[13:14] == ':'
+            and len(clock) == 4 and clock.isdecimal() and int(clock[:2]) < 24 and int(clock[2:]) < 60):
+        value = day + (int(clock[:2]) * 60 + int(clock[2:])) * 60 * 1000000
+    return _cache_put(_minute_epoch_cache, minute_prefix, value)
+
+def timestamp_to_epoch_us(timestamp):
+    """
+    Время Suricata MM/DD/YYYY-HH:MM:SS.ffffff -> микросекунды от эпохи Unix (UTC)
+    Поля разбираются срезами по фиксированным позициям, начало минуты (и даты)
+    берётся из кеша. Возвращает None, если строка не в этом формате
+    (принимается то же, что и strptime с '%m/%d/%Y-%H:%M:%S.%f' для двузначных полей)
+    """
+    minute = _minute_epoch_cache.get(timestamp[:16])
+    if minute is None:
+        minute = _minute_epoch_us(timestamp[:16])
+    if minute is False:
+        return None
+    # Секунды и доли секунды - одно число SSffffff
+    rest = timestamp[17:19] + timestamp[20:]
+    if (timestamp[16:17] != ':' or timestamp[19:20] != '.' or not 3 <= len(rest) <= 8
+            or not rest.isdecimal() or rest[0] > '5'):
+        return None
+    return minute + int(rest.ljust(8, '0'))
+
+def _parsed_epoch_us(timestamp, cached_minute=_minute_epoch_cache.get):
+    """
+    timestamp_to_epoch_us для времени, уже проверенного паттерном разбора строки
+    (\d{2}/\d{2}/\d{4}-\d{2}:\d{2}:\d{2}\.\d+): остаётся проверить диапазоны
+    """
+    minute = cached_minute(timestamp[:16])
+    if minute is None:
+        minute = _minute_epoch_us(timestamp[:16])
+    if minute is False or len(timestamp) > 26 or timestamp[17] > '5':
+        return None
+    return minute + int((timestamp[17:19] + timestamp[20:]).ljust(8, '0'))
+
+def format_timestamp(timestamp):
+    """Время записи для вывода: YYYY-MM-DD HH:MM:SS.mmm или исходная строка, если формат другой"""
+    if timestamp_to_epoch_us(timestamp) is None:
+        return timestamp
+    return f"{timestamp[6:10]}-{timestamp[0:2]}-{timestamp[3:5]} {timestamp[11:19]}.{timestamp[20:].ljust(6, '0')[:3]}"
+
+def _make_entry(timestamp, rule_id, description, classification, priority,
+                protocol, src_ip, src_port, dst_ip, dst_port):
+    """Собирает словарь записи из разобранных полей (epoch_us - время в микросекундах от эпохи)"""
+    return {
+        'timestamp': timestamp,
+        'rule_id': rule_id,
+        'description': description,
+        'classification': classification,
+        'priority': int(priority),
+        'protocol': protocol,
+        'src_ip': src_ip,
+        'src_port': int(src_port),
+        'dst_ip': dst_ip,
+        'dst_port': int(dst_port),
+        'epoch_us': _parsed_epoch_us(timestamp)
+    }
+
+def parse_suricata_log_line_ex(line):
+    """
+    Парсит одну строку лога Suricata и сообщает, каким путём она разобрана
+    Возвращает кортеж (запись, путь), где путь - PARSE_PATH_FAST, PARSE_PATH_REGEX
+    или PARSE_PATH_ALT; при ошибке возвращает (None, None)
+    """
+    # Оба паттерна требуют эти разделители - строки без них отбрасываем без regex
+    if '[Classification:' not in line or '[Priority:' not in line or '->' not in line:
+        return None, None
+
+    # Быстрый путь: якорное совпадение с начала строки (обычная строка fast.log)
+    match = LINE_PATTERN.match(line)
+    if match:
+        return _make_entry(*match.groups()), PARSE_PATH_FAST
+
+    # Строка с префиксом: ищем основной паттерн по всей строке
+    match = LINE_PATTERN.search(line)
+    if match:
+        return _make_entry(*match.groups()), PARSE_PATH_REGEX
+
+    # Попробуем альтернативный паттерн для других форматов
+    match = ALT_LINE_PATTERN.search(line)
+    if match:
+        return _make_entry(*match.groups()), PARSE_PATH_ALT
+
+    return None, None
+
+def parse_suricata_log_line(line):
+    """
+    Парсит одну строку лога Suricata
+    Возвращает словарь с полями или None при ошибке
+    """
+    return parse_suricata_log_line_ex(line)[0]
+
+# Основной паттерн для разбора строк прямо в байтовом буфере (mmap)
+LINE_PATTERN_BYTES = re.compile(LINE_PATTERN.pattern.encode('utf-8'), re.VERBOSE)
+
+def iter_buffer_lines(buffer, start, end, encoding, prefilter=None):
+    """
+    Разбирает строки байтового буфера (например, mmap) в диапазоне [start, end)
+    Выдаёт (номер строки, запись, путь, строка, начало следующей строки): строка
+    декодируется только для неразобранных строк, у записей декодируются лишь
+    описание и классификация.
+    Пустые строки пропускаются, но учитываются в нумерации.
+    Строки, не прошедшие prefilter (line_prefilter), не разбираются и выдаются
+    с путём PARSE_PATH_SKIPPED и записью None.
+    Кодировка должна быть совместима с ASCII (utf-8, cp1251, latin-1 и т.п.)
+    """
+    match_line = LINE_PATTERN_BYTES.match
+    find = buffer.find
+    line_num = 0
+    pos = start
+    while pos < end:
+        line_end = find(b'\n', pos, end)
+        if line_end < 0:
+            line_end = end
+        
+        if prefilter is not None and not prefilter.match_buffer(buffer, pos, line_end):
+            if buffer[pos:line_end].strip():
+                yield line_num, None, PARSE_PATH_SKIPPED, None, line_end + 1
+            pos = line_end + 1
+            line_num += 1
+            continue
+        
+        match = match_line(buffer, pos, line_end)
+        if match:
+            (timestamp, rule_id, description, classification, priority,
+             protocol, src_ip, src_port, dst_ip, dst_port) = match.groups()
+            # Не-ASCII текст разбираем строковым паттерном: его \s шире байтового
+            if description.isascii() and classification.isascii():
+                entry = _make_entry(
+                    timestamp.decode('ascii'), rule_id.decode('ascii'),
+                    description.decode(encoding), classification.decode(encoding),
+                    priority, protocol.decode('ascii'), src_ip.decode('ascii'),
+                    src_port, dst_ip.decode('ascii'), dst_port
+                )
+                yield line_num, entry, PARSE_PATH_FAST, None, line_end + 1
+                pos = line_end + 1
+                line_num += 1
+                continue
+        
+        # Медленный путь: декодируем строку целиком
+        line = buffer[pos:line_end].decode(encoding).strip()
+        if line:
+            entry, path = parse_suricata_log_line_ex(line)
+            yield line_num, entry, path, line, line_end + 1
+        pos = line_end + 1
+        line_num += 1
+
+# Поля записи в порядке экспорта
+EXPORT_FIELDS = [
+    'timestamp', 'rule_id', 'description', 'classification',
+    'priority', 'protocol', 'src_ip', 'src_port',
+    'dst_ip', 'dst_port'
+]
+
+# Все поля записи: к экспортируемым добавляется время в микросекундах от эпохи
+ENTRY_FIELDS = EXPORT_FIELDS + ['epoch_us']
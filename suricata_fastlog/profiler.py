@@ -0,0 +1,206 @@
+"""
+Профилирование этапов --profile, --profile-json и --cprofile
+"""
+
+import os
+import sys
+import time
+import collections
+
+from . import parser, reader, store
+from .colors import Fore, Style
+from .parser import PARSE_PATH_FAST, PARSE_PATH_REGEX, PARSE_PATH_ALT, PARSE_PATH_SKIPPED
+from .reader import _new_parse_counters, _is_ascii_compatible, resolve_workers
+
+# Этапы --profile в порядке вывода: ключ -> название
+PROFILE_STAGES = [
+    ('cache', 'кеш: загрузка или построение'),
+    ('read', 'чтение и декодирование'),
+    ('parse_fast', 'разбор: быстрый путь'),
+    ('parse_regex', 'разбор: regex'),
+    ('parse_alt', 'разбор: альтернативный паттерн'),
+    ('parse_error', 'разбор: неразобранные строки'),
+    ('filter', 'фильтрация'),
+    ('enrich', 'обогащение адресов'),
+    ('render', 'вывод записей'),
+    ('stats', 'статистика'),
+    ('export', 'экспорт'),
+]
+
+class StageProfiler:
+    """
+    Таймеры и счётчики этапов для --profile
+    Разбор и фильтры замеряются обёртками, которые install() подставляет
+    вместо функций модуля, поэтому без --profile горячий путь не меняется.
+    Время чтения - остаток времени итератора записей за вычетом разбора и фильтров.
+    При --workers разбор идёт в других процессах, а при --mmap быстрый путь
+    выполняется прямо в байтах - в этих режимах он входит в чтение.
+    С --cache записи выдаёт колоночный кеш: cache_rows - записей в нём,
+    cache_built - кеш построен в этом запуске (разбор входит в этап кеша)
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.seconds = collections.Counter()
+        self.calls = collections.Counter()
+        self.counters = _new_parse_counters()
+        self.entries = 0
+        self.exporter = None
+        self.cache_rows = None
+        self.cache_built = False
+        self.started = time.perf_counter()
+        self._cprofile = None
+        if args.cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def install(self):
+        """Подставляет замеряющие обёртки разбора и фильтров вместо функций в модулях, которые их вызывают"""
+        parse_line = parser.parse_suricata_log_line_ex
+        seconds, calls, perf_counter = self.seconds, self.calls, time.perf_counter
+        
+        def profiled_parse(line):
+            started = perf_counter()
+            entry, path = parse_line(line)
+            stage = f'parse_{path or "error"}'
+            seconds[stage] += perf_counter() - started
+            calls[stage] += 1
+            return entry, path
+        
+        matches = self.timed('filter', reader.entry_matches_filters)
+        for module in (parser, reader):
+            module.parse_suricata_log_line_ex = profiled_parse
+        for module in (reader, store):
+            module.entry_matches_filters = matches
+
+    def timed(self, stage, function):
+        """Оборачивает функцию: время её вызовов добавляется к этапу stage"""
+        seconds, calls, perf_counter = self.seconds, self.calls, time.perf_counter
+        
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds[stage] += perf_counter() - started
+                calls[stage] += 1
+        return wrapper
+
+    def iterate(self, entries):
+        """Выдаёт записи итератора, замеряя время получения каждой"""
+        perf_counter = time.perf_counter
+        iterator = iter(entries)
+        while True:
+            started = perf_counter()
+            try:
+                entry = next(iterator)
+            except StopIteration:
+                self.seconds['read'] += perf_counter() - started
+                return
+            self.seconds['read'] += perf_counter() - started
+            self.calls['read'] += 1
+            self.entries += 1
+            yield entry
+
+    def _mode(self):
+        """Режим чтения, которым разбирался файл"""
+        if self.cache_rows is not None:
+            return 'cache-build' if self.cache_built else 'cache'
+        if self.args.sources:
+            return 'sources'
+        if self.args.follow:
+            return 'follow'
+        if resolve_workers(self.args) > 1 and _is_ascii_compatible(self.args.encoding):
+            return 'parallel'
+        if self.args.mmap and _is_ascii_compatible(self.args.encoding):
+            return 'mmap'
+        return 'sequential'
+
+    def report(self):
+        """Собирает итог профиля в словарь (для вывода и JSON)"""
+        total = time.perf_counter() - self.started
+        seconds = dict(self.seconds)
+        # Разбор и фильтры выполняются внутри итератора записей (или построения кеша)
+        nested = sum(value for stage, value in seconds.items() if stage.startswith('parse_') or stage == 'filter')
+        outer = 'cache' if self.cache_built else 'read'
+        seconds[outer] = max(seconds.get(outer, 0.0) - nested, 0.0)
+        
+        bytes_written = file_bytes = 0
+        if self.exporter is not None:
+            bytes_written = self.exporter.bytes_written
+            if bytes_written and os.path.exists(self.exporter.filename):
+                file_bytes = os.path.getsize(self.exporter.filename)
+        
+        counters = self.counters
+        parsed = counters[PARSE_PATH_FAST] + counters[PARSE_PATH_REGEX] + counters[PARSE_PATH_ALT]
+        # Из прочитанного кеша фильтры отбирают его записи, а не разобранные строки
+        candidates = self.cache_rows if self.cache_rows is not None and not self.cache_built else parsed
+        return {
+            'input': self.args.input,
+            'mode': self._mode(),
+            'total_seconds': round(total, 6),
+            'stages': {
+                stage: {'seconds': round(seconds.get(stage, 0.0), 6), 'calls': self.calls.get(stage, 0)}
+                for stage, _ in PROFILE_STAGES
+            },
+            'counters': {
+                'lines_read': parsed + counters['errors'] + counters[PARSE_PATH_SKIPPED],
+                'prefiltered': counters[PARSE_PATH_SKIPPED],
+                'fast_path': counters[PARSE_PATH_FAST],
+                'regex_fallback': counters[PARSE_PATH_REGEX],
+                'alt_fallback': counters[PARSE_PATH_ALT],
+                'parse_errors': counters['errors'],
+                'filtered_out': max(candidates - self.entries, 0),
+                'entries': self.entries,
+                'cache_rows': self.cache_rows,
+                'bytes_written': bytes_written,
+                'file_bytes': file_bytes,
+            },
+        }
+
+    def finish(self):
+        """Останавливает профилирование и выводит/сохраняет результат"""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            try:
+                self._cprofile.dump_stats(self.args.cprofile)
+            except OSError as e:
+                print(f"{Fore.RED}❌ Ошибка при сохранении профиля cProfile: {e}", file=sys.stderr)
+        
+        report = self.report()
+        if self.args.profile_json:
+            import json
+            try:
+                with open(self.args.profile_json, 'w', encoding='utf-8') as profile_file:
+                    json.dump(report, profile_file, indent=2, ensure_ascii=False)
+            except OSError as e:
+                print(f"{Fore.RED}❌ Ошибка при сохранении профиля: {e}", file=sys.stderr)
+        if self.args.profile:
+            print_profile(report, self.args, self._cprofile is not None)
+
+def print_profile(report, args, cprofile=False):
+    """Выводит итог --profile в stderr"""
+    total = report['total_seconds'] or 1e-9
+    out = sys.stderr
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}⏱ Профиль выполнения ({report['mode']}): {report['total_seconds']:.3f} с", file=out)
+    print(f"  {'Этап':<34} {'Время, с':>10} {'Доля':>7} {'Вызовов':>10}", file=out)
+    for stage, title in PROFILE_STAGES:
+        timing = report['stages'][stage]
+        if not timing['seconds'] and not timing['calls']:
+            continue
+        print(f"  {title:<34} {timing['seconds']:>10.3f} {timing['seconds'] / total:>7.1%} {timing['calls']:>10}", file=out)
+    
+    counters = report['counters']
+    print(f"  Строк прочитано: {counters['lines_read']}, быстрый путь: {counters['fast_path']}, "
+          f"regex: {counters['regex_fallback']}, альтернативный: {counters['alt_fallback']}", file=out)
+    print(f"  Ошибок разбора: {counters['parse_errors']}, отсеяно до разбора: {counters['prefiltered']}, "
+          f"отсеяно фильтрами: {counters['filtered_out']}, записей: {counters['entries']}", file=out)
+    if counters['cache_rows'] is not None:
+        print(f"  Записей в кеше: {counters['cache_rows']}, выдано из кеша: {counters['entries']}", file=out)
+    if counters['bytes_written']:
+        print(f"  Записано байт: {counters['bytes_written']} (файл: {counters['file_bytes']})", file=out)
+    if args.profile_json:
+        print(f"  Профиль сохранён в '{args.profile_json}'", file=out)
+    if cprofile:
+        print(f"  Дамп cProfile: '{args.cprofile}' (python -m pstats {args.cprofile})", file=out)
@@ -0,0 +1,724 @@
+"""
+Потоковое чтение лога: последовательно, через mmap, параллельно (--workers),
+бесконечно (--follow), по диапазонам индекса и из нескольких файлов (--sources)
+"""
+
+import os
+import re
+import sys
+import argparse
+import mmap
+import time
+import codecs
+import itertools
+import glob
+import queue
+import threading
+import collections
+import contextlib
+
+from .colors import Fore
+from .parser import (
+    PARSE_PATH_FAST, PARSE_PATH_REGEX, PARSE_PATH_ALT, PARSE_PATH_SKIPPED,
+    parse_suricata_log_line_ex, iter_buffer_lines,
+)
+from .filters import entry_matches_filters, line_prefilter
+from .compression import detect_input_compression, open_input_stream, input_decompression_errors
+from .state import remember_file
+
+# Размер блока файла для параллельного парсинга (байт)
+PARALLEL_CHUNK_SIZE = 4 * 1024 * 1024
+
+def _new_parse_counters():
+    """Счётчики разбора: неразобранные строки, пути разбора и строки, отсеянные до разбора"""
+    return {'errors': 0, PARSE_PATH_FAST: 0, PARSE_PATH_REGEX: 0, PARSE_PATH_ALT: 0, PARSE_PATH_SKIPPED: 0}
+
+def _filter_args(args):
+    """Оставляет в args только поля, нужные фильтрам (для передачи в процессы)"""
+    return argparse.Namespace(
+        filter=args.filter, priority=args.priority,
+        src=args.src, dst=args.dst, sid=args.sid, since=args.since, until=args.until,
+        where=getattr(args, 'where', None)
+    )
+
+def _is_ascii_compatible(encoding):
+    """Можно ли искать переводы строк и разделители прямо в байтах этой кодировки"""
+    try:
+        return '\n[**]'.encode(encoding) == b'\n[**]'
+    except (LookupError, UnicodeError):
+        return False
+
+def resolve_workers(args):
+    """Число процессов для парсинга: --workers 0 означает все ядра"""
+    workers = getattr(args, 'workers', 1) or os.cpu_count() or 1
+    return max(1, workers)
+
+def _parse_and_filter(line, line_num, args, counters, prefilter=None):
+    """
+    Разбирает одну (уже очищенную) строку, обновляет счётчики разбора
+    Возвращает запись, если она прошла фильтры, иначе None
+    prefilter (line_prefilter) отсеивает строку без разбора
+    """
+    if prefilter is not None and not prefilter.match_text(line):
+        counters[PARSE_PATH_SKIPPED] += 1
+        return None
+    entry, path = parse_suricata_log_line_ex(line)
+    if entry:
+        counters[path] += 1
+        
+        # Применяем фильтры
+        if entry_matches_filters(entry, args):
+            return entry
+    else:
+        counters['errors'] += 1
+        if args.verbose:
+            print(f"{Fore.YELLOW}⚠ Не удалось разобрать строку {line_num + 1}")
+            print(f"   Содержимое: {line[:100]}...")
+    return None
+
+def _iter_file_sequential(filename, args, counters, start=0, progress=None):
+    """
+    Последовательно парсит файл, выдаёт записи, прошедшие фильтры
+    Со start или progress файл читается в байтах с этого смещения; с progress
+    незавершённая последняя строка не разбирается, а progress['offset'] - конец
+    последней учтённой строки
+    """
+    prefilter = line_prefilter(args)
+    if progress is None and not start:
+        with open(filename, 'r', encoding=args.encoding) as file:
+            for line_num, line in enumerate(file):
+                line = line.strip()
+                if line:
+                    entry = _parse_and_filter(line, line_num, args, counters, prefilter)
+                    if entry is not None:
+                        yield entry
+        return
+    
+    with open(filename, 'rb') as file:
+        if progress is not None:
+            remember_file(file, progress)
+        file.seek(start)
+        offset = start
+        for line_num, raw in enumerate(file):
+            if progress is not None:
+                if not raw.endswith(b'\n'):
+                    # Строка ещё дописывается - разберём её при следующем запуске
+                    break
+                offset += len(raw)
+                progress['offset'] = offset
+            line = raw.decode(args.encoding).strip()
+            if line:
+                entry = _parse_and_filter(line, line_num, args, counters, prefilter)
+                if entry is not None:
+                    yield entry
+
+def _complete_lines_end(file, start, size):
+    """Смещение сразу за последним переводом строки в [start, size) (или start)"""
+    block = 64 * 1024
+    end = size
+    while end > start:
+        begin = max(start, end - block)
+        file.seek(begin)
+        position = file.read(end - begin).rfind(b'\n')
+        if position >= 0:
+            return begin + position + 1
+        end = begin
+    return start
+
+def _iter_file_mmap(filename, args, counters, start=0, progress=None):
+    """Последовательно разбирает файл через mmap без построчного декодирования"""
+    with open(filename, 'rb') as file:
+        if progress is not None:
+            remember_file(file, progress)
+        size = os.fstat(file.fileno()).st_size
+        end = size if progress is None else _complete_lines_end(file, start, size)
+        if end <= start:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            lines = iter_buffer_lines(buffer, start, end, args.encoding, line_prefilter(args))
+            for line_num, entry, path, line, next_pos in lines:
+                if progress is not None:
+                    progress['offset'] = min(next_pos, end)
+                if entry:
+                    counters[path] += 1
+                    
+                    # Применяем фильтры
+                    if entry_matches_filters(entry, args):
+                        yield entry
+                elif path == PARSE_PATH_SKIPPED:
+                    counters[path] += 1
+                else:
+                    counters['errors'] += 1
+                    if args.verbose:
+                        print(f"{Fore.YELLOW}⚠ Не удалось разобрать строку {line_num + 1}")
+                        print(f"   Содержимое: {line[:100]}...")
+            if progress is not None:
+                progress['offset'] = end
+
+# Размер порции чтения в режиме --follow (байт)
+FOLLOW_READ_SIZE = 64 * 1024
+
+def _file_identity(stat_result):
+    """Идентификатор файла для обнаружения ротации (устройство и inode)"""
+    return stat_result.st_dev, stat_result.st_ino
+
+def _iter_file_follow(filename, args, counters, start=None, progress=None):
+    """
+    Следит за файлом как tail -F: читает только новые байты, переживает ротацию
+    (файл переименован и создан заново) и усечение. Начинает со смещения start,
+    по умолчанию - с конца файла. Генератор бесконечен - завершение по лимиту или Ctrl+C
+    Для ASCII-совместимых кодировок строки режутся в байтах и progress['offset']
+    отслеживает конец последней учтённой строки
+    """
+    poll_interval = getattr(args, 'poll_interval', 0.1)
+    # Для кодировок вроде UTF-16 переводы строк ищутся после декодирования
+    decoder = None
+    if not _is_ascii_compatible(args.encoding):
+        decoder = codecs.getincrementaldecoder(args.encoding)(errors='replace')
+    line_num = 0
+    prefilter = line_prefilter(args)
+    pending = b'' if decoder is None else ''
+    file = open(filename, 'rb')
+    try:
+        if progress is not None:
+            remember_file(file, progress)
+        offset = file.seek(0, os.SEEK_END) if start is None else file.seek(start)
+        while True:
+            data = file.read(FOLLOW_READ_SIZE)
+            reopen = False
+            if not data:
+                # Новых данных нет: проверяем ротацию и усечение
+                try:
+                    current = os.stat(filename)
+                except FileNotFoundError:
+                    current = None
+                if current is not None and _file_identity(current) != _file_identity(os.fstat(file.fileno())):
+                    # Дочитываем старый файл и переходим к новому
+                    data = file.read()
+                    reopen = True
+                elif os.fstat(file.fileno()).st_size < file.tell():
+                    offset = file.seek(0)
+                    if progress is not None:
+                        remember_file(file, progress)
+                    pending = pending[:0]
+                    if decoder is not None:
+                        decoder.reset()
+                    continue
+                else:
+                    time.sleep(poll_interval)
+                    continue
+            
+            # Режем новые данные на строки; незавершённая строка ждёт продолжения,
+            # а при ротации больше не допишется и считается завершённой
+            if decoder is None:
+                raw_lines = (pending + data + (b'\n' if reopen else b'')).split(b'\n')
+                pending = raw_lines.pop()
+                lines = [(raw.decode(args.encoding, errors='replace'), len(raw) + 1) for raw in raw_lines]
+            else:
+                text = pending + decoder.decode(data, final=reopen) + ('\n' if reopen else '')
+                text_lines = text.replace('\r\n', '\n').split('\n')
+                pending = text_lines.pop()
+                lines = [(line, None) for line in text_lines]
+            
+            for line, size in lines:
+                if size is not None:
+                    offset += size
+                    if progress is not None:
+                        progress['offset'] = offset
+                line = line.strip()
+                if line:
+                    entry = _parse_and_filter(line, line_num, args, counters, prefilter)
+                    if entry is not None:
+                        yield entry
+                line_num += 1
+            
+            if reopen:
+                file.close()
+                file = open(filename, 'rb')
+                offset = 0
+                if progress is not None:
+                    progress['offset'] = 0
+                    remember_file(file, progress)
+                pending = pending[:0]
+                if decoder is not None:
+                    decoder.reset()
+                if args.verbose:
+                    print(f"{Fore.CYAN}🔄 Обнаружена ротация файла '{filename}', чтение нового файла")
+    finally:
+        file.close()
+
+def split_file_ranges(filename, chunk_size=PARALLEL_CHUNK_SIZE, start=0, end=None):
+    """Делит файл (или его часть [start, end)) на диапазоны байт, выровненные по концу строки"""
+    size = os.path.getsize(filename) if end is None else end
+    with open(filename, 'rb') as file:
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                # Дочитываем до конца строки, на которую попала граница
+                file.seek(end)
+                file.readline()
+                end = min(file.tell(), size)
+            yield start, end
+            start = end
+
+# Коды результата разбора строки в блоке (для точного объединения счётчиков)
+_LINE_EMPTY, _LINE_ERROR = 0, 1
+_PATH_CODES = {PARSE_PATH_FAST: 2, PARSE_PATH_REGEX: 3, PARSE_PATH_ALT: 4, PARSE_PATH_SKIPPED: 5}
+
+@contextlib.contextmanager
+def _read_chunk_lines(file, start, end, encoding, use_mmap, prefilter=None):
+    """
+    Готовит разбор диапазона [start, end) файла
+    Даёт (число строк, итератор в формате iter_buffer_lines); отображение
+    mmap закрывается при выходе из блока with, а не при сборке мусора
+    """
+    if use_mmap:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            line_count = buffer[start:end].count(b'\n')
+            if end > start and buffer[end - 1] != ord('\n'):
+                line_count += 1
+            lines = iter_buffer_lines(buffer, start, end, encoding, prefilter)
+            try:
+                yield line_count, lines
+            finally:
+                # Недочитанный итератор держит ссылки на буфер - mmap не закрылся бы
+                lines.close()
+        return
+    
+    file.seek(start)
+    text = file.read(end - start).decode(encoding)
+    # Те же правила разбиения строк, что и у файла в текстовом режиме
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    
+    def iter_lines():
+        for line_num, line in enumerate(lines):
+            line = line.strip()
+            if line:
+                if prefilter is not None and not prefilter.match_text(line):
+                    yield line_num, None, PARSE_PATH_SKIPPED, None, None
+                    continue
+                entry, path = parse_suricata_log_line_ex(line)
+                yield line_num, entry, path, line, None
+    
+    yield len(lines), iter_lines()
+
+def _parse_chunk(task):
+    """
+    Рабочая функция процесса: парсит диапазон байт файла
+    Возвращает (записи, номера их строк, ошибки, коды строк, число строк,
+    ошибка декодирования)
+    """
+    filename, start, end, encoding, filter_args, limit, collect_errors, use_mmap = task
+    entries = []
+    entry_lines = []
+    errors = {}
+    codes = bytearray()
+    
+    try:
+        with open(filename, 'rb') as file:
+            chunk = _read_chunk_lines(file, start, end, encoding, use_mmap, line_prefilter(filter_args))
+            with chunk as (line_count, lines):
+                for line_num, entry, path, line, _ in lines:
+                    # Пропущенные пустые строки получают код _LINE_EMPTY
+                    codes.extend(bytes(line_num + 1 - len(codes)))
+                    if entry:
+                        codes[line_num] = _PATH_CODES[path]
+                        if entry_matches_filters(entry, filter_args):
+                            entries.append(entry)
+                            entry_lines.append(line_num)
+                            # В блоке не нужно больше записей, чем общий лимит
+                            if limit > 0 and len(entries) >= limit:
+                                break
+                    elif path == PARSE_PATH_SKIPPED:
+                        codes[line_num] = _PATH_CODES[path]
+                    else:
+                        codes[line_num] = _LINE_ERROR
+                        if collect_errors:
+                            errors[line_num] = line[:100]
+    except UnicodeDecodeError as e:
+        return [], [], {}, b'', 0, str(e)
+    
+    return entries, entry_lines, errors, bytes(codes), line_count, None
+
+def _iter_file_parallel(filename, args, counters, workers, start=0, progress=None):
+    """
+    Парсит файл в пуле процессов по блокам, выровненным по строкам
+    Результаты блоков объединяются в исходном порядке; в работе одновременно
+    не больше 2 * workers блоков, поэтому память остаётся ограниченной
+    С progress разбираются только завершённые строки начиная со start, а
+    progress['offset'] выставляется после разбора всех блоков
+    """
+    # Пул процессов нужен только этому режиму - модуль загружается здесь
+    import multiprocessing
+    
+    filter_args = _filter_args(args)
+    use_mmap = getattr(args, 'mmap', False)
+    end = None
+    identity = None
+    if progress is not None:
+        with open(filename, 'rb') as file:
+            remember_file(file, progress)
+            identity = _file_identity(os.fstat(file.fileno()))
+            end = _complete_lines_end(file, start, os.fstat(file.fileno()).st_size)
+    tasks = (
+        (filename, chunk_start, chunk_end, args.encoding, filter_args, args.limit, args.verbose, use_mmap)
+        for chunk_start, chunk_end in split_file_ranges(filename, PARALLEL_CHUNK_SIZE, start, end)
+    )
+    
+    line_offset = 0
+    remaining = args.limit
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        for task in itertools.islice(tasks, workers * 2):
+            pending.append(pool.apply_async(_parse_chunk, (task,)))
+        
+        while pending:
+            entries, entry_lines, errors, codes, line_count, decode_error = pending.popleft().get()
+            for task in itertools.islice(tasks, 1):
+                pending.append(pool.apply_async(_parse_chunk, (task,)))
+            
+            if decode_error is not None:
+                raise UnicodeDecodeError(args.encoding, b'', 0, 1, decode_error)
+            
+            # При достижении лимита учитываем строки только до последней нужной записи
+            if args.limit > 0 and len(entries) >= remaining:
+                del entries[remaining:]
+                codes = codes[:entry_lines[remaining - 1] + 1]
+            
+            counters['errors'] += codes.count(_LINE_ERROR)
+            for path, code in _PATH_CODES.items():
+                counters[path] += codes.count(code)
+            for line_num in sorted(errors):
+                if line_num < len(codes):
+                    print(f"{Fore.YELLOW}⚠ Не удалось разобрать строку {line_offset + line_num + 1}")
+                    print(f"   Содержимое: {errors[line_num]}...")
+            line_offset += line_count
+            remaining -= len(entries)
+            
+            yield from entries
+    
+    if progress is not None and end is not None:
+        # Блоки процессы открывали по имени: если файл подменили, смещение
+        # уже не относится к запомненному файлу и сохранять его нельзя
+        try:
+            rotated = _file_identity(os.stat(filename)) != identity
+        except FileNotFoundError:
+            rotated = True
+        if rotated:
+            raise OSError(f"файл '{filename}' ротирован во время разбора")
+        progress['offset'] = end
+
+# Многосенсорный режим --sources: чтение файлов потоками, разбор пулом процессов
+SOURCE_READ_SIZE = 1024 * 1024
+SOURCE_READERS = 8
+SOURCE_QUEUE_SIZE = 32
+# Как часто разбор, ожидая блок, проверяет, живы ли потоки чтения (секунды)
+SOURCE_POLL_INTERVAL = 0.5
+
+# Файлы, которые берутся из каталога: fast.log и ротированные fast.log.1, fast.log.2.gz
+SOURCE_FILE_PATTERN = re.compile(r'.*fast\.log(\.\d+)?(\.(gz|bz2|xz|zst))?$')
+
+# Поля источника, добавляемые к записи в режиме --sources
+SOURCE_FIELDS = ['sensor', 'source']
+
+def discover_sources(patterns):
+    """
+    Список файлов по маскам и каталогам --sources (без повторов, по порядку)
+    Из каталога берутся fast.log и его ротированные копии, включая .gz
+    """
+    files = []
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(
+                    os.path.join(directory, name)
+                    for directory, _, names in sorted(os.walk(path))
+                    for name in sorted(names) if SOURCE_FILE_PATTERN.match(name)
+                )
+            elif os.path.isfile(path):
+                files.append(path)
+    return list(dict.fromkeys(os.path.normpath(path) for path in files))
+
+def sensor_names(files):
+    """
+    Имя сенсора для каждого файла: каталог относительно общего каталога всех файлов
+    (sensors/s01/fast.log -> s01), а если все файлы в одном каталоге - имя файла
+    без суффиксов ротации (s01-fast.log.2.gz -> s01-fast.log)
+    """
+    directories = [os.path.dirname(os.path.abspath(path)) for path in files]
+    common = os.path.commonpath(directories) if directories else ''
+    names = {}
+    for path, directory in zip(files, directories):
+        if directory != common:
+            names[path] = os.path.relpath(directory, common)
+        else:
+            names[path] = re.sub(r'(\.\d+)?(\.(gz|bz2|xz|zst))?$', '', os.path.basename(path))
+    return names
+
+def _read_source(source_id, path, out_queue, stop):
+    """
+    Поток чтения одного файла: кладёт в очередь блоки целых строк (байты),
+    в конце - None, при любой ошибке чтения - исключение. Маркер конца
+    кладётся всегда, иначе разбор ждал бы этот источник бесконечно
+    Сжатые файлы (gzip/bz2/xz/zstd) распаковываются здесь же: чтение и
+    распаковка идут вне GIL и перекрываются с разбором
+    """
+    def put(item):
+        # Ждём места в очереди, пока разбор не остановлен
+        while not stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    outcome = None
+    compression = None
+    try:
+        compression = detect_input_compression(path)
+        with open_input_stream(path, compression) as file:
+            tail = b''
+            while True:
+                data = file.read(SOURCE_READ_SIZE)
+                if not data:
+                    break
+                data = tail + data
+                cut = data.rfind(b'\n') + 1
+                tail = data[cut:]
+                if cut and not put((source_id, data[:cut])):
+                    return
+            if tail and not put((source_id, tail)):
+                return
+    except input_decompression_errors() as e:
+        # zlib.error, lzma.LZMAError и т.п. - с понятным сообщением, как ошибка чтения
+        outcome = OSError(f"сжатый файл ({compression}) повреждён или обрезан: {e}")
+    except Exception as e:
+        outcome = e
+    finally:
+        # После остановки разбора (stop) put ничего не ждёт и не кладёт
+        put((source_id, outcome))
+
+def _parse_source_block(task):
+    """
+    Разбирает блок строк источника (в процессе пула или на месте)
+    Записи помечаются сенсором и файлом (если сенсор не None) до фильтров,
+    чтобы по сенсору можно было фильтровать (--where)
+    Возвращает (записи, счётчики разбора, неразобранные строки, ошибка декодирования)
+    """
+    data, encoding, filter_args, collect_errors, path, sensor = task
+    counters = _new_parse_counters()
+    entries = []
+    errors = []
+    try:
+        text = data.decode(encoding)
+    except UnicodeDecodeError as e:
+        return [], counters, [], str(e)
+    
+    prefilter = line_prefilter(filter_args)
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if prefilter is not None and not prefilter.match_text(line):
+            counters[PARSE_PATH_SKIPPED] += 1
+            continue
+        entry, parse_path = parse_suricata_log_line_ex(line)
+        if entry:
+            counters[parse_path] += 1
+            if sensor is not None:
+                entry['sensor'] = sensor
+                entry['source'] = path
+            if entry_matches_filters(entry, filter_args):
+                entries.append(entry)
+        else:
+            counters['errors'] += 1
+            if collect_errors:
+                errors.append(line[:100])
+    return entries, counters, errors, None
+
+def _iter_sources(sources, args, counters, workers, strict=False):
+    """
+    Выдаёт записи всех источников, помеченные сенсором и файлом (если сенсор
+    не None; так разбирается и одиночный сжатый файл)
+    Файлы читаются пулом потоков (до SOURCE_READERS одновременно) через
+    ограниченную очередь, блоки разбираются на месте или в пуле из workers
+    процессов (в работе не больше 2 * workers блоков). Записи разных файлов
+    перемешиваются в порядке готовности, внутри файла порядок сохраняется
+    strict - ошибка чтения прерывает разбор, а не пропускает источник
+    """
+    import multiprocessing
+    import concurrent.futures
+    
+    filter_args = _filter_args(args)
+    blocks = queue.Queue(SOURCE_QUEUE_SIZE)
+    stop = threading.Event()
+    readers = concurrent.futures.ThreadPoolExecutor(min(SOURCE_READERS, len(sources)))
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    futures = [readers.submit(_read_source, source_id, path, blocks, stop)
+               for source_id, (path, _) in enumerate(sources)]
+    
+    def next_block():
+        """Следующий блок очереди; если очередь пуста, а все потоки чтения
+        завершились, маркер конца потерян - ошибка вместо вечного ожидания"""
+        while True:
+            try:
+                return blocks.get(timeout=SOURCE_POLL_INTERVAL)
+            except queue.Empty:
+                if all(future.done() for future in futures) and blocks.empty():
+                    errors = [future.exception() for future in futures if future.exception() is not None]
+                    raise errors[0] if errors else RuntimeError("потоки чтения завершились без маркера конца")
+    
+    def results():
+        """Результаты разбора блоков в порядке поступления из очереди"""
+        active = len(sources)
+        pending = collections.deque()
+        while active or pending:
+            # Берём новые блоки, пока не заполнен пул (или разбираем на месте)
+            while active and (pool is None and not pending or pool is not None and len(pending) < workers * 2):
+                source_id, data = next_block()
+                if data is None or isinstance(data, Exception):
+                    active -= 1
+                    if isinstance(data, Exception):
+                        if strict:
+                            raise data
+                        print(f"{Fore.YELLOW}⚠ Источник '{sources[source_id][0]}' пропущен: {data}")
+                    continue
+                task = (data, args.encoding, filter_args, args.verbose) + sources[source_id]
+                if pool is None:
+                    pending.append((source_id, _parse_source_block(task)))
+                else:
+                    pending.append((source_id, pool.apply_async(_parse_source_block, (task,))))
+            if pending:
+                source_id, result = pending.popleft()
+                yield source_id, result if pool is None else result.get()
+    
+    try:
+        for source_id, (entries, block_counters, errors, decode_error) in results():
+            if decode_error is not None:
+                raise UnicodeDecodeError(args.encoding, b'', 0, 1, decode_error)
+            for key, value in block_counters.items():
+                counters[key] += value
+            path = sources[source_id][0]
+            for line in errors:
+                print(f"{Fore.YELLOW}⚠ Не удалось разобрать строку в '{path}'")
+                print(f"   Содержимое: {line}...")
+            yield from entries
+    finally:
+        # Остановка (конец, --limit или ошибка): потоки чтения выходят по stop
+        stop.set()
+        readers.shutdown(wait=True)
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+def _iter_file_ranges(filename, args, counters, ranges):
+    """Разбирает только заданные диапазоны байт файла (для запросов по индексу)"""
+    prefilter = line_prefilter(args)
+    with open(filename, 'rb') as file:
+        line_num = 0
+        for start, end in ranges:
+            file.seek(start)
+            for raw in file.read(end - start).splitlines():
+                line = raw.decode(args.encoding).strip()
+                if line:
+                    entry = _parse_and_filter(line, line_num, args, counters, prefilter)
+                    if entry is not None:
+                        yield entry
+                line_num += 1
+
+def read_log_entries(filename, args, start=None, progress=None, counters=None, ranges=None, sources=None,
+                     strict=False):
+    """
+    Записи лога, прошедшие фильтры (параметры - как у iter_log_entries)
+    Ошибки чтения не перехватываются: FileNotFoundError, UnicodeDecodeError
+    и другие исключения получает вызывающий код
+    strict - с sources ошибка чтения файла прерывает разбор, а не пропускает его
+    """
+    if counters is None:
+        counters = _new_parse_counters()
+    matched = 0
+    workers = resolve_workers(args)
+    
+    byte_level = _is_ascii_compatible(args.encoding)
+    # Точное смещение при остановке по лимиту знает только последовательное чтение
+    exact_stop = progress is not None and args.limit > 0
+    compression = None
+    if sources is None and ranges is None and not getattr(args, 'follow', False):
+        compression = detect_input_compression(filename)
+    if sources is not None:
+        source = _iter_sources(sources, args, counters, workers, strict)
+    elif compression is not None:
+        source = _iter_sources([(filename, None)], args, counters, workers, strict=True)
+    elif ranges is not None:
+        source = _iter_file_ranges(filename, args, counters, ranges)
+    elif getattr(args, 'follow', False):
+        source = _iter_file_follow(filename, args, counters, start, progress)
+    elif workers > 1 and byte_level and not exact_stop:
+        source = _iter_file_parallel(filename, args, counters, workers, start or 0, progress)
+    elif getattr(args, 'mmap', False) and byte_level:
+        source = _iter_file_mmap(filename, args, counters, start or 0, progress)
+    else:
+        source = _iter_file_sequential(filename, args, counters, start or 0, progress)
+    
+    for entry in source:
+        matched += 1
+        yield entry
+        
+        # Ограничение количества записей
+        if args.limit > 0 and matched >= args.limit:
+            if args.verbose:
+                print(f"{Fore.YELLOW}Достигнут лимит записей: {args.limit}")
+            break
+    source.close()
+
+def iter_log_entries(filename, args, start=None, progress=None, counters=None, ranges=None, sources=None):
+    """
+    Потоково парсит файл лога и по одной выдаёт записи, прошедшие фильтры
+    Память не зависит от размера файла: записи не накапливаются
+    С --workers N файл разбирается параллельно, порядок записей сохраняется
+    С --mmap строки разбираются прямо в отображённом в память буфере
+    С --follow файл читается бесконечно по мере появления новых строк
+    start - смещение в байтах, с которого начинать чтение (для --state);
+    в словарь progress записывается смещение 'offset' сразу за последней
+    учтённой строкой, чтобы следующий запуск продолжил с этого места
+    counters - словарь счётчиков разбора (_new_parse_counters), который
+    нужно заполнить, например для --profile
+    ranges - список диапазонов байт [начало, конец): разбираются только они
+    (запрос по индексу --index)
+    sources - список пар (файл, сенсор) для --sources: разбираются все файлы,
+    filename тогда служит только подписью в сообщениях
+    Сжатый файл (gzip/bz2/xz/zstd, определяется по сигнатуре) распаковывается
+    потоком в отдельном потоке параллельно с разбором, без временных файлов
+    Ошибки чтения выводятся, и программа завершается с кодом 1
+    """
+    if counters is None:
+        counters = _new_parse_counters()
+    
+    try:
+        yield from read_log_entries(filename, args, start, progress, counters, ranges, sources)
+    except FileNotFoundError:
+        print(f"{Fore.RED}❌ Ошибка: Файл '{filename}' не найден!")
+        print(f"   Проверьте путь или используйте опцию -i для указания файла")
+        sys.exit(1)
+    except UnicodeDecodeError:
+        print(f"{Fore.RED}❌ Ошибка кодировки: Файл '{filename}' имеет неверную кодировку!")
+        print(f"   Попробуйте указать кодировку через опцию --encoding")
+        sys.exit(1)
+    except Exception as e:
+        print(f"{Fore.RED}❌ Ошибка при чтении файла: {e}")
+        sys.exit(1)
+    
+    if counters['errors'] > 0 and args.verbose:
+        print(f"{Fore.YELLOW}⚠ Всего неразобранных строк: {counters['errors']}")
+    
+    if args.verbose:
+        print(f"{Fore.CYAN}Пути разбора: быстрый {counters[PARSE_PATH_FAST]}, "
+              f"regex {counters[PARSE_PATH_REGEX]}, "
+              f"альтернативный {counters[PARSE_PATH_ALT]}, "
+              f"отсеяно до разбора {counters[PARSE_PATH_SKIPPED]}")
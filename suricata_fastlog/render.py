@@ -0,0 +1,334 @@
+"""
+Цветной вывод записей и статистики в терминал
+"""
+
+import sys
+
+from . import indicators, enrich
+from .colors import Fore, Back, Style
+from .parser import format_timestamp
+from .stats import LogStatistics
+
+def get_priority_color(priority, quiet=False):
+    """Возвращает цвет для приоритета"""
+    if quiet:
+        return ""
+    
+    if priority == 1:
+        return Fore.RED + Style.BRIGHT
+    elif priority == 2:
+        return Fore.YELLOW + Style.BRIGHT
+    elif priority == 3:
+        return Fore.CYAN
+    else:
+        return Fore.WHITE
+
+# Цвета категорий классификации в порядке приоритета
+CLASSIFICATION_COLORS = [
+    ('trojan', Fore.RED + Style.BRIGHT),
+    ('malware', Fore.MAGENTA + Style.BRIGHT),
+    ('exploit', Fore.YELLOW + Style.BRIGHT),
+    ('attack', Fore.RED),
+    ('scan', Fore.BLUE + Style.BRIGHT),
+]
+
+def get_classification_color(classification, quiet=False):
+    """Возвращает цвет для классификации"""
+    if quiet:
+        return ""
+    
+    categories = indicators.INDICATORS.classification.match(classification)
+    for category, color in CLASSIFICATION_COLORS:
+        if category in categories:
+            return color
+    return Fore.WHITE
+
+def format_log_entry(entry, index, args, color=None):
+    """
+    Текст записи лога с цветовой разметкой (как print_colored_log_entry)
+    color=False - без кодов цвета (вывод не в терминал: colorama всё равно
+    их вырезает, а так не тратится время). Каждая строка завершается сбросом
+    цвета: при выводе одним блоком так сохраняется поведение autoreset,
+    которое colorama применяет к каждому print
+    """
+    if color is None:
+        color = not args.quiet
+    reset = Style.RESET_ALL if color else ''
+    bright = Style.BRIGHT if color else ''
+    white = Fore.WHITE if color else ''
+    cyan = Fore.CYAN if color else ''
+    
+    lines = [
+        '' if args.quiet else f"\n{cyan}{'='*80}",
+        f"{cyan}Запись #{index + 1}",
+        '=' * 80,
+        # Дата и время
+        f"{Fore.GREEN if color else ''}Время: {bright}{format_timestamp(entry['timestamp'])}",
+    ]
+    
+    # Схлопнутые повторы (--coalesce)
+    if entry.get('count', 1) > 1:
+        lines.append(f"{Fore.MAGENTA if color else ''}Повторов: {bright}{entry['count']}"
+                     f"{Style.NORMAL if color else ''} (последний: {format_timestamp(entry['last_seen'])})")
+    
+    lines += [
+        f"{Fore.YELLOW if color else ''}ID правила: {bright}{entry['rule_id']}",
+        f"{Fore.BLUE if color else ''}Описание: {bright}{entry['description']}",
+        # Классификация и приоритет с цветом
+        f"{white}Классификация: {get_classification_color(entry['classification'], not color)}{entry['classification']}",
+        f"{white}Приоритет: {get_priority_color(entry['priority'], not color)}{entry['priority']}",
+        f"{white}Протокол: {bright}{entry['protocol']}",
+        # Сетевые данные
+        f"{white}Источник: {cyan}{entry['src_ip']}:{entry['src_port']}",
+        f"{white}Назначение: {cyan}{entry['dst_ip']}:{entry['dst_port']}",
+    ]
+    
+    # Краткая оценка угрозы
+    if not args.quiet:
+        is_malware = 'malicious' in indicators.INDICATORS.description.match(entry['description'])
+        
+        if is_malware and entry['priority'] == 1:
+            lines.append(f"\n{Back.RED if color else ''}{white}{bright} ВНИМАНИЕ: Критическая угроза обнаружена! {reset}")
+        elif is_malware:
+            lines.append(f"\n{Back.YELLOW if color else ''}{Fore.BLACK if color else ''}{bright} Предупреждение: Вредоносная активность {reset}")
+    
+    lines.append(reset)
+    return f"{reset}\n".join(lines) + f"{reset}\n"
+
+def format_compact_entry(entry, index, args, color=None):
+    """Запись лога одной строкой (--compact)"""
+    if color is None:
+        color = not args.quiet
+    reset = Style.RESET_ALL if color else ''
+    cyan = Fore.CYAN if color else ''
+    repeats = f" x{entry['count']}" if entry.get('count', 1) > 1 else ''
+    return (
+        f"{cyan}#{index + 1}{reset} "
+        f"{Fore.GREEN if color else ''}{format_timestamp(entry['timestamp'])}{reset} "
+        f"{get_priority_color(entry['priority'], not color)}P{entry['priority']}{reset} "
+        f"{Fore.YELLOW if color else ''}[{entry['rule_id']}]{reset} {entry['description']} "
+        f"{get_classification_color(entry['classification'], not color)}({entry['classification']}){reset} "
+        f"{{{entry['protocol']}}} {cyan}{entry['src_ip']}:{entry['src_port']}{reset} -> "
+        f"{cyan}{entry['dst_ip']}:{entry['dst_port']}{reset}{repeats}\n"
+    )
+
+def print_colored_log_entry(entry, index, args):
+    """Выводит запись лога с цветовой разметкой"""
+    sys.stdout.write(format_log_entry(entry, index, args))
+
+# Сколько записей детального вывода собирается в один вызов write
+RENDER_BATCH_SIZE = 256
+
+class EntryRenderer:
+    """
+    Буферизованный детальный вывод: записи форматируются в строки и
+    пишутся в stdout пачками одним write, а не десятком print на запись
+    (с colorama autoreset каждый print - отдельная запись и сброс буфера).
+    Коды цвета формируются только для терминала. С --compact каждая запись -
+    одна строка. В режимах --follow и -v вывод не задерживается, чтобы записи
+    не отставали от остальных сообщений
+    """
+
+    def __init__(self, args, batch_size=RENDER_BATCH_SIZE):
+        self.args = args
+        self.format = format_compact_entry if getattr(args, 'compact', False) else format_log_entry
+        self.batch_size = 1 if args.follow or args.verbose else batch_size
+        self.color = not args.quiet and sys.stdout.isatty()
+        self._parts = []
+
+    def header(self, title):
+        """Заголовок раздела в буфер вывода"""
+        line = '=' * 80
+        if self.color:
+            self._parts.append(f"\n{Fore.CYAN}{Style.BRIGHT}{line}{Style.RESET_ALL}\n{title:^80}\n{line}\n")
+        else:
+            self._parts.append(f"\n{line}\n{title:^80}\n{line}\n")
+
+    def render(self, entry, index):
+        """Форматирует запись в буфер, при заполнении пачки - выводит"""
+        self._parts.append(self.format(entry, index, self.args, self.color))
+        if len(self._parts) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Выводит накопленный текст одним write"""
+        if self._parts:
+            text = ''.join(self._parts)
+            self._parts = []
+            self._stream().write(text)
+
+    def _stream(self):
+        """Поток вывода: текст без цвета идёт мимо обёртки colorama - вырезать в нём нечего"""
+        from colorama.ansitowin32 import StreamWrapper
+        if not self.color and isinstance(sys.stdout, StreamWrapper):
+            return sys.__stdout__
+        return sys.stdout
+
+# Заголовки статистики обогащения по видам таблиц
+ENRICH_TITLES = {'subnet': 'подсетям', 'asn': 'ASN', 'country': 'странам'}
+
+def format_ip(ip):
+    """Адрес с метками обогащения в скобках (без --enrich-* - как есть)"""
+    if enrich.ENRICHER is None:
+        return ip
+    labels = enrich.ENRICHER.describe(ip)
+    return f"{ip} ({labels})" if labels else ip
+
+def print_enrich_statistics(stats, args):
+    """Топ меток обогащения (подсети, ASN, страны): события по источнику и назначению"""
+    for kind, title in ENRICH_TITLES.items():
+        src_counts = stats.enrich_counts.get(f'src_{kind}')
+        dst_counts = stats.enrich_counts.get(f'dst_{kind}')
+        if src_counts is None:
+            continue
+        totals = src_counts + dst_counts
+        # Адреса вне таблицы считаются отдельно под меткой None
+        top = stats.top(totals)
+        # Метки обогащения в состоянии --sketch не хранятся
+        scope = ', только текущий вход' if stats.sketches is not None and stats.sketches.merged else ''
+        if not args.quiet:
+            print(f"\n{Fore.WHITE}Топ по {title} (события источник / назначение{scope}):")
+            for label, _ in top:
+                name = label if label is not None else 'нет в таблице'
+                print(f"  {Fore.CYAN}{name}{Fore.WHITE}: {src_counts[label]} / {dst_counts[label]} событий")
+        else:
+            print(f"\n{title.capitalize()} | Источник | Назначение{scope}")
+            print("-" * 40)
+            for label, _ in top:
+                print(f"{label if label is not None else '-'} | {src_counts[label]} | {dst_counts[label]}")
+
+def print_sketch_statistics(stats, args):
+    """Число уникальных значений и топы по приближённой статистике --sketch"""
+    sketches = stats.sketches
+    distinct = {name: sketch.estimate() for name, sketch in sketches.distinct.items()}
+    if args.quiet:
+        print(f"\nУникальных (оценка): источников {distinct['src']}, назначений {distinct['dst']}, "
+              f"сигнатур {distinct['sid']}")
+        return
+    
+    print(f"\n{Fore.WHITE}Уникальных значений (оценка HyperLogLog):")
+    print(f"  источников: ≈{distinct['src']}, назначений: ≈{distinct['dst']}, сигнатур: ≈{distinct['sid']}")
+    
+    # Топы Space-Saving: значение может быть завышено не больше чем на погрешность
+    for name, title in (('src', 'Топ источников по количеству событий'),
+                        ('dst', 'Топ назначений по количеству событий'),
+                        ('rule', 'Топ правил по количеству событий'),
+                        ('pair', 'Топ пар источник -> назначение')):
+        print(f"\n{Fore.WHITE}{title} (оценка):")
+        for key, count, error in sketches.top[name].top():
+            if name == 'rule':
+                label = f"[{key}]{Fore.WHITE} {stats.rule_descriptions.get(key, '')}"
+            else:
+                label = format_ip(key) if name in ('src', 'dst') else key
+            bound = f" (±{error})" if error else ''
+            print(f"  {Fore.YELLOW}{label}{Fore.WHITE}: {count}{bound} событий")
+
+def print_statistics(stats, args):
+    """Выводит статистику по записям (принимает LogStatistics или список записей)"""
+    if not isinstance(stats, LogStatistics):
+        stats = LogStatistics.from_entries(stats)
+    stats.flush()
+    
+    if not stats.total:
+        if not args.quiet:
+            print(f"{Fore.YELLOW}⚠ Нет данных для статистики")
+        return
+    
+    if not args.quiet:
+        print(f"\n{Fore.CYAN}{Style.BRIGHT}{'='*80}")
+        print(f"{'СТАТИСТИКА АНАЛИЗА':^80}")
+        print(f"{'='*80}")
+    
+    # Общая статистика
+    print(f"{Fore.WHITE if not args.quiet else ''}Всего записей: {Fore.GREEN if not args.quiet else ''}{stats.total}")
+    # С --sketch-merge итог, распределения и топы - по всем объединённым состояниям
+    merged = stats.sketches.merged if stats.sketches is not None else 0
+    if merged:
+        print(f"{Fore.WHITE if not args.quiet else ''}  в т.ч. текущий вход: {stats.total - stats.sketches.merged_total}, "
+              f"объединённые состояния ({merged}): {stats.sketches.merged_total}")
+    
+    # Статистика по приоритетам
+    priority_counts = stats.priority_counts
+    
+    if not args.quiet:
+        print(f"\n{Fore.WHITE}Распределение по приоритетам:")
+        for priority in sorted(priority_counts.keys()):
+            count = priority_counts[priority]
+            color = get_priority_color(priority, args.quiet)
+            print(f"  Приоритет {color}{priority}{Fore.WHITE if not args.quiet else ''}: {count} записей")
+    else:
+        print("\nПриоритет | Количество")
+        print("-" * 25)
+        for priority in sorted(priority_counts.keys()):
+            print(f"{priority:^9} | {priority_counts[priority]:^11}")
+    
+    # Статистика по протоколам
+    protocol_counts = stats.protocol_counts
+    
+    if not args.quiet:
+        print(f"\n{Fore.WHITE}Распределение по протоколам:")
+        for protocol in sorted(protocol_counts.keys()):
+            count = protocol_counts[protocol]
+            print(f"  {Fore.CYAN if not args.quiet else ''}{protocol}{Fore.WHITE if not args.quiet else ''}: {count} записей")
+    else:
+        print("\nПротокол | Количество")
+        print("-" * 25)
+        for protocol in sorted(protocol_counts.keys()):
+            print(f"{protocol:^8} | {protocol_counts[protocol]:^11}")
+    
+    # Статистика по сенсорам (--sources)
+    sensor_counts = stats.sensor_counts
+    
+    if sensor_counts:
+        if not args.quiet:
+            print(f"\n{Fore.WHITE}Распределение по сенсорам:")
+            for sensor in sorted(sensor_counts.keys()):
+                print(f"  {Fore.CYAN}{sensor}{Fore.WHITE}: {sensor_counts[sensor]} записей")
+        else:
+            print("\nСенсор | Количество")
+            print("-" * 25)
+            for sensor in sorted(sensor_counts.keys()):
+                print(f"{sensor} | {sensor_counts[sensor]}")
+    
+    # Статистика по подсетям, ASN и странам (--enrich-*)
+    if stats.enrich_counts:
+        print_enrich_statistics(stats, args)
+    
+    # Топ источников и назначений
+    src_ips = stats.src_ips
+    dst_ips = stats.dst_ips
+    
+    if stats.sketches is not None:
+        print_sketch_statistics(stats, args)
+    elif not args.quiet:
+        print(f"\n{Fore.WHITE}Топ источников по количеству событий:")
+        for ip, count in stats.top(src_ips):
+            print(f"  {Fore.YELLOW if not args.quiet else ''}{format_ip(ip)}{Fore.WHITE if not args.quiet else ''}: {count} событий")
+        
+        print(f"\n{Fore.WHITE}Топ назначений по количеству событий:")
+        for ip, count in stats.top(dst_ips):
+            print(f"  {Fore.YELLOW if not args.quiet else ''}{format_ip(ip)}{Fore.WHITE if not args.quiet else ''}: {count} событий")
+        
+        # Топ правил и пар источник -> назначение
+        print(f"\n{Fore.WHITE}Топ правил по количеству событий:")
+        for rule_id, count in stats.top(stats.rule_counts):
+            print(f"  {Fore.YELLOW}[{rule_id}]{Fore.WHITE} {stats.rule_descriptions.get(rule_id, '')}: {count} событий")
+        
+        print(f"\n{Fore.WHITE}Топ пар источник -> назначение:")
+        for (src_ip, dst_ip), count in stats.top(stats.pair_counts):
+            print(f"  {Fore.YELLOW}{src_ip}{Fore.WHITE} -> {Fore.YELLOW}{dst_ip}{Fore.WHITE}: {count} событий")
+    
+    # Обнаружение угроз
+    malware_count = stats.malware_count
+    
+    if malware_count > 0 and not args.quiet:
+        print(f"\n{Back.RED if malware_count > 10 else Back.YELLOW}{Fore.WHITE}{Style.BRIGHT} ВНИМАНИЕ: Обнаружено {malware_count} событий вредоносной активности! {Style.RESET_ALL}")
+    
+    # Рекомендации
+    if not args.quiet:
+        if priority_counts.get(1, 0) > 0:
+            print(f"\n{Fore.RED}{Style.BRIGHT}Рекомендации:")
+            print(f"  1. Проверьте хосты с критическими событиями (приоритет 1)")
+            print(f"  2. Изолируйте зараженные системы от сети")
+            print(f"  3. Обновите правила Suricata до последней версии")
+            print(f"  4. Проведите глубокий анализ уязвимостей")
@@ -0,0 +1,425 @@
+"""
+Отправка записей коллектору по сети (--sink): NDJSON по TCP/UDP, syslog
+RFC 5424 по UDP/TCP и HTTP POST в формате Elasticsearch _bulk
+"""
+
+import os
+import queue
+import socket
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from .colors import Fore
+from .parser import EPOCH, EXPORT_FIELDS, ENTRY_FIELDS, timestamp_to_epoch_us
+
+# Параметры --sink по умолчанию
+SINK_BATCH_SIZE = 500        # Записей в пачке
+SINK_INTERVAL = 1.0          # Секунд до отправки неполной пачки
+SINK_QUEUE_SIZE = 10000      # Записей в очереди до ожидания (обратное давление)
+SINK_CONNECTIONS = 1         # Потоков отправки, у каждого своё соединение
+SINK_RETRIES = 3             # Повторов пачки до записи в спул
+SINK_TIMEOUT = 5.0           # Таймаут соединения и отправки (с)
+
+# Записи передаются потокам отправки порциями, а не по одной через очередь
+SINK_CHUNK_SIZE = 256
+
+# После неудачной пачки коллектор считается недоступным столько секунд:
+# следующие пачки сразу идут в спул, а не ждут повторов
+SINK_DOWN_PAUSE = 5.0
+
+# Сколько байт NDJSON собирается в одну датаграмму udp:// (без фрагментации IP)
+SINK_UDP_PAYLOAD = 1400
+
+# Схема адреса -> (транспорт, формат сообщения, порт по умолчанию)
+SINK_SCHEMES = {
+    'tcp': ('tcp', 'json', None),
+    'udp': ('udp', 'json', None),
+    'syslog': ('udp', 'syslog', 514),
+    'syslog+tcp': ('tcp', 'syslog', 514),
+    'http': ('http', 'json', 80),
+    'https': ('http', 'json', 443),
+}
+
+# Приоритет Suricata -> важность syslog (1 - critical, 2 - error, 3 - warning)
+SYSLOG_SEVERITY = {1: 2, 2: 3, 3: 4}
+SYSLOG_FACILITY = 16  # local0
+
+def parse_sink_url(url):
+    """
+    Разбирает адрес --sink: (схема, хост, порт, путь)
+    Для http(s) путь без _bulk дополняется им; ValueError - неверный адрес
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in SINK_SCHEMES:
+        raise ValueError(f"неизвестная схема '{parts.scheme}', ожидается одна из: {', '.join(SINK_SCHEMES)}")
+    try:
+        port = parts.port or SINK_SCHEMES[scheme][2]
+    except ValueError:
+        raise ValueError(f"неверный порт в адресе '{url}'") from None
+    if not parts.hostname or port is None:
+        raise ValueError(f"в адресе '{url}' нужны хост и порт")
+    path = parts.path
+    if SINK_SCHEMES[scheme][0] == 'http':
+        path = path.rstrip('/')
+        if not path.endswith('/_bulk'):
+            path += '/_bulk'
+        if parts.query:
+            path += '?' + parts.query
+    return scheme, parts.hostname, port, path
+
+class _StreamTransport:
+    """Постоянное TCP-соединение; переподключение после ошибки"""
+
+    def __init__(self, host, port, timeout):
+        self.address = (host, port)
+        self.timeout = timeout
+        self._socket = None
+
+    def send(self, payloads):
+        if self._socket is None:
+            self._socket = socket.create_connection(self.address, self.timeout)
+        try:
+            while payloads:
+                self._socket.sendall(payloads[0])
+                del payloads[0]
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+class _DatagramTransport:
+    """UDP: каждая полезная нагрузка - отдельная датаграмма"""
+
+    def __init__(self, host, port, timeout):
+        self.address = (host, port)
+        self.timeout = timeout
+        self._socket = None
+
+    def send(self, payloads):
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_INET6 if ':' in self.address[0] else socket.AF_INET,
+                                         socket.SOCK_DGRAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(self.address)
+        try:
+            while payloads:
+                self._socket.send(payloads[0])
+                del payloads[0]
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+class _HttpTransport:
+    """
+    HTTP(S) keep-alive: пачка - один POST с телом _bulk
+    Ответ с ошибкой HTTP - исключение (пачка повторяется); записи, отвергнутые
+    Elasticsearch внутри успешного ответа, только считаются в rejected
+    """
+
+    def __init__(self, host, port, path, timeout, secure):
+        self.host, self.port, self.path = host, port, path
+        self.timeout = timeout
+        self.secure = secure
+        self.rejected = 0
+        self._connection = None
+
+    def send(self, payloads):
+        import http.client
+
+        if self._connection is None:
+            connection_class = http.client.HTTPSConnection if self.secure else http.client.HTTPConnection
+            self._connection = connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            while payloads:
+                self._connection.request('POST', self.path, body=payloads[0],
+                                         headers={'Content-Type': 'application/x-ndjson'})
+                response = self._connection.getresponse()
+                body = response.read()
+                if response.status >= 300:
+                    raise OSError(f"HTTP {response.status} {response.reason}")
+                del payloads[0]
+                if b'"errors":true' in body.replace(b' ', b''):
+                    self.rejected += self._count_rejected(body)
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+    @staticmethod
+    def _count_rejected(body):
+        """Число записей с ошибкой в ответе _bulk"""
+        import json
+        try:
+            items = json.loads(body).get('items', [])
+        except ValueError:
+            return 0
+        return sum(1 for item in items for result in item.values() if 'error' in result)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+class AlertSink:
+    """
+    Отправка записей коллектору по мере разбора
+    write() кладёт запись в ограниченную очередь: если сеть не успевает,
+    разбор ждёт, а не копит записи в памяти. Потоки отправки (connections
+    штук, у каждого постоянное соединение) собирают пачки по batch_size
+    записей или по истечении interval секунд и отправляют их целиком.
+    Записи попадают в очередь порциями по chunk_size (1 - сразу, для --follow).
+    Неудачная пачка повторяется retries раз с растущей паузой, затем
+    дописывается в спул (файл spool, по сообщению на строку) или, без спула,
+    теряется. Спул прошлых запусков отправляется первым и удаляется
+    """
+
+    def __init__(self, url, fields=None, batch_size=SINK_BATCH_SIZE, interval=SINK_INTERVAL,
+                 queue_size=SINK_QUEUE_SIZE, connections=SINK_CONNECTIONS, retries=SINK_RETRIES,
+                 spool=None, timeout=SINK_TIMEOUT, chunk_size=SINK_CHUNK_SIZE):
+        self.url = url
+        scheme, self.host, self.port, self.path = parse_sink_url(url)
+        self.transport_name, self.message_format, _ = SINK_SCHEMES[scheme]
+        self.secure = scheme == 'https'
+        self.fields = fields or EXPORT_FIELDS
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retries = retries
+        self.spool = spool
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.queue = queue.Queue(max(queue_size // chunk_size, 1))
+        self._pending = []
+        self.received = self.sent = self.batches = self.spooled = self.dropped = self.replayed = 0
+        self.rejected = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self._encode = None
+        self._hostname = socket.gethostname() or '-'
+        self._threads = []
+
+        # Спул прошлых запусков забирается до того, как в него начнут писать
+        replay = None
+        if spool is not None and os.path.exists(spool) and os.path.getsize(spool) > 0:
+            replay = spool + '.replay'
+            if os.path.exists(replay):
+                # Прошлая досылка прервалась - её сообщения идут первыми
+                with open(replay, 'ab') as replay_file, open(spool, 'rb') as spool_file:
+                    replay_file.write(spool_file.read())
+                os.remove(spool)
+            else:
+                os.replace(spool, replay)
+        elif spool is not None and os.path.exists(spool + '.replay'):
+            replay = spool + '.replay'
+
+        for number in range(connections):
+            thread = threading.Thread(target=self._run, args=(replay if number == 0 else None,),
+                                      name=f'sink-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def write(self, record):
+        """Ставит запись в очередь отправки (ждёт, если очередь заполнена)"""
+        pending = self._pending
+        pending.append(record)
+        self.received += 1
+        if len(pending) >= self.chunk_size:
+            self.queue.put(pending)
+            self._pending = []
+        return True
+
+    def _transport(self):
+        """Новый транспорт для потока отправки"""
+        if self.transport_name == 'tcp':
+            return _StreamTransport(self.host, self.port, self.timeout)
+        if self.transport_name == 'udp':
+            return _DatagramTransport(self.host, self.port, self.timeout)
+        return _HttpTransport(self.host, self.port, self.path, self.timeout, self.secure)
+
+    def _message(self, record):
+        """Сообщение одной записи: компактный JSON полей, для syslog - с заголовком RFC 5424"""
+        encode = self._encode
+        if encode is None:
+            import json
+            encode = self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        # Один вызов C-кодировщика на запись быстрее, чем склейка заранее закодированных ключей
+        message = encode({field: record.get(field) for field in self.fields})
+        if self.message_format != 'syslog':
+            return message
+        severity = SYSLOG_SEVERITY.get(record.get('priority'), 5)
+        timestamp = record.get('timestamp')
+        epoch_us = timestamp_to_epoch_us(timestamp) if isinstance(timestamp, str) else None
+        # Suricata пишет местное время без зоны: TIMESTAMP получает смещение
+        # местного часового пояса (TZ) на этот момент, а не 'Z'
+        moment = (EPOCH + timedelta(microseconds=epoch_us)).astimezone().isoformat() if epoch_us is not None else '-'
+        host = record.get('sensor') or self._hostname
+        return f"<{SYSLOG_FACILITY * 8 + severity}>1 {moment} {host} suricata - alert - {message}"
+
+    def _payloads(self, messages):
+        """Полезные нагрузки для транспорта из пачки сообщений: пары (байты, число сообщений)"""
+        if self.transport_name == 'http':
+            return [(''.join('{"index":{}}\n' + message + '\n' for message in messages).encode('utf-8'), len(messages))]
+        if self.transport_name == 'tcp':
+            return [(''.join(message + '\n' for message in messages).encode('utf-8'), len(messages))]
+        if self.message_format == 'syslog':
+            return [(message.encode('utf-8'), 1) for message in messages]
+        # udp:// - строки NDJSON упаковываются в датаграммы до SINK_UDP_PAYLOAD байт
+        payloads, current, count = [], b'', 0
+        for message in messages:
+            line = message.encode('utf-8') + b'\n'
+            if current and len(current) + len(line) > SINK_UDP_PAYLOAD:
+                payloads.append((current, count))
+                current, count = b'', 0
+            current += line
+            count += 1
+        if current:
+            payloads.append((current, count))
+        return payloads
+
+    def _deliver(self, transport, messages):
+        """
+        Отправляет пачку с повторами; возвращает число недоставленных сообщений
+        в конце пачки (0 - доставлена целиком). Транспорт убирает из списка
+        отправленные нагрузки, поэтому повтор досылает только остаток и
+        датаграммы udp:// не дублируются
+        Пока коллектор считается недоступным, попыток нет
+        """
+        if time.monotonic() < self._down_until:
+            return len(messages)
+        batch = self._payloads(messages)
+        payloads = [payload for payload, _ in batch]
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(min(0.2 * 2 ** (attempt - 1), 2.0))
+            try:
+                transport.send(payloads)
+                return 0
+            except Exception as e:
+                self.last_error = e
+        self._down_until = time.monotonic() + SINK_DOWN_PAUSE
+        return sum(count for _, count in batch[len(batch) - len(payloads):])
+
+    def _flush(self, transport, messages, replayed=False):
+        """Отправляет пачку, а недоставленный остаток - в спул"""
+        if not messages:
+            return
+        undelivered = self._deliver(transport, messages)
+        delivered = len(messages) - undelivered
+        with self._lock:
+            self.sent += delivered
+            if replayed:
+                self.replayed += delivered
+            if not undelivered:
+                self.batches += 1
+                return
+            rest = messages[delivered:]
+            if self.spool is not None:
+                try:
+                    with open(self.spool, 'a', encoding='utf-8') as spool_file:
+                        spool_file.write(''.join(message + '\n' for message in rest))
+                    self.spooled += len(rest)
+                except OSError as e:
+                    self.last_error = e
+                    self.dropped += len(rest)
+            else:
+                self.dropped += len(rest)
+
+    def _replay(self, transport, path):
+        """Досылает спул прошлых запусков пачками; файл удаляется после обхода"""
+        with open(path, 'r', encoding='utf-8') as replay_file:
+            messages = []
+            for line in replay_file:
+                line = line.rstrip('\n')
+                if line:
+                    messages.append(line)
+                if len(messages) >= self.batch_size:
+                    self._flush(transport, messages, replayed=True)
+                    messages = []
+            self._flush(transport, messages, replayed=True)
+        os.remove(path)
+
+    def _run(self, replay):
+        """Поток отправки: пачки по размеру или по времени"""
+        transport = self._transport()
+        try:
+            if replay is not None:
+                try:
+                    self._replay(transport, replay)
+                except OSError as e:
+                    self.last_error = e
+
+            messages = []
+            deadline = None
+            while True:
+                try:
+                    records = self.queue.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    # Истёк interval - неполная пачка уходит как есть
+                    self._flush(transport, messages)
+                    messages, deadline = [], None
+                    continue
+                if records is None:
+                    self._flush(transport, messages)
+                    return
+                messages.extend(map(self._message, records))
+                while len(messages) >= self.batch_size:
+                    self._flush(transport, messages[:self.batch_size])
+                    del messages[:self.batch_size]
+                if not messages:
+                    deadline = None
+                elif deadline is None:
+                    deadline = time.monotonic() + self.interval
+        finally:
+            with self._lock:
+                self.rejected += getattr(transport, 'rejected', 0)
+            transport.close()
+
+    def close(self):
+        """Отправляет остаток очереди и останавливает потоки; False - часть записей потеряна"""
+        if self._pending:
+            self.queue.put(self._pending)
+            self._pending = []
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return self.dropped == 0
+
+def create_sink(url, args, fields=None):
+    """AlertSink по опциям --sink-* (fields - поля, если не поля записи)"""
+    if fields is None:
+        fields = ENTRY_FIELDS if getattr(args, 'epoch', False) else EXPORT_FIELDS
+    return AlertSink(
+        url, fields, batch_size=args.sink_batch, interval=args.sink_interval,
+        queue_size=args.sink_queue, connections=args.sink_connections,
+        retries=args.sink_retries, spool=args.sink_spool,
+        chunk_size=1 if getattr(args, 'follow', False) else SINK_CHUNK_SIZE,
+    )
+
+def print_sink_report(sink, args):
+    """Итог отправки: доставлено, дослано из спула, в спуле, потеряно"""
+    if args.quiet and not sink.dropped and not sink.spooled:
+        return
+    color = Fore.GREEN if not sink.dropped and not sink.spooled else Fore.YELLOW
+    print(f"{color}📡 Отправлено в '{sink.url}': {sink.sent} записей, пачек {sink.batches}")
+    if sink.replayed:
+        print(f"   Из них дослано из спула: {sink.replayed}")
+    if sink.spooled:
+        print(f"{Fore.YELLOW}   Отложено в спул '{sink.spool}': {sink.spooled}")
+    if sink.rejected:
+        print(f"{Fore.YELLOW}   Отвергнуто коллектором: {sink.rejected}")
+    if sink.dropped:
+        print(f"{Fore.RED}   Потеряно (нет спула --sink-spool): {sink.dropped}")
+    if (sink.spooled or sink.dropped) and sink.last_error is not None:
+        print(f"   Последняя ошибка: {sink.last_error}")
@@ -0,0 +1,249 @@
+"""
+Приближённая статистика --sketch: HyperLogLog и Space-Saving с объединением
+состояний разных запусков
+"""
+
+import os
+import sys
+import math
+import heapq
+import hashlib
+import operator
+import collections
+
+from .colors import Fore
+
+# Параметры приближённой статистики --sketch по умолчанию
+SKETCH_PRECISION = 14      # HyperLogLog: 2^14 регистров (16 КБ, ошибка ~0.8%)
+SKETCH_CAPACITY = 10000    # Space-Saving: сколько самых частых значений хранится
+SKETCH_VERSION = 2
+
+def _sketch_hash(value):
+    """Стабильный 64-битный хеш строки (одинаков во всех процессах и запусках)"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class HyperLogLog:
+    """
+    Оценка числа уникальных значений в фиксированной памяти (2^precision байт)
+    Состояния с одинаковой точностью объединяются поэлементным максимумом
+    """
+
+    def __init__(self, precision=SKETCH_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = bytearray(1 << precision) if registers is None else bytearray(registers)
+
+    def add_many(self, values):
+        """Учитывает значения (повторы в пачке лучше убрать заранее - меньше хешей)"""
+        registers = self.registers
+        shift = 64 - self.precision
+        low_mask = (1 << shift) - 1
+        for value in values:
+            hashed = _sketch_hash(value)
+            index = hashed >> shift
+            rank = shift - (hashed & low_mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def merge(self, other):
+        """Объединяет с другим состоянием той же точности"""
+        if other.precision != self.precision:
+            raise ValueError(f"разная точность HyperLogLog: {self.precision} и {other.precision}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self):
+        """Оценка числа уникальных значений"""
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Малые значения точнее оценивает линейный подсчёт
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+class SpaceSaving:
+    """
+    Самые частые значения (heavy hitters) в памяти на capacity значений
+    Счётчики обновляются пачками, а лишние значения вытесняются разом. floor -
+    наибольшее число появлений вытесненного значения: новое значение получает его
+    в счёт и в погрешность, поэтому count - оценка сверху, а count - error - снизу.
+    Состояния объединяются сложением счётчиков (отсутствующее значение - floor)
+    """
+
+    def __init__(self, capacity=SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.floor = 0
+
+    def update(self, counter):
+        """Учитывает пачку: словарь значение -> число появлений"""
+        counts = self.counts
+        floor = self.floor
+        for key, count in counter.items():
+            if key in counts:
+                counts[key] += count
+            else:
+                counts[key] = count + floor
+                if floor:
+                    self.errors[key] = floor
+        if len(counts) > self.capacity:
+            self._prune()
+
+    def _prune(self):
+        """Оставляет capacity самых частых значений"""
+        kept = heapq.nlargest(self.capacity, self.counts.items(), key=operator.itemgetter(1))
+        self.floor = max(self.floor, kept[-1][1])
+        self.counts = dict(kept)
+        self.errors = {key: self.errors[key] for key in self.counts if key in self.errors}
+
+    def merge(self, other):
+        """Объединяет с другим состоянием (например, другого файла или процесса)"""
+        counts = {}
+        errors = {}
+        for key in self.counts.keys() | other.counts.keys():
+            mine = key in self.counts
+            theirs = key in other.counts
+            counts[key] = ((self.counts[key] if mine else self.floor)
+                           + (other.counts[key] if theirs else other.floor))
+            error = ((self.errors.get(key, 0) if mine else self.floor)
+                     + (other.errors.get(key, 0) if theirs else other.floor))
+            if error:
+                errors[key] = error
+        self.counts = counts
+        self.errors = errors
+        self.floor += other.floor
+        if len(counts) > self.capacity:
+            self._prune()
+
+    def top(self, count=5):
+        """Топ-N: список (значение, оценка сверху, погрешность)"""
+        return [
+            (key, value, self.errors.get(key, 0))
+            for key, value in heapq.nlargest(count, self.counts.items(), key=operator.itemgetter(1))
+        ]
+
+class AlertSketches:
+    """
+    Приближённая статистика --sketch с ограниченной памятью: HyperLogLog для
+    числа уникальных источников, назначений и сигнатур, Space-Saving для топов
+    источников, назначений, правил и пар. Сохраняется в JSON и объединяется
+    с состояниями других файлов или запусков (--sketch-save/--sketch-merge)
+    Распределения по приоритетам, протоколам, классификациям и сенсорам
+    небольшие и хранятся точно (counts) - LogStatistics считает прямо в них,
+    поэтому после объединения итог и распределения относятся ко всем состояниям
+    """
+    DISTINCT = ('src', 'dst', 'sid')
+    TOP = ('src', 'dst', 'rule', 'pair')
+    COUNTS = ('priority', 'protocol', 'classification', 'sensor')
+
+    def __init__(self, precision=SKETCH_PRECISION, capacity=SKETCH_CAPACITY):
+        self.total = 0
+        self.distinct = {name: HyperLogLog(precision) for name in self.DISTINCT}
+        self.top = {name: SpaceSaving(capacity) for name in self.TOP}
+        self.counts = {name: collections.Counter() for name in self.COUNTS}
+        # Объединённые состояния (--sketch-merge) и записей в них
+        self.merged = 0
+        self.merged_total = 0
+
+    def update(self, src_ips, dst_ips, rules):
+        """Учитывает пачку записей (столбцы источников, назначений и правил)"""
+        self.total += len(rules)
+        src_counts = collections.Counter(src_ips)
+        dst_counts = collections.Counter(dst_ips)
+        rule_counts = collections.Counter(rules)
+        self.distinct['src'].add_many(src_counts)
+        self.distinct['dst'].add_many(dst_counts)
+        self.distinct['sid'].add_many(dict.fromkeys(rule.split(':')[1] for rule in rule_counts))
+        self.top['src'].update(src_counts)
+        self.top['dst'].update(dst_counts)
+        self.top['rule'].update(rule_counts)
+        self.top['pair'].update(collections.Counter(f"{src} -> {dst}" for src, dst in zip(src_ips, dst_ips)))
+
+    def merge(self, other):
+        """Объединяет с другим состоянием"""
+        self.total += other.total
+        self.merged += 1
+        self.merged_total += other.total
+        for name in self.DISTINCT:
+            self.distinct[name].merge(other.distinct[name])
+        for name in self.TOP:
+            self.top[name].merge(other.top[name])
+        for name in self.COUNTS:
+            self.counts[name].update(other.counts[name])
+
+    def nbytes(self):
+        """Примерный объём памяти состояния"""
+        registers = sum(len(sketch.registers) for sketch in self.distinct.values())
+        values = sum(len(sketch.counts) for sketch in self.top.values())
+        return registers + values * 160
+
+    def to_dict(self):
+        """Состояние для сохранения в JSON"""
+        import base64
+        
+        return {
+            'version': SKETCH_VERSION,
+            'total': self.total,
+            'distinct': {
+                name: {'precision': sketch.precision, 'registers': base64.b64encode(sketch.registers).decode('ascii')}
+                for name, sketch in self.distinct.items()
+            },
+            'top': {
+                name: {
+                    'capacity': sketch.capacity,
+                    'floor': sketch.floor,
+                    'counts': [[key, count, sketch.errors.get(key, 0)] for key, count in sketch.counts.items()],
+                }
+                for name, sketch in self.top.items()
+            },
+            # Пары, а не объект: ключи приоритетов остаются числами
+            'counts': {name: [[key, count] for key, count in counter.items()] for name, counter in self.counts.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Восстанавливает состояние из JSON (ValueError при несовместимой версии)"""
+        import base64
+        
+        if state.get('version') != SKETCH_VERSION:
+            raise ValueError(f"неподдерживаемая версия состояния: {state.get('version')}")
+        sketches = cls()
+        sketches.total = state['total']
+        for name in cls.DISTINCT:
+            data = state['distinct'][name]
+            sketches.distinct[name] = HyperLogLog(data['precision'], base64.b64decode(data['registers']))
+        for name in cls.TOP:
+            data = state['top'][name]
+            sketch = sketches.top[name] = SpaceSaving(data['capacity'])
+            sketch.floor = data['floor']
+            for key, count, error in data['counts']:
+                sketch.counts[key] = count
+                if error:
+                    sketch.errors[key] = error
+        for name in cls.COUNTS:
+            sketches.counts[name].update(dict(state['counts'][name]))
+        return sketches
+
+def load_sketches(filename):
+    """Читает сохранённое состояние --sketch-save (выход с кодом 1 при ошибке)"""
+    import json
+    
+    try:
+        with open(filename, 'r', encoding='utf-8') as sketch_file:
+            return AlertSketches.from_dict(json.load(sketch_file))
+    except FileNotFoundError:
+        print(f"{Fore.RED}❌ Ошибка: Файл состояния '{filename}' не найден!")
+        sys.exit(1)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"{Fore.RED}❌ Ошибка чтения состояния '{filename}': {e}")
+        sys.exit(1)
+
+def save_sketches(filename, sketches):
+    """Атомарно сохраняет состояние --sketch в JSON"""
+    import json
+    
+    temp_path = filename + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as sketch_file:
+        json.dump(sketches.to_dict(), sketch_file, separators=(',', ':'))
+    os.replace(temp_path, filename)
@@ -0,0 +1,102 @@
+"""
+Состояние разбора --state: смещение, с которого продолжить следующий запуск
+"""
+
+import os
+import hashlib
+from datetime import datetime
+
+from .colors import Fore
+
+# Сколько первых байт файла хешируется для обнаружения ротации (--state)
+STATE_HEAD_SIZE = 4096
+
+def _file_head_hash(file, length):
+    """SHA-256 первых length байт файла"""
+    file.seek(0)
+    return hashlib.sha256(file.read(length)).hexdigest()
+
+def load_state_offset(state_path, filename, args):
+    """
+    Определяет по файлу состояния --state смещение, с которого продолжить разбор
+    Возвращает 0, если состояния ещё нет или лог был ротирован/усечён
+    (другой inode, файл короче сохранённого смещения или изменилось начало файла)
+    """
+    import json
+    
+    try:
+        with open(state_path, 'r', encoding='utf-8') as state_file:
+            state = json.load(state_file)
+        offset = int(state['offset'])
+        head_size = min(int(state['head_size']), offset)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"{Fore.YELLOW}⚠ Файл состояния '{state_path}' не прочитан ({e}), разбор с начала файла")
+        return 0
+    
+    try:
+        with open(filename, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            same_file = (
+                stat.st_ino == state.get('inode')
+                and stat.st_size >= offset
+                and _file_head_hash(file, head_size) == state.get('head_hash')
+            )
+    except OSError:
+        # Об отсутствии файла сообщит чтение лога
+        return 0
+    
+    if not same_file:
+        if args.verbose:
+            print(f"{Fore.CYAN}🔄 Файл '{filename}' ротирован или усечён, разбор с начала")
+        return 0
+    
+    if args.verbose:
+        print(f"{Fore.CYAN}⏩ Продолжение разбора с байта {offset} (состояние '{state_path}')")
+    return offset
+
+def remember_file(file, progress):
+    """
+    Запоминает в progress inode и начало файла по открытому читателем дескриптору
+    Их сохранит save_state: если лог ротируют во время разбора, смещение всё
+    равно окажется в паре с тем файлом, который действительно был прочитан
+    """
+    position = file.tell()
+    progress['inode'] = os.fstat(file.fileno()).st_ino
+    file.seek(0)
+    progress['head'] = file.read(STATE_HEAD_SIZE)
+    file.seek(position)
+
+def save_state(state_path, filename, progress):
+    """
+    Атомарно сохраняет смещение, inode и хеш начала файла в файл состояния
+    progress - словарь читателя: 'offset' и данные remember_file; без них
+    (читатель не открывал файл и смещение не сдвинулось) файл открывается по имени
+    """
+    import json
+    
+    try:
+        if 'inode' not in progress:
+            with open(filename, 'rb') as file:
+                remember_file(file, progress)
+        offset = progress['offset']
+        head = progress['head'][:min(STATE_HEAD_SIZE, offset)]
+        state = {
+            'path': os.path.abspath(filename),
+            'inode': progress['inode'],
+            'offset': offset,
+            'head_size': len(head),
+            'head_hash': hashlib.sha256(head).hexdigest(),
+            'updated': datetime.now().isoformat(timespec='seconds'),
+        }
+        
+        temp_path = state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as state_file:
+            json.dump(state, state_file, indent=2)
+        os.replace(temp_path, state_path)
+        return True
+    
+    except OSError as e:
+        print(f"{Fore.RED}❌ Ошибка при сохранении состояния в '{state_path}': {e}")
+        return False
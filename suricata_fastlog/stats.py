@@ -0,0 +1,231 @@
+"""
+Статистика по записям за один проход (LogStatistics)
+"""
+
+import heapq
+import operator
+import collections
+
+from . import indicators
+from .store import AlertStore
+from .enrich import ENRICH_FIELDS
+
+class LogStatistics:
+    """
+    Накопитель статистики за один проход
+    Записи буферизуются пачками, а счётчики обновляются Counter.update - цикл
+    подсчёта выполняется на C, а не по одному словарю на запись. Перед чтением
+    счётчиков вызывается flush() (его делают print_statistics и свойства класса)
+    С sketches (AlertSketches, режим --sketch) источники, назначения, правила и
+    пары не считаются точно - память ограничена размером приближённой статистики
+    Распределения в режиме sketches - это счётчики самого состояния (counts):
+    они объединяются вместе с ним (--sketch-merge)
+    Поля обогащения (src_asn и т.п., --enrich-*) считаются, если они есть в записях
+    """
+    BATCH_SIZE = 4096
+
+    def __init__(self, sketches=None):
+        self.total = 0
+        self.sketches = sketches
+        self.priority_counts = collections.Counter()
+        self.protocol_counts = collections.Counter()
+        self.classification_counts = collections.Counter()
+        self.src_ips = collections.Counter()
+        self.dst_ips = collections.Counter()
+        # Счётчики по правилам и по парам (источник, назначение)
+        self.rule_counts = collections.Counter()
+        self.pair_counts = collections.Counter()
+        self.description_counts = collections.Counter()
+        # Записи по сенсорам (только в режиме --sources)
+        self.sensor_counts = collections.Counter()
+        if sketches is not None:
+            self.priority_counts = sketches.counts['priority']
+            self.protocol_counts = sketches.counts['protocol']
+            self.classification_counts = sketches.counts['classification']
+            self.sensor_counts = sketches.counts['sensor']
+        # Записи по меткам обогащения: поле -> Counter (только с --enrich-*)
+        self.enrich_counts = {}
+        self._enrich_fields = None
+        self._enrich_values = None
+        self._enrich_pending = []
+        # Первое описание каждого правила и первое появление каждого описания
+        self.rule_descriptions = {}
+        self.description_first = {}
+        self._pending = []
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Строит статистику по итерируемому набору записей"""
+        if isinstance(entries, AlertStore):
+            return cls.from_store(entries)
+        stats = cls()
+        for entry in entries:
+            stats.add(entry)
+        stats.flush()
+        return stats
+
+    @classmethod
+    def from_store(cls, store):
+        """Строит статистику по колонкам AlertStore, не восстанавливая записи"""
+        stats = cls()
+        stats.total = len(store)
+        stats.priority_counts = store.value_counts('priority')
+        stats.protocol_counts = store.value_counts('protocol')
+        stats.classification_counts = store.value_counts('classification')
+        stats.src_ips = store.value_counts('src_ip')
+        stats.dst_ips = store.value_counts('dst_ip')
+        stats.rule_counts = store.value_counts('rule_id')
+        stats.description_counts = store.value_counts('description')
+        stats.pair_counts = store.pair_counts()
+        
+        # Первые появления ищутся по кодам колонок (array.index работает на C)
+        rule_column = store.columns['rule_id']
+        description_column = store.columns['description']
+        rules = store.dictionaries['rule_id'].values
+        descriptions = store.dictionaries['description'].values
+        for code in dict.fromkeys(rule_column):
+            stats.rule_descriptions[rules[code]] = descriptions[description_column[rule_column.index(code)]]
+        for code in dict.fromkeys(description_column):
+            index = description_column.index(code)
+            stats.description_first[descriptions[code]] = (
+                index, store.decode_column('src_ip', index), store.decode_column('dst_ip', index)
+            )
+        return stats
+
+    def add(self, entry):
+        """Учитывает одну запись"""
+        self.total += 1
+        self._pending.append((
+            entry['priority'], entry['protocol'], entry['classification'],
+            entry['src_ip'], entry['dst_ip'], entry['rule_id'], entry['description']
+        ))
+        if 'sensor' in entry:
+            self.sensor_counts[entry['sensor']] += 1
+        fields = self._enrich_fields
+        if fields is None:
+            # Набор полей обогащения одинаков у всех записей прохода
+            fields = self._enrich_fields = [field for field in ENRICH_FIELDS if field in entry]
+            self.enrich_counts = {field: collections.Counter() for field in fields}
+            self._enrich_values = operator.itemgetter(*fields) if fields else None
+        if fields:
+            self._enrich_pending.append(self._enrich_values(entry))
+        if len(self._pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def update(self, entries):
+        """Учитывает записи итерируемого источника (например, iter_alerts)"""
+        for entry in entries:
+            self.add(entry)
+        return self
+
+    def flush(self):
+        """Переносит накопленную пачку записей в счётчики"""
+        pending = self._pending
+        if not pending:
+            return
+        self._pending = []
+        base = self.total - len(pending)
+        
+        priorities, protocols, classifications, src_ips, dst_ips, rules, descriptions = zip(*pending)
+        self.priority_counts.update(priorities)
+        self.protocol_counts.update(protocols)
+        self.classification_counts.update(classifications)
+        if self.sketches is not None:
+            self.sketches.update(src_ips, dst_ips, rules)
+        else:
+            self.src_ips.update(src_ips)
+            self.dst_ips.update(dst_ips)
+            self.rule_counts.update(rules)
+            self.pair_counts.update(zip(src_ips, dst_ips))
+        self.description_counts.update(descriptions)
+        if self._enrich_pending:
+            for counter, values in zip(self.enrich_counts.values(), zip(*self._enrich_pending)):
+                counter.update(values)
+            self._enrich_pending = []
+        
+        # Первые появления: обходим только новые уникальные значения пачки
+        for rule in dict.fromkeys(rules):
+            if rule not in self.rule_descriptions:
+                self.rule_descriptions[rule] = descriptions[rules.index(rule)]
+        for description in dict.fromkeys(descriptions):
+            if description not in self.description_first:
+                index = descriptions.index(description)
+                self.description_first[description] = (base + index, src_ips[index], dst_ips[index])
+
+    @staticmethod
+    def top(counter, count=5):
+        """Топ-N значений счётчика через кучу (без полной сортировки), порядок при
+        равенстве - как у sorted(..., reverse=True)"""
+        return heapq.nlargest(count, counter.items(), key=operator.itemgetter(1))
+
+    @property
+    def critical_count(self):
+        """Количество критических событий (приоритет 1)"""
+        self.flush()
+        return self.priority_counts.get(1, 0)
+
+    @property
+    def malware_count(self):
+        """Количество событий с вредоносной классификацией (проверка по уникальным значениям)"""
+        self.flush()
+        match = indicators.INDICATORS.classification.match
+        return sum(
+            count for classification, count in self.classification_counts.items()
+            if 'malicious' in match(classification)
+        )
+
+    def ioc_summary(self):
+        """
+        События семейств угроз (IOC) по уникальным описаниям
+        Возвращает список (семейство, количество, первое событие) в порядке
+        семейств из правил; первое событие - словарь с src_ip и dst_ip
+        """
+        self.flush()
+        counts = collections.Counter()
+        firsts = {}
+        match = indicators.INDICATORS.description.match
+        for description, count in self.description_counts.items():
+            families = match(description)
+            if not families:
+                continue
+            first = self.description_first[description]
+            for family in families:
+                counts[family] += count
+                if family not in firsts or first < firsts[family]:
+                    firsts[family] = first
+        return [
+            (family, counts[family], {'src_ip': firsts[family][1], 'dst_ip': firsts[family][2]})
+            for family in indicators.INDICATORS.ioc_families if counts[family]
+        ]
+
+    def summary(self, count=5):
+        """
+        Статистика словарём без вывода (для встраивания и JSON): итог, распределения,
+        топ-count источников, назначений и правил, события семейств угроз
+        В режиме sketches топы приближённые, а distinct - оценка числа уникальных
+        """
+        self.flush()
+        result = {
+            'total': self.total,
+            'priorities': dict(self.priority_counts),
+            'protocols': dict(self.protocol_counts),
+            'classifications': dict(self.classification_counts),
+            'sensors': dict(self.sensor_counts),
+            'enrichment': {field: self.top(counter, count) for field, counter in self.enrich_counts.items()},
+            'critical': self.critical_count,
+            'malware': self.malware_count,
+            'ioc': [
+                {'family': family, 'count': family_count, **first}
+                for family, family_count, first in self.ioc_summary()
+            ],
+        }
+        if self.sketches is not None:
+            result['merged'] = {'states': self.sketches.merged, 'total': self.sketches.merged_total}
+            result['distinct'] = {name: sketch.estimate() for name, sketch in self.sketches.distinct.items()}
+            for name in ('src', 'dst', 'rule'):
+                result[f'top_{name}'] = [(key, value) for key, value, _ in self.sketches.top[name].top(count)]
+        else:
+            result['top_src'] = self.top(self.src_ips, count)
+            result['top_dst'] = self.top(self.dst_ips, count)
+            result['top_rule'] = self.top(self.rule_counts, count)
+        return result
@@ -0,0 +1,483 @@
+"""
+Колоночное хранилище записей AlertStore и его двоичный кеш (--cache)
+"""
+
+import os
+import sys
+import argparse
+import mmap
+import socket
+import itertools
+import collections
+from array import array
+
+from .colors import Fore
+from .parser import EXPORT_FIELDS, ENTRY_FIELDS, timestamp_to_epoch_us
+from .filters import entry_matches_filters, rule_matches, has_query
+from .reader import iter_log_entries
+
+# NumPy необязателен: загружается при первом подсчёте по колонкам, если установлен
+_numpy_module = None
+
+def _load_numpy():
+    """Возвращает модуль numpy или None, если он не установлен"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = False
+    return _numpy_module or None
+
+def _numpy_value_counts(np, values):
+    """Подсчёт значений массива NumPy в порядке их первого появления"""
+    uniques, first_index, counts = np.unique(values, return_index=True, return_counts=True)
+    order = np.argsort(first_index, kind='stable')
+    return dict(zip(uniques[order].tolist(), counts[order].tolist()))
+
+def count_column_values(column):
+    """Счётчик значений колонки array (NumPy при наличии, иначе Counter)"""
+    np = _load_numpy()
+    if np is None or not len(column):
+        return collections.Counter(column)
+    return collections.Counter(_numpy_value_counts(np, np.frombuffer(column, dtype=column.typecode)))
+
+def _unpack_ipv4(value):
+    """Строка IPv4 из упакованного 32-битного числа"""
+    return socket.inet_ntoa(int(value).to_bytes(4, 'big'))
+
+class StringDictionary:
+    """Словарное кодирование строк: каждое уникальное значение хранится один раз"""
+    __slots__ = ('values', 'codes')
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        """Возвращает код строки, добавляя её в словарь при необходимости"""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+# Двоичный колоночный кеш разобранного лога (--cache)
+CACHE_MAGIC = b'SFLCACHE'
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.cache'
+
+class _MappedColumns(dict):
+    """Колонки AlertStore из отображённого файла: читаются при первом обращении"""
+
+    def __init__(self, buffer, layout, swap):
+        super().__init__()
+        self._buffer = buffer
+        self._layout = layout
+        self._swap = swap
+
+    def __missing__(self, name):
+        typecode, offset, length = self._layout[name]
+        column = array(typecode)
+        column.frombytes(memoryview(self._buffer)[offset:offset + length * column.itemsize])
+        if self._swap:
+            column.byteswap()
+        self[name] = column
+        return column
+
+    def __contains__(self, name):
+        return name in self._layout
+
+    def __iter__(self):
+        return iter(self._layout)
+
+    def __len__(self):
+        return len(self._layout)
+
+    def get(self, name, default=None):
+        return self[name] if name in self._layout else default
+
+    def keys(self):
+        return self._layout.keys()
+
+    def values(self):
+        return [self[name] for name in self._layout]
+
+    def items(self):
+        return [(name, self[name]) for name in self._layout]
+
+class AlertStore:
+    """
+    Компактное колоночное хранилище записей вместо списка словарей
+    Строки (правило, описание, классификация, протокол, дата) кодируются словарём,
+    IPv4-адреса и порты хранятся упакованными числами в array, время - числом из
+    цифр HHMMSSffffff. Значения, которые нельзя упаковать без потерь (IP вида
+    01.2.3.4, порт больше 65535, нестандартная метка времени), хранятся как есть
+    в словарях исключений по номеру записи.
+    Поддерживает len(), итерацию и индексацию - записи отдаются словарями
+    """
+    STRING_FIELDS = ('rule_id', 'description', 'classification', 'protocol')
+
+    def __init__(self):
+        self.dictionaries = {name: StringDictionary() for name in self.STRING_FIELDS + ('date',)}
+        self.columns = {
+            'date': array('I'),
+            'time': array('q'),
+            'rule_id': array('I'),
+            'description': array('I'),
+            'classification': array('I'),
+            'protocol': array('I'),
+            'priority': array('B'),
+            'src_ip': array('I'),
+            'src_port': array('H'),
+            'dst_ip': array('I'),
+            'dst_port': array('H'),
+        }
+        # Номер записи -> исходное значение, не поместившееся в колонку
+        self.overflow = {name: {} for name in ('timestamp', 'priority', 'src_ip', 'src_port', 'dst_ip', 'dst_port')}
+        # Заголовок файла кеша (для хранилища, прочитанного load)
+        self.metadata = {}
+
+    def __len__(self):
+        return len(self.columns['priority'])
+
+    def __iter__(self):
+        for row in self.iter_rows(ENTRY_FIELDS):
+            yield dict(zip(ENTRY_FIELDS, row))
+
+    def __getitem__(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('AlertStore index out of range')
+        return dict(zip(ENTRY_FIELDS, self.row(index, ENTRY_FIELDS)))
+
+    def _put_int(self, name, index, value):
+        """Добавляет число в колонку или в исключения, если оно не помещается"""
+        column = self.columns[name]
+        try:
+            column.append(value)
+        except OverflowError:
+            column.append(0)
+            self.overflow[name][index] = value
+
+    def _put_ip(self, name, index, value):
+        """Упаковывает IPv4-адрес в 32-битное число, если это обратимо"""
+        try:
+            packed = socket.inet_aton(value)
+            if socket.inet_ntoa(packed) != value:
+                raise ValueError(value)
+            self.columns[name].append(int.from_bytes(packed, 'big'))
+        except (OSError, ValueError):
+            self.columns[name].append(0)
+            self.overflow[name][index] = value
+
+    def append(self, entry):
+        """Добавляет запись-словарь"""
+        index = len(self)
+        columns = self.columns
+        timestamp = entry['timestamp']
+        if len(timestamp) == 26 and timestamp.isascii():
+            columns['date'].append(self.dictionaries['date'].encode(timestamp[:10]))
+            columns['time'].append(int(timestamp[11:13] + timestamp[14:16] + timestamp[17:19] + timestamp[20:]))
+        else:
+            columns['date'].append(0)
+            columns['time'].append(-1)
+            self.overflow['timestamp'][index] = timestamp
+        for name in self.STRING_FIELDS:
+            columns[name].append(self.dictionaries[name].encode(entry[name]))
+        self._put_int('src_port', index, entry['src_port'])
+        self._put_int('dst_port', index, entry['dst_port'])
+        self._put_ip('src_ip', index, entry['src_ip'])
+        self._put_ip('dst_ip', index, entry['dst_ip'])
+        # priority добавляется последним: длина его колонки и есть len(self)
+        self._put_int('priority', index, entry['priority'])
+
+    def extend(self, entries):
+        """Добавляет записи из любого итерируемого источника"""
+        for entry in entries:
+            self.append(entry)
+
+    def decode_column(self, name, index):
+        """Значение поля name у записи index"""
+        if name == 'epoch_us':
+            return timestamp_to_epoch_us(self.decode_column('timestamp', index))
+        overflow = self.overflow.get(name)
+        if overflow and index in overflow:
+            return overflow[index]
+        if name == 'timestamp':
+            date = self.dictionaries['date'].values[self.columns['date'][index]]
+            digits = f"{self.columns['time'][index]:012d}"
+            return f"{date}-{digits[:2]}:{digits[2:4]}:{digits[4:6]}.{digits[6:]}"
+        value = self.columns[name][index]
+        if name in self.dictionaries:
+            return self.dictionaries[name].values[value]
+        if name in ('src_ip', 'dst_ip'):
+            return socket.inet_ntoa(value.to_bytes(4, 'big'))
+        return value
+
+    def row(self, index, fields=EXPORT_FIELDS):
+        """Запись index как кортеж в порядке fields"""
+        return tuple(self.decode_column(name, index) for name in fields)
+
+    def iter_rows(self, fields=EXPORT_FIELDS):
+        """Все записи как кортежи в порядке fields (без создания словарей)"""
+        return zip(*(self.iter_column(name) for name in fields))
+
+    def iter_column(self, name):
+        """Значения одной колонки по всем записям"""
+        if name == 'epoch_us':
+            # Время хранится как дата и цифры времени; начало минуты берётся из кеша
+            return map(timestamp_to_epoch_us, self.iter_column('timestamp'))
+        column = self.columns.get(name)
+        if name == 'timestamp':
+            dates = self.dictionaries['date'].values
+            values = (
+                f"{dates[date]}-{digits[:2]}:{digits[2:4]}:{digits[4:6]}.{digits[6:]}" if time >= 0 else None
+                for date, time in zip(self.columns['date'], self.columns['time'])
+                for digits in (f"{time:012d}",)
+            )
+        elif name in self.dictionaries:
+            values = map(self.dictionaries[name].values.__getitem__, column)
+        elif name in ('src_ip', 'dst_ip'):
+            values = (socket.inet_ntoa(value.to_bytes(4, 'big')) for value in column)
+        else:
+            values = iter(column)
+        
+        overflow = self.overflow.get(name)
+        if not overflow:
+            return values
+        return (overflow.get(index, value) for index, value in enumerate(values))
+
+    def value_counts(self, name):
+        """
+        Счётчик записей по каждому значению поля (подсчёт идёт по кодам колонки,
+        с NumPy - векторно). Порядок ключей - по первому появлению значения
+        """
+        if self.overflow.get(name) or name == 'timestamp':
+            return collections.Counter(self.iter_column(name))
+        counts = count_column_values(self.columns[name])
+        if name in self.dictionaries:
+            values = self.dictionaries[name].values
+            return collections.Counter({values[code]: count for code, count in counts.items()})
+        if name in ('src_ip', 'dst_ip'):
+            return collections.Counter({_unpack_ipv4(ip): count for ip, count in counts.items()})
+        return counts
+
+    def select(self, name, predicate, rows=None):
+        """
+        Номера записей (из списка rows или всех), у которых значение поля name
+        удовлетворяет predicate. predicate вызывается один раз на каждое
+        уникальное значение колонки, отбор по кодам идёт на C
+        """
+        column = self.columns[name]
+        dictionary = self.dictionaries.get(name)
+        if dictionary is not None:
+            accepted = {code for code, value in enumerate(dictionary.values) if predicate(value)}
+        elif name in ('src_ip', 'dst_ip'):
+            accepted = {code for code in dict.fromkeys(column) if predicate(_unpack_ipv4(code))}
+        else:
+            accepted = {code for code in dict.fromkeys(column) if predicate(code)}
+        if rows is None:
+            selected = list(itertools.compress(range(len(column)), map(accepted.__contains__, column)))
+        else:
+            selected = [index for index in rows if column[index] in accepted]
+        overflow = self.overflow.get(name)
+        if overflow:
+            # У записей-исключений в колонке заглушка - решает исходное значение
+            candidates = overflow.keys() if rows is None else set(rows).intersection(overflow)
+            selected = sorted(
+                {index for index in selected if index not in overflow}
+                | {index for index in candidates if predicate(overflow[index])}
+            )
+        return selected
+
+    def pair_counts(self):
+        """Счётчик пар (src_ip, dst_ip) за один проход по двум колонкам"""
+        if self.overflow['src_ip'] or self.overflow['dst_ip']:
+            return collections.Counter(zip(self.iter_column('src_ip'), self.iter_column('dst_ip')))
+        np = _load_numpy()
+        if np is None:
+            counts = collections.Counter(zip(self.columns['src_ip'], self.columns['dst_ip']))
+            return collections.Counter({
+                (_unpack_ipv4(src), _unpack_ipv4(dst)): count for (src, dst), count in counts.items()
+            })
+        # Пара упаковывается в одно 64-битное число: src << 32 | dst
+        pairs = np.frombuffer(self.columns['src_ip'], dtype=np.uint32).astype(np.uint64) << np.uint64(32)
+        pairs |= np.frombuffer(self.columns['dst_ip'], dtype=np.uint32)
+        return collections.Counter({
+            (_unpack_ipv4(pair >> 32), _unpack_ipv4(pair & 0xFFFFFFFF)): count
+            for pair, count in _numpy_value_counts(np, pairs).items()
+        })
+
+    @property
+    def nbytes(self):
+        """Примерный объём колонок в байтах (без словарей строк)"""
+        return sum(column.itemsize * len(column) for column in self.columns.values())
+
+    def save(self, path, metadata=None):
+        """
+        Сохраняет хранилище в двоичный колоночный файл (атомарно)
+        Формат: CACHE_MAGIC, длина заголовка (uint32 LE), заголовок JSON
+        (версия, порядок байт, колонки с типом, смещением и длиной, словари
+        строк, исключения, metadata), затем колонки array подряд с выравниванием
+        по 8 байт - их можно читать по отдельности через mmap
+        """
+        import json
+        
+        layout = {}
+        offset = 0
+        for name, column in self.columns.items():
+            layout[name] = [column.typecode, offset, len(column)]
+            offset += -(-column.itemsize * len(column) // 8) * 8
+        header = json.dumps({
+            'version': CACHE_VERSION,
+            'byteorder': sys.byteorder,
+            'columns': layout,
+            'dictionaries': {name: dictionary.values for name, dictionary in self.dictionaries.items()},
+            'overflow': {name: values for name, values in self.overflow.items() if values},
+            'metadata': metadata or {},
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        start = -(-(len(CACHE_MAGIC) + 4 + len(header)) // 8) * 8
+        
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as cache_file:
+            cache_file.write(CACHE_MAGIC + len(header).to_bytes(4, 'little') + header)
+            cache_file.write(bytes(start - cache_file.tell()))
+            for name, column in self.columns.items():
+                data = column.tobytes()
+                cache_file.write(data + bytes(-len(data) % 8))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Открывает файл AlertStore.save через mmap; колонки копируются в array
+        только при первом обращении, поэтому статистика по нескольким полям не
+        читает остальные. metadata из заголовка - в атрибуте metadata
+        Ошибки формата - ValueError
+        """
+        import json
+        
+        with open(path, 'rb') as cache_file:
+            buffer = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+            raise ValueError("не файл кеша")
+        header_end = len(CACHE_MAGIC) + 4 + int.from_bytes(buffer[len(CACHE_MAGIC):len(CACHE_MAGIC) + 4], 'little')
+        header = json.loads(buffer[len(CACHE_MAGIC) + 4:header_end].decode('utf-8'))
+        if header.get('version') != CACHE_VERSION:
+            raise ValueError(f"неподдерживаемая версия кеша: {header.get('version')}")
+        
+        store = cls()
+        start = -(-header_end // 8) * 8
+        layout = {name: (typecode, start + offset, length) for name, (typecode, offset, length) in header['columns'].items()}
+        if set(layout) != set(store.columns) or layout and max(offset + length * array(typecode).itemsize
+                                                                 for typecode, offset, length in layout.values()) > len(buffer):
+            raise ValueError("повреждённый файл кеша")
+        store.columns = _MappedColumns(buffer, layout, header['byteorder'] != sys.byteorder)
+        for name, values in header['dictionaries'].items():
+            dictionary = store.dictionaries[name]
+            dictionary.values = values
+            dictionary.codes = {value: code for code, value in enumerate(values)}
+        for name, values in header['overflow'].items():
+            store.overflow[name] = {int(index): value for index, value in values.items()}
+        store.metadata = header['metadata']
+        return store
+
+def cache_path(filename):
+    """Путь к колоночному кешу рядом с файлом лога"""
+    return filename + CACHE_SUFFIX
+
+def _cache_source(filename, args):
+    """Ключ актуальности кеша: размер и время изменения лога, кодировка"""
+    stat = os.stat(filename)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'encoding': args.encoding}
+
+def load_cache(filename, args):
+    """Кеш лога (AlertStore); None, если кеша нет, он устарел или повреждён"""
+    try:
+        store = AlertStore.load(cache_path(filename))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if store.metadata != _cache_source(filename, args):
+        return None
+    return store
+
+def build_cache(filename, args, counters=None):
+    """
+    Разбирает лог целиком (без фильтров и лимита) и сохраняет кеш
+    Ошибка записи кеша не прерывает анализ - выводится предупреждение
+    """
+    full_args = argparse.Namespace(**vars(args))
+    for name in ('filter', 'priority', 'src', 'dst', 'sid', 'since', 'until', 'where'):
+        setattr(full_args, name, None)
+    full_args.limit = 0
+    # Ключ снимается до разбора: дописанный во время разбора лог сделает кеш устаревшим
+    source = _cache_source(filename, args)
+    store = AlertStore()
+    store.extend(iter_log_entries(filename, full_args, counters=counters))
+    try:
+        store.save(cache_path(filename), source)
+    except OSError as e:
+        print(f"{Fore.YELLOW}⚠ Не удалось сохранить кеш '{cache_path(filename)}': {e}")
+    return store
+
+def _store_rows(store, args):
+    """
+    Номера записей хранилища, прошедших --filter, --priority, --src, --dst и --sid
+    (проверяются по колонкам); None - эти фильтры не заданы
+    """
+    rows = None
+    if args.priority:
+        rows = store.select('priority', lambda value: value == args.priority, rows)
+    if args.src:
+        rows = store.select('src_ip', lambda value: value == args.src, rows)
+    if args.dst:
+        rows = store.select('dst_ip', lambda value: value == args.dst, rows)
+    if args.sid:
+        rows = store.select('rule_id', lambda value: rule_matches(value, args.sid), rows)
+    if args.filter:
+        needle = args.filter.lower()
+        rows = store.select('description', lambda value: needle in value.lower(), rows)
+    return rows
+
+def iter_store_entries(store, args):
+    """
+    Записи хранилища, прошедшие фильтры, с учётом --limit
+    Простые фильтры отбирают номера записей по колонкам, и словари строятся
+    только для них; --since/--until и --where проверяются по самим записям
+    """
+    rows = _store_rows(store, args)
+    entries = store if rows is None else map(store.__getitem__, rows)
+    filtered = args.where is not None or args.since is not None or args.until is not None
+    matched = 0
+    for entry in entries:
+        if filtered and not entry_matches_filters(entry, args):
+            continue
+        matched += 1
+        yield entry
+        if args.limit > 0 and matched >= args.limit:
+            if args.verbose:
+                print(f"{Fore.YELLOW}Достигнут лимит записей: {args.limit}")
+            break
+
+def parse_log_file(filename, args):
+    """
+    Парсит файл лога и возвращает записи в компактном хранилище AlertStore
+    С args.cache все записи берутся из колоночного кеша (или он строится)
+    """
+    if getattr(args, 'cache', False):
+        # Пустое хранилище ложно (__len__) - кеш без записей тоже годен
+        store = load_cache(filename, args)
+        if store is None:
+            store = build_cache(filename, args)
+        if args.filter or args.priority or args.where is not None or has_query(args) or args.limit > 0:
+            filtered = AlertStore()
+            filtered.extend(iter_store_entries(store, args))
+            return filtered
+        return store
+    store = AlertStore()
+    store.extend(iter_log_entries(filename, args))
+    return store
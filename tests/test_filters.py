@@ -0,0 +1,25 @@
+"""
+Выражение --where: подсети только из четырёх десятичных октетов, подстроки
+предфильтра - в том виде, в каком адрес пишет Suricata
+"""
+
+import pytest
+
+from suricata_fastlog.filters import compile_where
+
+@pytest.mark.parametrize('network', ['10/8', '10.1.2.03', '0x0a.1.2.3', '10.1.2', '10.0.0.0/33'])
+def test_shorthand_networks_rejected(network):
+    with pytest.raises(ValueError, match='неверная подсеть'):
+        compile_where(f'src in {{{network}}}')
+
+def test_network_membership():
+    where = compile_where('src in {10.0.0.0/8, 192.168.0.1}')
+    assert where.matches({'src_ip': '10.1.2.3'})
+    assert where.matches({'src_ip': '192.168.0.1'})
+    assert not where.matches({'src_ip': '0.0.0.10'})
+    assert not where.matches({'src_ip': '2001:db8::1'})
+
+def test_single_address_prefilter():
+    where = compile_where('dst in {192.168.0.1, 10.0.0.5/32}')
+    assert where.prefilter.match_text('{TCP} 10.0.3.13:52713 -> 10.0.0.5:443')
+    assert not where.prefilter.match_text('{TCP} 10.0.3.13:52713 -> 10.0.0.6:443')
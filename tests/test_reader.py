@@ -0,0 +1,122 @@
+"""
+Чтение нескольких источников (--sources) и сжатых логов: ошибка в потоке
+чтения или распаковки не должна оставлять разбор ждать маркер конца бесконечно
+"""
+
+import os
+import sys
+import gzip
+import threading
+import subprocess
+
+import pytest
+
+from suricata_fastlog import alert_options, reader
+
+LOG_LINE = ('10/28/2024-02:16:07.519501  [**] [1:2012887:3] ET POLICY Http Client Body contains pass= '
+            'in cleartext [**] [Classification: Potential Corporate Privacy Violation] [Priority: 1] '
+            '{TCP} 10.0.3.13:52713 -> 192.168.0.1:443\n')
+
+def _collect(iterator, timeout=30):
+    """Записи итератора в отдельном потоке: зависание - провал теста, а не вечное ожидание"""
+    result = {}
+    
+    def run():
+        try:
+            result['entries'] = list(iterator)
+        except Exception as e:
+            result['error'] = e
+    
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "разбор источников завис"
+    return result
+
+@pytest.fixture
+def sources(tmp_path):
+    good = tmp_path / 's01' / 'fast.log'
+    bad = tmp_path / 's02' / 'fast.log'
+    for path in (good, bad):
+        path.parent.mkdir()
+        path.write_text(LOG_LINE * 3)
+    return [(str(good), 's01'), (str(bad), 's02')]
+
+@pytest.fixture
+def failing_reader(monkeypatch, sources):
+    """Открытие второго источника падает с исключением, которого чтение не ждёт"""
+    open_stream = reader.open_input_stream
+    
+    def open_input_stream(path, compression=None):
+        if path == sources[1][0]:
+            raise ValueError("сбой распаковки")
+        return open_stream(path, compression)
+    monkeypatch.setattr(reader, 'open_input_stream', open_input_stream)
+
+def test_unexpected_reader_error_skips_source(sources, failing_reader, capsys):
+    options = alert_options()
+    result = _collect(reader.read_log_entries('sources', options, sources=sources))
+    assert len(result['entries']) == 3
+    assert {entry['sensor'] for entry in result['entries']} == {'s01'}
+    assert "s02" in capsys.readouterr().out
+
+def test_unexpected_reader_error_strict_raises(sources, failing_reader):
+    options = alert_options()
+    result = _collect(reader.read_log_entries('sources', options, sources=sources, strict=True))
+    assert isinstance(result.get('error'), ValueError)
+
+def _gzip_log(path, corrupt=False, truncate=False):
+    """Сжатый лог: с испорченным потоком deflate или обрезанный"""
+    data = bytearray(gzip.compress((LOG_LINE * 2000).encode()))
+    if corrupt:
+        for index in range(200, 400):
+            data[index] ^= 0x5a
+    if truncate:
+        del data[len(data) // 2:]
+    path.write_bytes(bytes(data))
+    return str(path)
+
+@pytest.mark.parametrize('damage', ['corrupt', 'truncate'])
+def test_damaged_gzip_raises(tmp_path, damage):
+    path = _gzip_log(tmp_path / 'fast.log.gz', **{damage: True})
+    result = _collect(reader.read_log_entries(path, alert_options()))
+    assert isinstance(result.get('error'), OSError)
+    assert 'gzip' in str(result['error'])
+
+def test_damaged_gzip_source_skipped(tmp_path, capsys):
+    (tmp_path / 's01').mkdir()
+    (tmp_path / 's02').mkdir()
+    good = tmp_path / 's01' / 'fast.log'
+    good.write_text(LOG_LINE)
+    bad = _gzip_log(tmp_path / 's02' / 'fast.log.1.gz', corrupt=True)
+    sources = [(str(good), 's01'), (bad, 's02')]
+    result = _collect(reader.read_log_entries('sources', alert_options(), sources=sources))
+    assert len(result['entries']) == 1
+    assert 'повреждён' in capsys.readouterr().out
+
+def test_damaged_gzip_command_line_exits(tmp_path):
+    path = _gzip_log(tmp_path / 'fast.log.gz', corrupt=True)
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'parse_fast.py')
+    completed = subprocess.run(
+        [sys.executable, script, '-i', path, '-q', '-s', '--no-export'],
+        stdin=subprocess.DEVNULL, capture_output=True, timeout=60,
+    )
+    assert completed.returncode == 1
+
+@pytest.mark.parametrize('limit', [0, 1])
+def test_parallel_chunk_closes_mmap(tmp_path, monkeypatch, limit):
+    path = tmp_path / 'fast.log'
+    path.write_text(LOG_LINE * 5)
+    mappings = []
+    open_mmap = reader.mmap.mmap
+    
+    def mmap(*args, **kwargs):
+        mappings.append(open_mmap(*args, **kwargs))
+        return mappings[-1]
+    monkeypatch.setattr(reader.mmap, 'mmap', mmap)
+    
+    # И при остановке по лимиту посреди блока отображение закрывается сразу
+    task = (str(path), 0, path.stat().st_size, 'utf-8', reader._filter_args(alert_options()), limit, False, True)
+    entries = reader._parse_chunk(task)[0]
+    assert len(entries) == (limit or 5)
+    assert len(mappings) == 1 and mappings[0].closed
@@ -0,0 +1,295 @@
+"""
+Отправка коллектору (--sink) против локальных серверов-заглушек на
+эфемерных портах: пачки по размеру и по времени, тело _bulk, повторы со
+спулом, досылка спула без повторов записей и остаток пачки при close()
+"""
+
+import json
+import time
+import socket
+import threading
+import socketserver
+import http.server
+from datetime import datetime
+
+import pytest
+
+from suricata_fastlog import parse_suricata_log_line
+from suricata_fastlog.sink import AlertSink
+
+LOG_LINE = ('10/28/2024-02:16:07.519501  [**] [1:2012887:3] ET POLICY Http Client Body contains pass= '
+            'in cleartext [**] [Classification: Potential Corporate Privacy Violation] [Priority: 1] '
+            '{{TCP}} 10.0.3.13:{port} -> 192.168.0.1:443')
+
+def make_records(count, first_port=10000):
+    """Записи с разными портами источника - каждую можно узнать у коллектора"""
+    return [parse_suricata_log_line(LOG_LINE.format(port=first_port + number)) for number in range(count)]
+
+def wait_for(condition, timeout=5.0):
+    """Ждёт выполнения условия (данные у коллектора появляются асинхронно)"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+class BulkServer(http.server.ThreadingHTTPServer):
+    """Заглушка Elasticsearch: запоминает запросы, отвечает status"""
+    daemon_threads = True
+
+    def __init__(self, status=200):
+        self.status = status
+        self.requests = []
+        super().__init__(('127.0.0.1', 0), BulkHandler)
+
+    @property
+    def documents(self):
+        """Документы всех принятых (status 200) запросов _bulk"""
+        return [
+            json.loads(line) for request in self.requests if request['status'] == 200
+            for line in request['body'].decode('utf-8').splitlines()[1::2]
+        ]
+
+class BulkHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append({
+            'path': self.path, 'content_type': self.headers['Content-Type'], 'body': body,
+            'status': self.server.status, 'time': time.monotonic(),
+        })
+        reply = b'{"took":1,"errors":false,"items":[]}'
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def bulk_server():
+    servers = []
+
+    def start(status=200):
+        server = BulkServer(status)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def sink_url(server, path='/suricata'):
+    return f'http://127.0.0.1:{server.server_address[1]}{path}'
+
+def batch_sizes(server):
+    return [len(request['body'].splitlines()) // 2 for request in server.requests]
+
+def test_batches_by_size(bulk_server):
+    server = bulk_server()
+    sink = AlertSink(sink_url(server), batch_size=3, interval=60, chunk_size=1)
+    for record in make_records(7):
+        sink.write(record)
+    assert sink.close()
+    assert batch_sizes(server) == [3, 3, 1]
+    assert sink.sent == 7 and sink.batches == 3
+
+def test_batches_by_interval(bulk_server):
+    server = bulk_server()
+    sink = AlertSink(sink_url(server), batch_size=100, interval=0.2, chunk_size=1)
+    for record in make_records(2):
+        sink.write(record)
+    # Неполная пачка уходит по истечении interval, не дожидаясь close()
+    assert wait_for(lambda: len(server.requests) == 1, timeout=3)
+    assert batch_sizes(server) == [2]
+    assert sink.close()
+    assert batch_sizes(server) == [2]
+
+def test_bulk_request_body(bulk_server):
+    server = bulk_server()
+    records = make_records(3)
+    sink = AlertSink(sink_url(server), batch_size=10, chunk_size=1)
+    for record in records:
+        sink.write(record)
+    assert sink.close()
+    [request] = server.requests
+    assert request['path'] == '/suricata/_bulk'
+    assert request['content_type'] == 'application/x-ndjson'
+    lines = request['body'].decode('utf-8').split('\n')
+    # NDJSON: действие и документ по очереди, тело заканчивается переводом строки
+    assert lines[-1] == ''
+    assert [json.loads(line) for line in lines[0:-1:2]] == [{'index': {}}] * 3
+    documents = [json.loads(line) for line in lines[1:-1:2]]
+    assert [document['src_port'] for document in documents] == [record['src_port'] for record in records]
+    assert documents[0]['rule_id'] == '1:2012887:3'
+    assert documents[0]['priority'] == 1
+
+def test_retries_with_backoff_then_spool(bulk_server, tmp_path):
+    server = bulk_server(status=503)
+    spool = tmp_path / 'sink.spool'
+    sink = AlertSink(sink_url(server), batch_size=5, retries=2, spool=str(spool), chunk_size=1)
+    for record in make_records(15):
+        sink.write(record)
+    assert sink.close()
+    # Первая пачка: попытка и два повтора с растущей паузой (0.2 и 0.4 с);
+    # дальше коллектор считается недоступным и пачки сразу идут в спул
+    assert len(server.requests) == 3
+    times = [request['time'] for request in server.requests]
+    assert times[1] - times[0] >= 0.15
+    assert times[2] - times[1] >= 0.35
+    assert sink.sent == 0 and sink.dropped == 0 and sink.spooled == 15
+    assert len(spool.read_text(encoding='utf-8').splitlines()) == 15
+    assert '503' in str(sink.last_error)
+
+def test_dropped_without_spool(bulk_server):
+    server = bulk_server(status=503)
+    sink = AlertSink(sink_url(server), batch_size=5, retries=0, chunk_size=1)
+    for record in make_records(5):
+        sink.write(record)
+    assert not sink.close()
+    assert sink.dropped == 5
+
+def test_spool_replayed_once_when_server_is_back(bulk_server, tmp_path):
+    spool = tmp_path / 'sink.spool'
+    down = bulk_server(status=503)
+    sink = AlertSink(sink_url(down), batch_size=4, retries=0, spool=str(spool), chunk_size=1)
+    for record in make_records(10):
+        sink.write(record)
+    sink.close()
+    assert sink.spooled == 10
+
+    # Коллектор снова доступен: сначала досылается спул, потом новые записи
+    server = bulk_server()
+    sink = AlertSink(sink_url(server), batch_size=4, spool=str(spool), chunk_size=1)
+    for record in make_records(3, first_port=20000):
+        sink.write(record)
+    assert sink.close()
+    ports = [document['src_port'] for document in server.documents]
+    assert sorted(ports) == list(range(10000, 10010)) + list(range(20000, 20003))
+    assert ports[:10] == list(range(10000, 10010))
+    assert sink.replayed == 10 and sink.sent == 13 and sink.spooled == 0
+    assert not spool.exists() and not (tmp_path / 'sink.spool.replay').exists()
+
+    # Следующий запуск не досылает записи повторно
+    sink = AlertSink(sink_url(server), spool=str(spool))
+    assert sink.close()
+    assert sink.replayed == 0 and len(server.documents) == 13
+
+class LineCollector(socketserver.ThreadingTCPServer):
+    """Заглушка TCP-коллектора: строки NDJSON всех соединений"""
+    daemon_threads = True
+
+    def __init__(self):
+        self.lines = []
+        super().__init__(('127.0.0.1', 0), LineHandler)
+
+class LineHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            self.server.lines.append(json.loads(line))
+
+@pytest.fixture
+def tcp_server():
+    server = LineCollector()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_close_flushes_partial_batch_tcp(tcp_server):
+    port = tcp_server.server_address[1]
+    # Ни размер пачки, ни interval не наступают - остаток отправляет только close()
+    sink = AlertSink(f'tcp://127.0.0.1:{port}', batch_size=1000, interval=60)
+    for record in make_records(25):
+        sink.write(record)
+    assert sink.close()
+    assert sink.sent == 25 and sink.batches == 1
+    assert wait_for(lambda: len(tcp_server.lines) == 25)
+    assert [line['src_port'] for line in tcp_server.lines] == list(range(10000, 10025))
+
+@pytest.fixture
+def udp_socket():
+    collector = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    collector.bind(('127.0.0.1', 0))
+    collector.settimeout(5)
+    yield collector
+    collector.close()
+
+def receive_datagrams(collector, count):
+    return [collector.recv(65536) for _ in range(count)]
+
+def test_udp_packs_ndjson_datagrams(udp_socket):
+    port = udp_socket.getsockname()[1]
+    sink = AlertSink(f'udp://127.0.0.1:{port}', batch_size=100)
+    for record in make_records(20):
+        sink.write(record)
+    assert sink.close()
+    lines = []
+    while len(lines) < 20:
+        datagram = udp_socket.recv(65536)
+        assert len(datagram) <= 1400
+        lines.extend(json.loads(line) for line in datagram.splitlines())
+    assert [line['src_port'] for line in lines] == list(range(10000, 10020))
+
+def test_syslog_message_per_datagram(udp_socket):
+    port = udp_socket.getsockname()[1]
+    sink = AlertSink(f'syslog://127.0.0.1:{port}', batch_size=10)
+    for record in make_records(2):
+        sink.write(record)
+    assert sink.close()
+    for datagram in receive_datagrams(udp_socket, 2):
+        message = datagram.decode('utf-8')
+        # local0 (16) * 8 + critical (2) для приоритета 1; время Suricata местное -
+        # со смещением часового пояса машины разбора
+        moment = datetime(2024, 10, 28, 2, 16, 7, 519501).astimezone().isoformat()
+        assert message.startswith(f'<130>1 {moment} ')
+        assert message.split(' ')[1][-6] in '+-'
+        assert json.loads(message[message.index('{'):])['priority'] == 1
+
+class FlakyTransport:
+    """Транспорт, который один раз падает на второй нагрузке пачки"""
+
+    def __init__(self):
+        self.sent = []
+        self.failed = False
+
+    def send(self, payloads):
+        while payloads:
+            if len(self.sent) == 1 and not self.failed:
+                self.failed = True
+                raise OSError("сбой сети")
+            self.sent.append(payloads[0])
+            del payloads[0]
+
+    def close(self):
+        pass
+
+def test_udp_retry_resends_only_undelivered(monkeypatch):
+    transport = FlakyTransport()
+    monkeypatch.setattr(AlertSink, '_transport', lambda self: transport)
+    sink = AlertSink('udp://127.0.0.1:9', batch_size=100, retries=1)
+    for record in make_records(40):
+        sink.write(record)
+    assert sink.close()
+    assert transport.failed and len(transport.sent) > 2
+    lines = [json.loads(line) for datagram in transport.sent for line in datagram.splitlines()]
+    # Первая датаграмма не отправлена повторно - каждая запись ровно один раз
+    assert [line['src_port'] for line in lines] == list(range(10000, 10040))
+    assert sink.sent == 40
+
+def test_partial_failure_spools_only_rest(monkeypatch, tmp_path):
+    transport = FlakyTransport()
+    monkeypatch.setattr(AlertSink, '_transport', lambda self: transport)
+    spool = tmp_path / 'sink.spool'
+    sink = AlertSink('syslog://127.0.0.1:9', batch_size=5, retries=0, spool=str(spool))
+    for record in make_records(5):
+        sink.write(record)
+    assert sink.close()
+    # Первое сообщение доставлено, в спул - только остальные четыре
+    assert sink.sent == 1 and sink.spooled == 4
+    assert len(spool.read_text(encoding='utf-8').splitlines()) == 4
@@ -0,0 +1,61 @@
+"""
+Состояние --state: смещение сохраняется в паре с тем файлом, который
+действительно прочитан, и только после того, как записи выгружены
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+from suricata_fastlog import alert_options, reader
+from suricata_fastlog.state import load_state_offset, save_state
+
+LOG_LINE = ('10/28/2024-02:16:07.519501  [**] [1:2012887:3] ET POLICY Http Client Body contains pass= '
+            'in cleartext [**] [Classification: Potential Corporate Privacy Violation] [Priority: 1] '
+            '{TCP} 10.0.3.13:52713 -> 192.168.0.1:443\n')
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'parse_fast.py')
+
+def run_cli(*arguments):
+    return subprocess.run(
+        [sys.executable, SCRIPT, *arguments, '-q'],
+        stdin=subprocess.DEVNULL, capture_output=True, timeout=60,
+    )
+
+def test_rotation_during_run_keeps_read_file(tmp_path):
+    log = tmp_path / 'fast.log'
+    log.write_text(LOG_LINE * 5)
+    old_inode = os.stat(log).st_ino
+    options = alert_options()
+    progress = {'offset': 0}
+    entries = reader.read_log_entries(str(log), options, start=0, progress=progress)
+    next(entries)
+    
+    # logrotate во время разбора: старый файл переименован, по имени - новый
+    os.rename(log, tmp_path / 'fast.log.1')
+    log.write_text('new\n' * 1000)
+    assert len(list(entries)) == 4
+    state = tmp_path / 'state.json'
+    assert save_state(str(state), str(log), progress)
+    
+    saved = json.loads(state.read_text(encoding='utf-8'))
+    assert saved['inode'] == old_inode and saved['offset'] == len(LOG_LINE) * 5
+    # Смещение старого файла не применяется к новому - разбор с начала
+    assert load_state_offset(str(state), str(log), options) == 0
+
+def test_state_not_saved_when_export_fails(tmp_path):
+    log = tmp_path / 'fast.log'
+    log.write_text(LOG_LINE * 5)
+    state = tmp_path / 'state.json'
+    # Каталога нет - экспорт не удаётся, смещение не должно сдвинуться
+    failed = run_cli('-i', str(log), '--state', str(state), '--format', 'csv',
+                     '-o', str(tmp_path / 'missing' / 'out.csv'))
+    assert 'не обновлено' in failed.stdout.decode('utf-8')
+    assert not state.exists()
+    
+    # Повторный запуск выгружает те же записи и только тогда сохраняет состояние
+    output = tmp_path / 'out.csv'
+    run_cli('-i', str(log), '--state', str(state), '--format', 'csv', '-o', str(output))
+    assert len(output.read_text(encoding='utf-8').splitlines()) == 6
+    assert json.loads(state.read_text(encoding='utf-8'))['offset'] == len(LOG_LINE) * 5
@@ -0,0 +1,23 @@
+"""
+Колоночный кеш (--cache): готовый кеш используется повторно, даже если
+записей в нём нет
+"""
+
+import os
+
+from suricata_fastlog import alert_options
+from suricata_fastlog.store import cache_path, parse_log_file
+
+def test_empty_cache_is_reused(tmp_path):
+    log = tmp_path / 'fast.log'
+    log.write_text('не строка Suricata\n')
+    options = alert_options()
+    options.cache = True
+    assert len(parse_log_file(str(log), options)) == 0
+    cache = cache_path(str(log))
+    built = os.stat(cache).st_mtime_ns
+    
+    os.utime(cache, ns=(built - 10**9, built - 10**9))
+    assert len(parse_log_file(str(log), options)) == 0
+    # Кеш не перестраивался - время изменения то, что выставлено выше
+    assert os.stat(cache).st_mtime_ns == built - 10**9